@@ -1,24 +1,39 @@
 
 
+import sys
+
+# Las tareas programadas (--auto) no necesitan la interfaz: se despachan a la
+# entrada sin interfaz antes de importar tkinter.
+if __name__ == "__main__" and "--auto" in sys.argv:
+    import backup_auto
+    sys.exit(backup_auto.main(sys.argv[1:]))
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import subprocess
 import datetime
 import os
-import json
-import shutil
-import tempfile
-import configparser
-import sys
-import zipfile
 import uuid
+import itertools
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from motor_backup import (
+    ARCHIVO_MANIFIESTO, ESTADO_MAP, agregar_copia, asignar_trabajo_actual, cancelar_trabajo,
+    cargar_configparser, carpeta_valida, codecs_disponibles, change_tarea_windows_enable, consultar_copias,
+    consultar_tareas_programadas, contar_copias, crear_tarea_windows, delete_tarea_windows,
+    ejecutar_mysqldump, ejecutar_mysqldump_paralelo, estado_tarea, eventos_trabajos, formatear_informe_dedup,
+    formatear_reporte_restauracion, informe_deduplicacion,
+    guardar_configparser, guardar_job_config, leer_job_config, leer_workers, listar_jobs_config,
+    motores_disponibles,
+    obtener_procesos_en_ejecucion, precalentar_ejecutables, restaurar_archivo_backup, run_tarea_windows,
+    ruta_comprimida
+)
 
-# Archivo de configuración y historial
-CONFIG_FILE = "config.ini"
-ARCHIVO_COPIAS = "copias.json"
+SIN_COMPRIMIR = "ninguna"
 
 # -------------------------
-# Traducciones (inglés -> español) y normalizaciones
+# Traducciones (inglés -> español) para la interfaz
 # -------------------------
 DIAS_ING_ES = {
     "MON": "Lunes",
@@ -37,448 +52,204 @@ TIPO_ING_ES = {
     "hourly": "Cada X horas"
 }
 
-ESTADO_MAP = {
-    "Ready": "Listo",
-    "Running": "Ejecutándose",
-    "Disabled": "Deshabilitada",
-    # Posibles valores en Windows español
-    "Listo": "Listo",
-    "En ejecución": "Ejecutándose",
-    "En ejecución.": "Ejecutándose",
-    "Deshabilitada": "Deshabilitada",
-    "Deshabilitada.": "Deshabilitada"
-}
-
 # -------------------------
-# UTILIDADES DE CONFIGURACIÓN
+# SELECCIÓN DE DESTINO
 # -------------------------
-def cargar_configparser():
-    config = configparser.ConfigParser()
-    if os.path.exists(CONFIG_FILE):
-        config.read(CONFIG_FILE, encoding="utf-8")
-    return config
-
-def guardar_configparser(config):
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        config.write(f)
-
-def guardar_job_config(nombre, datos: dict):
-    config = cargar_configparser()
-    seccion = f"job_{nombre}"
-    if seccion in config:
-        config.remove_section(seccion)
-    config[seccion] = {}
-    for k, v in datos.items():
-        if isinstance(v, (list, tuple)):
-            config[seccion][k] = ",".join(map(str, v))
-        else:
-            config[seccion][k] = "" if v is None else str(v)
-    guardar_configparser(config)
-
-def leer_job_config(nombre):
-    config = cargar_configparser()
-    seccion = f"job_{nombre}"
-    if seccion not in config:
-        return None
-    data = {}
-    for k, v in config[seccion].items():
-        if k in ("tablas", "dias_semana"):
-            data[k] = v.split(",") if v else []
-        elif k in ("zip",):
-            data[k] = config[seccion].getboolean(k, fallback=False)
-        elif k in ("repeticion_hours",):
-            try:
-                data[k] = int(v)
-            except:
-                data[k] = None
-        else:
-            data[k] = v
-    return data
-
-def listar_jobs_config():
-    cfg = cargar_configparser()
-    jobs = []
-    for s in cfg.sections():
-        if s.startswith("job_"):
-            jobname = s[len("job_"):]
-            datos = leer_job_config(jobname)
-            if datos is None:
-                continue
-            datos["_jobname"] = jobname
-            jobs.append(datos)
-    return jobs
+def seleccionar_destino():
+    carpeta = filedialog.askdirectory()
+    if carpeta:
+        entry_destino.delete(0, tk.END)
+        entry_destino.insert(0, carpeta)
 
 # -------------------------
-# HISTORIAL DE COPIAS
+# REFRESCO INCREMENTAL DE TREEVIEWS
 # -------------------------
-def cargar_copias():
-    if not os.path.exists(ARCHIVO_COPIAS):
-        with open(ARCHIVO_COPIAS, "w", encoding="utf-8") as f:
-            json.dump([], f, indent=4, ensure_ascii=False)
-        return []
-    try:
-        with open(ARCHIVO_COPIAS, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        with open(ARCHIVO_COPIAS, "w", encoding="utf-8") as f:
-            json.dump([], f, indent=4, ensure_ascii=False)
-        return []
-
-def guardar_copias():
-    with open(ARCHIVO_COPIAS, "w", encoding="utf-8") as f:
-        json.dump(copias, f, indent=4, ensure_ascii=False)
+snapshots_treeview = {}
 
-copias = cargar_copias()
+def sincronizar_treeview(tree, filas):
+    """
+    Aplica `filas` (lista ordenada de (iid, valores, tags)) sobre `tree`
+    tocando solo lo que cambió desde el refresco anterior: borra las filas
+    que ya no están, inserta las nuevas, actualiza las modificadas y mueve
+    las que cambiaron de posición. Así se conservan selección y scroll.
+    """
+    previo = snapshots_treeview.get(str(tree), {})
+    nuevo = {}
+    for iid, valores, tags in filas:
+        nuevo[str(iid)] = (tuple("" if v is None else v for v in valores), tuple(tags))
+
+    for iid in tree.get_children():
+        if iid not in nuevo:
+            tree.delete(iid)
+
+    for indice, (iid, (valores, tags)) in enumerate(nuevo.items()):
+        if not tree.exists(iid):
+            tree.insert("", indice, iid=iid, values=valores, tags=tags)
+            continue
+        if previo.get(iid) != (valores, tags):
+            tree.item(iid, values=valores, tags=tags)
+        if tree.index(iid) != indice:
+            tree.move(iid, "", indice)
+
+    snapshots_treeview[str(tree)] = nuevo
 
 # -------------------------
-# BUSCAR mysqldump / mysql EN SISTEMA
+# ACTUALIZAR TABLA HISTORIAL (paginada)
 # -------------------------
-def buscar_ejecutable(nombre):
-    posibles = [
-        rf"C:\\xampp\\mysql\\bin\\{nombre}",
-        rf"C:\\Program Files\\xampp\\mysql\\bin\\{nombre}",
-        rf"C:\\Program Files (x86)\\xampp\\mysql\\bin\\{nombre}",
-        rf"D:\\xampp\\mysql\\bin\\{nombre}",
-        rf"D:\\Program Files\\xampp\\mysql\\bin\\{nombre}",
-    ]
-    for ruta in posibles:
-        if os.path.exists(ruta):
-            return ruta
-
-    for unidad in ["C:\\", "D:\\"]:
-        for raiz, dirs, archivos in os.walk(unidad):
-            if nombre in archivos:
-                return os.path.join(raiz, nombre)
-    return None
-
-def obtener_ejecutable_seguro(nombre):
-    encontrado = buscar_ejecutable(nombre)
-    if not encontrado:
-        messagebox.showerror(f"{nombre} no encontrado",
-                             f"No se encontró {nombre}. Instalá XAMPP o localízalo manualmente.")
-        return None
-    temp_dir = os.path.join(tempfile.gettempdir(), f"{nombre}_safe")
-    if not os.path.exists(temp_dir):
-        os.makedirs(temp_dir)
-    destino = os.path.join(temp_dir, nombre)
-    try:
-        if not os.path.exists(destino) or os.path.getsize(destino) != os.path.getsize(encontrado):
-            shutil.copy(encontrado, destino)
-    except Exception:
-        return encontrado
-    return destino
+TAMANO_PAGINA_HISTORIAL = 200
+# pagina None = seguir siempre la última página (las copias más recientes)
+estado_historial = {"pagina": None}
 
-# -------------------------
-# VALIDACIONES DE RUTAS
-# -------------------------
-def carpeta_valida(path):
-    path = (path or "").lower().replace("/", "\\")
-    prohibidas = [
-        "c:\\program files",
-        "c:\\program files (x86)",
-        "c:\\windows",
-        "c:\\programdata",
-        "c:\\xampp\\mysql\\bin"
-    ]
-    return not any(path.startswith(p) for p in prohibidas)
+def total_paginas_historial(cantidad):
+    return max(1, (cantidad + TAMANO_PAGINA_HISTORIAL - 1) // TAMANO_PAGINA_HISTORIAL)
 
-# -------------------------
-# FUNCIONES DE BACKUP Y ZIP
-# -------------------------
-def agregar_copia(usuario, contrasena, bd, ruta, hora=None):
-    if hora is None:
-        hora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    copias.append({
-        "usuario": usuario,
-        "contrasena": contrasena,
-        "bd": bd,
-        "hora": hora,
-        "ruta": ruta
-    })
-    guardar_copias()
+def actualizar_tabla_historial():
+    cantidad = contar_copias()
+    total = total_paginas_historial(cantidad)
+    pagina = estado_historial["pagina"]
+    if pagina is None or pagina >= total:
+        pagina = total - 1
+        estado_historial["pagina"] = None
+
+    filas = []
+    for copia in consultar_copias(limite=TAMANO_PAGINA_HISTORIAL, offset=pagina * TAMANO_PAGINA_HISTORIAL):
+        filas.append((copia["id"], (copia["id"], copia.get("usuario"), copia.get("bd"),
+                                    copia.get("hora"), copia.get("ruta")), ()))
+    sincronizar_treeview(tabla_historial, filas)
+    label_pagina_historial.config(text=f"Página {pagina + 1} de {total} ({cantidad} copias)")
+
+def mover_pagina_historial(delta):
+    total = total_paginas_historial(contar_copias())
+    actual = estado_historial["pagina"]
+    if actual is None:
+        actual = total - 1
+    nueva = min(max(actual + delta, 0), total - 1)
+    estado_historial["pagina"] = None if nueva == total - 1 else nueva
     actualizar_tabla_historial()
 
-def zip_file(path_sql, keep_original=False):
-    try:
-        base = os.path.splitext(path_sql)[0]
-        zip_path = base + ".zip"
-        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-            zf.write(path_sql, arcname=os.path.basename(path_sql))
-        if not keep_original:
-            try:
-                os.remove(path_sql)
-            except:
-                pass
-        return zip_path
-    except Exception:
-        return None
-
-def ejecutar_mysqldump(usuario, contrasena, bd, tablas, destino_file):
-    mysqldump = obtener_ejecutable_seguro("mysqldump.exe")
-    if not mysqldump:
-        return (False, "mysqldump no encontrado")
-
-    comando = [mysqldump, "-u", usuario]
-    if contrasena:
-        comando.append(f"-p{contrasena}")
-
-    if tablas:
-        if isinstance(tablas, str):
-            tablas = tablas.split()
-        comando += [bd] + tablas
-    else:
-        comando.append(bd)
-
-    try:
-        with open(destino_file, "w", encoding="utf-8") as salida:
-            resultado = subprocess.run(comando, stdout=salida, stderr=subprocess.PIPE, text=True)
-
-        if resultado.returncode != 0:
-            return (False, resultado.stderr)
-        return (True, None)
-    except Exception as e:
-        return (False, str(e))
+def mostrar_informe_dedup():
+    carpeta = filedialog.askdirectory(title="Carpeta con backups deduplicados")
+    if not carpeta:
+        return
+    enviar_trabajo("Informe de deduplicación", lambda: informe_deduplicacion(carpeta),
+                   lambda informe: messagebox.showinfo("Deduplicación", formatear_informe_dedup(informe)),
+                   ejecutor=ejecutor_consultas)
 
 # -------------------------
-# RESTAURACIÓN DE SQL
+# COLA DE TRABAJOS (dumps/restauraciones fuera del hilo de Tk)
 # -------------------------
-def ejecutar_mysql_restore(usuario, contrasena, bd, sql_path):
-    mysql_exe = obtener_ejecutable_seguro("mysql.exe")
-    if not mysql_exe:
-        return (False, "mysql.exe no encontrado")
-
-    comando = [mysql_exe, "-u", usuario]
-    if contrasena:
-        comando.append(f"-p{contrasena}")
-    comando.append(bd)
+MAX_TRABAJOS_SIMULTANEOS = 2
+ejecutor_trabajos = ThreadPoolExecutor(max_workers=MAX_TRABAJOS_SIMULTANEOS)
+ejecutor_consultas = ThreadPoolExecutor(max_workers=1)
+trabajos = {}
+contador_trabajos = itertools.count(1)
 
+def enviar_trabajo(descripcion, funcion, al_terminar=None, visible=True, ejecutor=None):
+    """
+    Ejecuta funcion() en un hilo del pool. al_terminar(resultado) se llama
+    luego en el hilo de Tk (vía procesar_eventos_trabajos), salvo que el
+    trabajo haya sido cancelado.
+    """
+    trabajo = {
+        "id": next(contador_trabajos),
+        "descripcion": descripcion,
+        "estado": "En cola",
+        "progreso": "",
+        "cancelado": False,
+        "procesos": [],
+        "lock": threading.Lock(),
+        "visible": visible,
+        "futuro": None
+    }
+    trabajos[trabajo["id"]] = trabajo
+
+    def correr():
+        asignar_trabajo_actual(trabajo)
+        eventos_trabajos.put(("estado", trabajo, "En ejecución"))
+        try:
+            resultado = funcion()
+        except Exception as e:
+            resultado = (False, str(e))
+        finally:
+            asignar_trabajo_actual(None)
+        eventos_trabajos.put(("fin", trabajo, resultado, al_terminar))
+
+    trabajo["futuro"] = (ejecutor or ejecutor_trabajos).submit(correr)
+    actualizar_fila_trabajo(trabajo)
+    return trabajo
+
+def procesar_eventos_trabajos():
     try:
-        with open(sql_path, "r", encoding="utf-8") as f:
-            resultado = subprocess.run(comando, stdin=f, stderr=subprocess.PIPE, text=True)
-
-        if resultado.returncode != 0:
-            return (False, resultado.stderr)
-        return (True, None)
-    except Exception as e:
-        return (False, str(e))
+        while True:
+            evento = eventos_trabajos.get_nowait()
+            tipo, trabajo = evento[0], evento[1]
+            if tipo == "estado":
+                trabajo["estado"] = evento[2]
+            elif tipo == "progreso":
+                trabajo["progreso"] = evento[2]
+            elif tipo == "fin":
+                resultado, al_terminar = evento[2], evento[3]
+                ok = resultado[0] if isinstance(resultado, tuple) else True
+                if trabajo["cancelado"]:
+                    trabajo["estado"] = "Cancelado"
+                else:
+                    trabajo["estado"] = "Completado" if ok else "Error"
+                trabajos.pop(trabajo["id"], None)
+                if al_terminar and not trabajo["cancelado"]:
+                    try:
+                        al_terminar(resultado)
+                    except Exception as e:
+                        messagebox.showerror("Error", str(e))
+            actualizar_fila_trabajo(trabajo)
+    except queue.Empty:
+        pass
+    ventana.after(100, procesar_eventos_trabajos)
 
-# -------------------------
-# EJECUTAR JOB AUTOMÁTICO (Programador Windows)
-# -------------------------
-def ejecutar_job_auto(jobname):
-    datos = leer_job_config(jobname)
-    if not datos:
+def actualizar_fila_trabajo(trabajo):
+    if not trabajo["visible"]:
         return
-
-    usuario = datos.get("usuario", "")
-    contrasena = datos.get("contrasena", "")
-    bd = datos.get("bd", "")
-    destino = datos.get("destino", "") or "."
-    tablas = datos.get("tablas", []) or []
-    zip_opt = datos.get("zip", False)
-    tablas_param = tablas if tablas else None
-
-    fecha = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-
-    if tablas_param:
-        tablas_name = "_".join(tablas_param).replace(" ", "_")
-        archivo = os.path.join(destino, f"{bd}_TABLAS_{tablas_name}_{fecha}.sql")
+    iid = str(trabajo["id"])
+    valores = (trabajo["id"], trabajo["descripcion"], trabajo["estado"], trabajo["progreso"])
+    if tree_trabajos.exists(iid):
+        tree_trabajos.item(iid, values=valores)
     else:
-        archivo = os.path.join(destino, f"{bd}_backup_{fecha}.sql")
+        tree_trabajos.insert("", 0, iid=iid, values=valores)
 
-    ok, err = ejecutar_mysqldump(usuario, contrasena, bd, tablas_param, archivo)
-    if not ok:
+def cancelar_trabajo_seleccionado():
+    sel = tree_trabajos.selection()
+    if not sel:
+        messagebox.showerror("Error", "Seleccioná un trabajo en la lista.")
         return
-
-    archivo_result = archivo
-    if zip_opt:
-        z = zip_file(archivo, keep_original=False)
-        if z:
-            archivo_result = z
-
-    agregar_copia(usuario, contrasena, f"{bd}{'.' + ','.join(tablas_param) if tablas_param else ''}", archivo_result)
-
-# -------------------------
-# GESTIÓN DE TAREAS WINDOWS
-# -------------------------
-def crear_tarea_windows(nombre_tarea, tipo, fecha, hora, jobname, repeticion_hours=None, dias_semana=None):
-    ruta_script = os.path.abspath(__file__)
-    tr = f'python "{ruta_script}" --auto --jobname "{jobname}"'
-
-    if tipo == "once":
-        cmd = f'schtasks /create /tn "{nombre_tarea}" /tr "{tr}" /sc once /st {hora} /sd {fecha} /f'
-    elif tipo == "daily":
-        cmd = f'schtasks /create /tn "{nombre_tarea}" /tr "{tr}" /sc daily /st {hora} /f'
-    elif tipo == "weekly":
-        dias = ",".join(dias_semana) if dias_semana else "MON"
-        cmd = f'schtasks /create /tn "{nombre_tarea}" /tr "{tr}" /sc weekly /d {dias} /st {hora} /f'
-    elif tipo == "hourly":
-        mo = repeticion_hours if repeticion_hours and repeticion_hours > 0 else 1
-        cmd = f'schtasks /create /tn "{nombre_tarea}" /tr "{tr}" /sc hourly /mo {mo} /st {hora} /f'
+    trabajo = trabajos.get(int(sel[0]))
+    if trabajo is None:
+        return
+    if not messagebox.askyesno("Confirmar", f"¿Cancelar el trabajo '{trabajo['descripcion']}'?"):
+        return
+    cancelar_trabajo(trabajo)
+    if trabajo["futuro"] is not None and trabajo["futuro"].cancel():
+        # Todavía no había empezado: no llegará el evento "fin".
+        trabajo["estado"] = "Cancelado"
+        trabajos.pop(trabajo["id"], None)
     else:
-        return False, "Tipo inválido"
-
-    try:
-        resultado = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        if resultado.returncode != 0:
-            return False, resultado.stderr
-        return True, None
-    except Exception as e:
-        return False, str(e)
-
-# -------------------------
-# EJECUTAR / BORRAR / CAMBIAR ESTADO WINDOWS
-# -------------------------
-def run_tarea_windows(nombre_tarea):
-    cmd = f'schtasks /run /tn "{nombre_tarea}"'
-    try:
-        r = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        return (r.returncode == 0, r.stderr or r.stdout)
-    except Exception as e:
-        return (False, str(e))
-
-def delete_tarea_windows(nombre_tarea):
-    cmd = f'schtasks /delete /tn "{nombre_tarea}" /f'
-    try:
-        r = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        return (r.returncode == 0, r.stderr or r.stdout)
-    except Exception as e:
-        return (False, str(e))
-
-def change_tarea_windows_enable(nombre_tarea, enable=True):
-    action = "/enable" if enable else "/disable"
-    cmd = f'schtasks /change /tn "{nombre_tarea}" {action}'
-    try:
-        r = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        return (r.returncode == 0, r.stderr or r.stdout)
-    except Exception as e:
-        return (False, str(e))
-
-# -------------------------
-# CONSULTAR PRÓXIMA EJECUCIÓN (formato ISO)
-# -------------------------
-def query_task_next_run(task_name):
-    try:
-        cmd = f'schtasks /query /tn "{task_name}" /fo LIST /v'
-        r = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-        if r.returncode != 0:
-            return (None, None)
-
-        out = r.stdout.splitlines()
-        next_run = None
-        status = None
-
-        for line in out:
-            s = line.strip()
-
-            if s.lower().startswith("siguiente ejecución:") or s.lower().startswith("next run time:"):
-                if ":" in s:
-                    next_run = s.partition(":")[2].strip()
-                else:
-                    next_run = s.strip()
-
-            if s.lower().startswith("estado:") or s.lower().startswith("status:"):
-                if ":" in s:
-                    status = s.partition(":")[2].strip()
-                else:
-                    status = s.strip()
-
-        # Normalizar estado
-        status_norm = None
-        if status:
-            for k, v in ESTADO_MAP.items():
-                if k.lower() in status.lower():
-                    status_norm = v
-                    break
-            if not status_norm:
-                status_norm = status
-
-        # Normalizar fecha a YYYY-MM-DD HH:MM
-        if next_run:
-            parsed = None
-            nr = next_run.strip()
-
-            formatos = [
-                "%d/%m/%Y %H:%M:%S",
-                "%d/%m/%Y %H:%M",
-                "%Y-%m-%d %H:%M:%S",
-                "%Y-%m-%d %H:%M"
-            ]
-
-            for fmt in formatos:
-                try:
-                    parsed = datetime.datetime.strptime(nr, fmt)
-                    break
-                except:
-                    pass
-
-            if parsed:
-                next_run_fmt = parsed.strftime("%Y-%m-%d %H:%M")
-            else:
-                next_run_fmt = nr
-        else:
-            next_run_fmt = None
+        trabajo["estado"] = "Cancelando..."
+    actualizar_fila_trabajo(trabajo)
 
-        return (next_run_fmt, status_norm)
-
-    except Exception:
-        return (None, None)
-
-# -------------------------
-# PROCESOS EN EJECUCIÓN
-# -------------------------
-def obtener_procesos_en_ejecucion():
-    """
-    Retorna lista de dicts con los procesos activos relevantes:
-    mysqldump.exe y python.exe (tareas automáticas).
-    """
-    procesos = []
-    try:
-        out = subprocess.run("tasklist /fo csv /nh", shell=True,
-                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        lines = out.stdout.splitlines()
-
-        for l in lines:
-            parts = [p.strip().strip('"') for p in l.split('","')]
-            if len(parts) >= 2:
-                name = parts[0]
-                pid = parts[1]
-
-                if name.lower() in ("mysqldump.exe", "mysqldump"):
-                    procesos.append({"process": name, "pid": pid, "info": "mysqldump activo"})
-
-                if name.lower() in ("python.exe", "python"):
-                    procesos.append({"process": name, "pid": pid, "info": "python.exe (posible tarea automática)"})
-
-    except Exception:
-        pass
-
-    return procesos
-
-# -------------------------
-# SELECCIÓN DE DESTINO
-# -------------------------
-def seleccionar_destino():
-    carpeta = filedialog.askdirectory()
-    if carpeta:
-        entry_destino.delete(0, tk.END)
-        entry_destino.insert(0, carpeta)
+def limpiar_trabajos_terminados():
+    for iid in tree_trabajos.get_children():
+        if int(iid) not in trabajos:
+            tree_trabajos.delete(iid)
 
-# -------------------------
-# ACTUALIZAR TABLA HISTORIAL
-# -------------------------
-def actualizar_tabla_historial():
-    for fila in tabla_historial.get_children():
-        tabla_historial.delete(fila)
-
-    for i, copia in enumerate(copias, 1):
-        tabla_historial.insert(
-            "",
-            "end",
-            values=(i, copia.get("usuario"), copia.get("bd"),
-                    copia.get("hora"), copia.get("ruta"))
-        )
+def al_cerrar_ventana():
+    activos = [t for t in trabajos.values() if t["visible"]]
+    if activos and not messagebox.askyesno("Salir", f"Hay {len(activos)} trabajo(s) en curso o en cola. ¿Cancelarlos y salir?"):
+        return
+    for trabajo in list(trabajos.values()):
+        cancelar_trabajo(trabajo)
+        if trabajo["futuro"] is not None:
+            trabajo["futuro"].cancel()
+    ejecutor_trabajos.shutdown(wait=False)
+    ejecutor_consultas.shutdown(wait=False)
+    ventana.destroy()
 
 # --------------------------------------------------------------------------------
 # VENTANAS SECUNDARIAS: BACKUP TABLA / PROGRAMAR / RESTAURAR
@@ -542,19 +313,24 @@ def ventana_backup_tabla():
         tablas_name = "_".join(tablas).replace(" ", "_")
         archivo = os.path.join(destino, f"{bd}_TABLAS_{tablas_name}_{fecha}.sql")
 
-        ok, err = ejecutar_mysqldump(usuario, contrasena, bd, tablas, archivo)
-        if not ok:
-            messagebox.showerror("Error", err)
-            return
-
-        resultado_path = archivo
-        if zip_opt:
-            z = zip_file(archivo, keep_original=False)
-            if z:
-                resultado_path = z
-
-        agregar_copia(usuario, contrasena, f"{bd}." + ",".join(tablas), resultado_path)
-        messagebox.showinfo("Éxito", f"Backup de tabla(s) creado:\n{resultado_path}")
+        compresion = "zip" if zip_opt else None
+        resultado_path = ruta_comprimida(archivo, compresion)
+        integridad = {}
+
+        def al_terminar(resultado):
+            ok, err = resultado
+            if not ok:
+                messagebox.showerror("Error", err)
+                return
+            agregar_copia(usuario, contrasena, f"{bd}." + ",".join(tablas), resultado_path,
+                          sha256=integridad.get("sha256"))
+            actualizar_tabla_historial()
+            messagebox.showinfo("Éxito", f"Backup de tabla(s) creado:\n{resultado_path}")
+
+        enviar_trabajo(f"Backup {bd}." + ",".join(tablas),
+                       lambda: ejecutar_mysqldump(usuario, contrasena, bd, tablas, archivo, compresion=compresion,
+                                                  integridad=integridad),
+                       al_terminar)
         win.destroy()
 
     ttk.Button(frame, text="Crear Backup de Tabla(s)", style="Green.TButton",
@@ -564,7 +340,7 @@ def ventana_backup_tabla():
 def ventana_programar_backup():
     win = tk.Toplevel(ventana)
     win.title("⏰ Programar Backup (Crear Tarea de Windows)")
-    win.geometry("520x460")
+    win.geometry("520x500")
     win.configure(bg="#f4f4f9")
 
     frm = tk.Frame(win, bg="#f4f4f9")
@@ -611,8 +387,21 @@ def ventana_programar_backup():
 
     ttk.Button(frm, text="Seleccionar carpeta", command=lambda: seleccionar_dest_para(entry_dest_local)).grid(row=6, column=1, sticky="w", padx=10, pady=5)
 
-    zip_var = tk.BooleanVar(value=False)
-    ttk.Checkbutton(frm, text="Comprimir en ZIP", variable=zip_var).grid(row=8, column=1, sticky="w", padx=10, pady=5)
+    frm_compresion = ttk.Frame(frm)
+    frm_compresion.grid(row=8, column=1, sticky="w", padx=10, pady=5)
+    ttk.Label(frm_compresion, text="Compresión:").pack(side=tk.LEFT)
+    compresion_var = tk.StringVar(value=SIN_COMPRIMIR)
+    ttk.Combobox(frm_compresion, textvariable=compresion_var, values=[SIN_COMPRIMIR] + codecs_disponibles(),
+                 state="readonly", width=8).pack(side=tk.LEFT, padx=5)
+    ttk.Label(frm_compresion, text="Nivel:").pack(side=tk.LEFT)
+    entry_nivel = ttk.Entry(frm_compresion, width=4)
+    entry_nivel.pack(side=tk.LEFT, padx=5)
+    ttk.Label(frm_compresion, text="Partes (MB):").pack(side=tk.LEFT)
+    entry_dividir = ttk.Entry(frm_compresion, width=6)
+    entry_dividir.pack(side=tk.LEFT, padx=5)
+
+    sin_cambios_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(frm, text="Omitir tablas sin cambios", variable=sin_cambios_var).grid(row=8, column=0, sticky="w", pady=5)
 
     ttk.Label(frm, text="Nombre de la tarea:", font=("Arial", 10, "bold")).grid(row=9, column=0, sticky="w", pady=(10,0))
     entry_nombre_tarea = ttk.Entry(frm, width=25)
@@ -624,6 +413,22 @@ def ventana_programar_backup():
     entry_repetir.grid(row=10, column=1, sticky="w", padx=10)
     entry_repetir.insert(0, "1")
 
+    frm_workers = ttk.Frame(frm)
+    frm_workers.grid(row=7, column=1, sticky="w", padx=10)
+    ttk.Label(frm_workers, text="Workers paralelos:", font=("Arial", 10, "bold")).pack(side=tk.LEFT)
+    entry_workers = ttk.Entry(frm_workers, width=5)
+    entry_workers.pack(side=tk.LEFT, padx=5)
+    entry_workers.insert(0, entry_workers_main.get().strip() or "1")
+    ttk.Label(frm_workers, text="Motor:").pack(side=tk.LEFT)
+    motor_var = tk.StringVar(value="mysqldump")
+    ttk.Combobox(frm_workers, textvariable=motor_var, values=motores_disponibles(),
+                 state="readonly", width=10).pack(side=tk.LEFT, padx=5)
+    # Sin bloqueo global cada tabla se copia en un momento distinto; el motor nativo lo trae activado.
+    consistente_var = tk.BooleanVar(value=False)
+    motor_var.trace_add("write", lambda *_: consistente_var.set(motor_var.get() == "nativo"))
+    ttk.Checkbutton(frm_workers, text="Consistente (bloquea escrituras)",
+                    variable=consistente_var).pack(side=tk.LEFT)
+
     ttk.Label(frm, text="Días semana (solo weekly) - ej: MON,WED,FRI", font=("Arial", 9)).grid(
         row=11, column=0, columnspan=2, sticky="w", pady=(8,0)
     )
@@ -655,9 +460,12 @@ def ventana_programar_backup():
         hora = entry_hora_local.get().strip()
         fecha = entry_fecha_local.get().strip()
         destino = entry_dest_local.get().strip()
-        zip_opt = zip_var.get()
+        compresion = "" if compresion_var.get() == SIN_COMPRIMIR else compresion_var.get()
+        nivel = entry_nivel.get().strip()
+        dividir_mb = entry_dividir.get().strip()
         nombre_tarea = entry_nombre_tarea.get().strip()
         repetir = int(entry_repetir.get().strip() or 1)
+        workers = leer_workers(entry_workers.get())
         dias = [d.strip().upper() for d in entry_dias.get().split(",") if d.strip()] if entry_dias.get().strip() else []
 
         usuario = entry_usr_local.get().strip()
@@ -667,6 +475,14 @@ def ventana_programar_backup():
             messagebox.showerror("Error", "Ingresá un nombre para la tarea.")
             return
 
+        if nivel and not nivel.isdigit():
+            messagebox.showerror("Error", "El nivel de compresión debe ser un número.")
+            return
+
+        if dividir_mb and not dividir_mb.isdigit():
+            messagebox.showerror("Error", "El tamaño de las partes debe ser un número de MB.")
+            return
+
         if tipo == "once" and (not fecha or fecha == ""):
             messagebox.showerror("Error", "Ingresá fecha para ejecución única.")
             return
@@ -694,10 +510,17 @@ def ventana_programar_backup():
             "usuario": usuario,
             "contrasena": contrasena,
             "bd": bd,
-            "zip": zip_opt,
+            "zip": compresion == "zip",
+            "compresion": compresion,
+            "nivel_compresion": nivel,
+            "dividir_mb": dividir_mb,
             "repeticion_hours": repetir,
             "dias_semana": dias,
-            "task_name": nombre_tarea
+            "task_name": nombre_tarea,
+            "workers": workers,
+            "motor": motor_var.get(),
+            "consistente": consistente_var.get(),
+            "omitir_sin_cambios": sin_cambios_var.get()
         }
 
         guardar_job_config(jobname, datos)
@@ -728,24 +551,31 @@ def ventana_programar_backup():
 def ventana_restaurar():
     win = tk.Toplevel(ventana)
     win.title("🔁 Restaurar SQL")
-    win.geometry("420x200")
+    win.geometry("420x260")
     win.configure(bg="#f4f4f9")
 
     frame = tk.Frame(win, bg="#f4f4f9")
     frame.pack(fill="both", expand=True, padx=20, pady=20)
 
-    ttk.Label(frame, text="Archivo .sql para restaurar:", font=("Arial", 10, "bold")).pack(anchor="w")
+    ttk.Label(frame, text="Backup (.sql, comprimido, .dedup o manifest.json) a restaurar:", font=("Arial", 10, "bold")).pack(anchor="w")
     entry_sql = ttk.Entry(frame, width=50)
     entry_sql.pack(fill="x", pady=8)
 
     def seleccionar_file():
-        f = filedialog.askopenfilename(filetypes=[("SQL files", "*.sql")])
+        f = filedialog.askopenfilename(filetypes=[("Backups SQL", "*.sql *.zip *.gz *.bz2 *.xz *.lz4 *.zst *.dedup manifest.json"), ("SQL files", "*.sql")])
         if f:
             entry_sql.delete(0, tk.END)
             entry_sql.insert(0, f)
 
     ttk.Button(frame, text="Seleccionar archivo", command=seleccionar_file).pack(pady=6)
 
+    frm_workers = ttk.Frame(frame)
+    frm_workers.pack(anchor="w", pady=4)
+    ttk.Label(frm_workers, text="Conexiones paralelas:", font=("Arial", 10, "bold")).pack(side=tk.LEFT)
+    entry_workers = ttk.Entry(frm_workers, width=5)
+    entry_workers.pack(side=tk.LEFT, padx=5)
+    entry_workers.insert(0, entry_workers_main.get().strip() or "1")
+
     def ejecutar_restauracion():
         usuario = entry_usuario.get().strip()
         contrasena = entry_contrasena.get().strip()
@@ -757,15 +587,26 @@ def ventana_restaurar():
             return
 
         if not sql_path or not os.path.exists(sql_path):
-            messagebox.showerror("Error", "Seleccioná un archivo SQL válido.")
+            messagebox.showerror("Error", "Seleccioná un archivo de backup válido.")
             return
 
-        ok, err = ejecutar_mysql_restore(usuario, contrasena, bd, sql_path)
-        if not ok:
-            messagebox.showerror("Error restaurando", err)
-            return
+        workers = leer_workers(entry_workers.get())
+
+        # Una copia parcial (omitir tablas sin cambios) trae primero las copias de las que toma tablas.
+        def restaurar():
+            return restaurar_archivo_backup(usuario, contrasena, bd, sql_path, workers=workers)
+
+        def al_terminar(resultado):
+            ok, detalle = resultado
+            if not ok:
+                messagebox.showerror("Error restaurando", detalle)
+                return
+            mensaje = "Restauración completada correctamente."
+            if detalle:
+                mensaje += "\n\n" + formatear_reporte_restauracion(detalle)
+            messagebox.showinfo("Éxito", mensaje)
 
-        messagebox.showinfo("Éxito", "Restauración completada correctamente.")
+        enviar_trabajo(f"Restaurar {os.path.basename(sql_path)} en {bd}", restaurar, al_terminar)
         win.destroy()
 
     ttk.Button(
@@ -845,10 +686,10 @@ menu_btn["menu"] = menu
 frame_config = ttk.Frame(ventana, padding="15 15 15 5")
 frame_config.pack(fill="x", padx=10)
 
-labels = ["Usuario MySQL:", "Contraseña:", "Base de Datos:", "Carpeta destino:"]
-default_values = {"Usuario MySQL:": "root", "Contraseña:": "", "Base de Datos:": "miguelhogar", "Carpeta destino:": ""}
+labels = ["Usuario MySQL:", "Contraseña:", "Base de Datos:", "Carpeta destino:", "Workers paralelos:"]
+default_values = {"Usuario MySQL:": "root", "Contraseña:": "", "Base de Datos:": "miguelhogar", "Carpeta destino:": "", "Workers paralelos:": "1"}
 
-entry_usuario = entry_contrasena = entry_bd = entry_destino = None
+entry_usuario = entry_contrasena = entry_bd = entry_destino = entry_workers_main = None
 
 for i, label_text in enumerate(labels):
     ttk.Label(frame_config, text=label_text, font=("Arial", 10, "bold")).grid(row=i, column=0, sticky="w", pady=2, padx=5)
@@ -868,6 +709,8 @@ for i, label_text in enumerate(labels):
         entry_contrasena = entry
     elif label_text == "Base de Datos:":
         entry_bd = entry
+    elif label_text == "Workers paralelos:":
+        entry_workers_main = entry
 
 frame_config.columnconfigure(1, weight=1)
 
@@ -902,6 +745,14 @@ tabla_historial.column("Base de Datos", width=140, anchor="center")
 tabla_historial.column("Fecha", width=160, anchor="center")
 tabla_historial.column("Ruta", minwidth=200)
 
+frame_paginas_hist = ttk.Frame(ventana, padding="15 0 15 0")
+frame_paginas_hist.pack(fill="x")
+ttk.Button(frame_paginas_hist, text="◀ Anterior", command=lambda: mover_pagina_historial(-1)).pack(side=tk.LEFT)
+label_pagina_historial = ttk.Label(frame_paginas_hist, text="")
+label_pagina_historial.pack(side=tk.LEFT, padx=10)
+ttk.Button(frame_paginas_hist, text="Siguiente ▶", command=lambda: mover_pagina_historial(1)).pack(side=tk.LEFT)
+ttk.Button(frame_paginas_hist, text="Informe dedup", command=mostrar_informe_dedup).pack(side=tk.RIGHT)
+
 actualizar_tabla_historial()
 
 # -------------------------
@@ -965,13 +816,29 @@ for c in cols_run:
 tree_run.column("Proceso", width=200)
 tree_run.column("PID", width=80)
 tree_run.column("Info", width=320)
+
+# TAB 4: COLA DE TRABAJOS (dumps/restauraciones lanzados desde la interfaz)
+tab_trabajos = ttk.Frame(notebook)
+notebook.add(tab_trabajos, text="Cola de trabajos")
+cols_trab = ("ID", "Trabajo", "Estado", "Progreso")
+tree_trabajos = ttk.Treeview(tab_trabajos, columns=cols_trab, show="headings", height=8)
+tree_trabajos.pack(fill="both", expand=True, padx=10, pady=6)
+for c in cols_trab:
+    tree_trabajos.heading(c, text=c)
+tree_trabajos.column("ID", width=40, anchor="center")
+tree_trabajos.column("Trabajo", width=320)
+tree_trabajos.column("Estado", width=120)
+tree_trabajos.column("Progreso", width=380)
+
+frame_trab_btns = ttk.Frame(tab_trabajos)
+frame_trab_btns.pack(fill="x", padx=10, pady=6)
+ttk.Button(frame_trab_btns, text="Cancelar trabajo", command=cancelar_trabajo_seleccionado).pack(side="left", padx=6)
+ttk.Button(frame_trab_btns, text="Limpiar terminados", command=limpiar_trabajos_terminados).pack(side="right", padx=6)
 # -------------------------
 # FUNCIONES DE REFRESCO PARA LAS 3 PESTAÑAS
 # -------------------------
-def refresh_tab_programadas():
-    for r in tree_prog.get_children():
-        tree_prog.delete(r)
-    jobs = listar_jobs_config()
+def refresh_tab_programadas(jobs):
+    filas = []
     for j in jobs:
         task_name = j.get("task_name") or j.get("_jobname") or j.get("_job", "")
         tipo_raw = (j.get("tipo") or "").lower()
@@ -1009,16 +876,15 @@ def refresh_tab_programadas():
             hora_fecha = hora or ""
 
         display_name = task_name if task_name else j.get("_jobname")
-        tree_prog.insert("", "end", values=(display_name, tipo_es, hora_fecha, destino, tablas, zipv, bd), tags=(j.get("_jobname"),))
+        filas.append((j.get("_jobname"), (display_name, tipo_es, hora_fecha, destino, tablas, zipv, bd), (j.get("_jobname"),)))
+    sincronizar_treeview(tree_prog, filas)
 
-def refresh_tab_next_runs():
-    for r in tree_next.get_children():
-        tree_next.delete(r)
-    jobs = listar_jobs_config()
+def refresh_tab_next_runs(jobs, proximas):
+    filas = []
     for j in jobs:
         jobname = j.get("_jobname")
         task_name = j.get("task_name") or jobname
-        next_run, status = query_task_next_run(task_name)
+        next_run, status = proximas.get(task_name, (None, None))
         # Normalizar estado a español
         status_es = "Desconocido"
         if status:
@@ -1028,19 +894,41 @@ def refresh_tab_next_runs():
                     break
             else:
                 status_es = status
-        tree_next.insert("", "end", values=(task_name, next_run or "N/A", status_es))
+        filas.append((jobname, (task_name, next_run or "N/A", status_es), ()))
+    sincronizar_treeview(tree_next, filas)
 
-def refresh_tab_running():
-    for r in tree_run.get_children():
-        tree_run.delete(r)
-    procesos = obtener_procesos_en_ejecucion()
-    for p in procesos:
-        tree_run.insert("", "end", values=(p.get("process"), p.get("pid"), p.get("info")))
+def refresh_tab_running(procesos):
+    filas = [(f"{p.get('process')}:{p.get('pid')}", (p.get("process"), p.get("pid"), p.get("info")), ())
+             for p in procesos]
+    sincronizar_treeview(tree_run, filas)
+
+def recolectar_estado_tareas():
+    """Lee config.ini, schtasks y tasklist (se ejecuta fuera del hilo de Tk)."""
+    jobs = listar_jobs_config()
+    tareas = consultar_tareas_programadas()
+    proximas = {}
+    for j in jobs:
+        task_name = j.get("task_name") or j.get("_jobname")
+        proximas[task_name] = tareas.get(task_name, (None, None))
+    return {"jobs": jobs, "proximas": proximas, "procesos": obtener_procesos_en_ejecucion()}
+
+estado_refresco = {"en_curso": False}
 
 def refresh_all_tabs():
-    refresh_tab_programadas()
-    refresh_tab_next_runs()
-    refresh_tab_running()
+    if estado_refresco["en_curso"]:
+        return
+    estado_refresco["en_curso"] = True
+
+    def al_terminar(datos):
+        estado_refresco["en_curso"] = False
+        if isinstance(datos, tuple):
+            return
+        refresh_tab_programadas(datos["jobs"])
+        refresh_tab_next_runs(datos["jobs"], datos["proximas"])
+        refresh_tab_running(datos["procesos"])
+
+    enviar_trabajo("Actualizar pestañas", recolectar_estado_tareas, al_terminar,
+                   visible=False, ejecutor=ejecutor_consultas)
 
 # -------------------------
 # ACCIONES SOBRE TAREAS (usar en botones)
@@ -1053,16 +941,15 @@ def obtener_tarea_seleccionada():
     if not vals:
         return None
     task_display = vals[0]
-    cfg = cargar_configparser()
-    for s in cfg.sections():
-        if s.startswith("job_"):
-            jobname = s[len("job_"):]
-            datos = leer_job_config(jobname)
-            if not datos:
-                continue
-            task_name = datos.get("task_name") or jobname
-            if task_name == task_display or jobname == task_display:
-                return (task_name, jobname)
+    # El iid de cada fila es el nombre del job (ver refresh_tab_programadas).
+    datos = leer_job_config(sel[0])
+    if datos:
+        return (datos.get("task_name") or sel[0], sel[0])
+    for j in listar_jobs_config():
+        jobname = j["_jobname"]
+        task_name = j.get("task_name") or jobname
+        if task_name == task_display or jobname == task_display:
+            return (task_name, jobname)
     return (task_display, None)
 
 def accion_tarea_seleccionada(action):
@@ -1072,43 +959,61 @@ def accion_tarea_seleccionada(action):
         return
     task_display, jobname = info
 
+    # Las llamadas a schtasks corren en el ejecutor de consultas; los
+    # mensajes se muestran al volver al hilo de Tk.
     if action == "run":
-        ok, msg = run_tarea_windows(task_display)
-        if ok:
-            messagebox.showinfo("Ejecutando", f"Tarea {task_display} enviada a ejecución.")
-        else:
-            messagebox.showerror("Error al ejecutar", str(msg))
+        def al_terminar_run(resultado):
+            ok, msg = resultado
+            if ok:
+                messagebox.showinfo("Ejecutando", f"Tarea {task_display} enviada a ejecución.")
+            else:
+                messagebox.showerror("Error al ejecutar", str(msg))
+
+        enviar_trabajo(f"Ejecutar {task_display}", lambda: run_tarea_windows(task_display),
+                       al_terminar_run, visible=False, ejecutor=ejecutor_consultas)
 
     elif action == "delete":
         if not messagebox.askyesno("Confirmar", f"¿Eliminar la tarea {task_display} del Programador?"):
             return
-        ok, msg = delete_tarea_windows(task_display)
-        if ok:
-            # si tenemos la job guardada en config.ini, también la borramos
-            if jobname:
-                cfg = cargar_configparser()
-                sec = f"job_{jobname}"
-                if sec in cfg:
-                    cfg.remove_section(sec)
-                    guardar_configparser(cfg)
-            refresh_all_tabs()
-            messagebox.showinfo("Eliminada", f"Tarea {task_display} eliminada.")
-        else:
-            messagebox.showerror("Error eliminando", str(msg))
+
+        def al_terminar_delete(resultado):
+            ok, msg = resultado
+            if ok:
+                # si tenemos la job guardada en config.ini, también la borramos
+                if jobname:
+                    cfg = cargar_configparser()
+                    sec = f"job_{jobname}"
+                    if sec in cfg:
+                        cfg.remove_section(sec)
+                        guardar_configparser(cfg)
+                refresh_all_tabs()
+                messagebox.showinfo("Eliminada", f"Tarea {task_display} eliminada.")
+            else:
+                messagebox.showerror("Error eliminando", str(msg))
+
+        enviar_trabajo(f"Eliminar {task_display}", lambda: delete_tarea_windows(task_display),
+                       al_terminar_delete, visible=False, ejecutor=ejecutor_consultas)
 
     elif action == "toggle":
-        next_run, status = query_task_next_run(task_display)
-        enable = True
-        if status and ("Deshabilitada" in status or "Disabled" in status):
+        def alternar():
+            next_run, status = estado_tarea(task_display, forzar=True)
             enable = True
-        else:
-            enable = False
-        ok, msg = change_tarea_windows_enable(task_display, enable=enable)
-        if ok:
-            refresh_all_tabs()
-            messagebox.showinfo("Listo", f"Tarea {task_display} actualizada.")
-        else:
-            messagebox.showerror("Error", str(msg))
+            if status and ("Deshabilitada" in status or "Disabled" in status):
+                enable = True
+            else:
+                enable = False
+            return change_tarea_windows_enable(task_display, enable=enable)
+
+        def al_terminar_toggle(resultado):
+            ok, msg = resultado
+            if ok:
+                refresh_all_tabs()
+                messagebox.showinfo("Listo", f"Tarea {task_display} actualizada.")
+            else:
+                messagebox.showerror("Error", str(msg))
+
+        enviar_trabajo(f"Cambiar estado {task_display}", alternar,
+                       al_terminar_toggle, visible=False, ejecutor=ejecutor_consultas)
 
 # -------------------------
 # BACKUP MANUAL (completa)
@@ -1132,21 +1037,40 @@ def hacer_backup_ui(is_programmed=False):
     fecha_str = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     nombre_archivo = f"{base_datos}_backup_{fecha_str}.sql"
     ruta_completa = os.path.join(destino, nombre_archivo)
-
-    ok, err = ejecutar_mysqldump(usuario, contrasena, base_datos, None, ruta_completa)
-    if not ok:
-        messagebox.showerror("Error", err)
-        return
-
-    # Preguntar compresión
-    if messagebox.askyesno("Comprimir", "¿Querés comprimir el archivo .sql en zip y eliminar el .sql original?"):
-        z = zip_file(ruta_completa, keep_original=False)
-        ruta_guardada = z if z else ruta_completa
+    workers = leer_workers(entry_workers_main.get())
+
+    # Preguntar compresión antes del volcado: el zip se escribe directamente
+    # desde la salida de mysqldump, sin generar el .sql intermedio.
+    compresion = "zip" if messagebox.askyesno("Comprimir", "¿Querés comprimir el backup en zip (sin guardar el .sql)?") else None
+
+    if workers > 1:
+        # Cada worker es un mysqldump aparte: sin el bloqueo global las tablas salen de momentos distintos.
+        consistente = messagebox.askyesno(
+            "Consistencia",
+            "Con varios workers cada tabla se copia en un momento distinto.\n"
+            "¿Bloquear las escrituras del servidor durante el volcado para que todas queden del mismo momento?")
+        carpeta = os.path.splitext(ruta_completa)[0]
+        ruta_guardada = os.path.join(carpeta, ARCHIVO_MANIFIESTO)
+        volcar = lambda: ejecutar_mysqldump_paralelo(usuario, contrasena, base_datos, None, carpeta,
+                                                     workers=workers, compresion=compresion,
+                                                     consistente=consistente)
     else:
-        ruta_guardada = ruta_completa
+        ruta_guardada = ruta_comprimida(ruta_completa, compresion)
+        volcar = lambda: ejecutar_mysqldump(usuario, contrasena, base_datos, None, ruta_completa, compresion=compresion,
+                                            integridad=integridad)
+    integridad = {}
 
-    agregar_copia(usuario, contrasena, base_datos, ruta_guardada)
-    messagebox.showinfo("Éxito", f"Backup creado:\n{ruta_guardada}")
+    def al_terminar(resultado):
+        ok, err = resultado
+        if not ok:
+            messagebox.showerror("Error", err)
+            return
+        # Las copias multiarchivo sellan su manifest.json en agregar_copia.
+        agregar_copia(usuario, contrasena, base_datos, ruta_guardada, sha256=integridad.get("sha256"))
+        actualizar_tabla_historial()
+        messagebox.showinfo("Éxito", f"Backup creado:\n{ruta_guardada}")
+
+    enviar_trabajo(f"Backup {base_datos}", volcar, al_terminar)
 
 # -------------------------
 # Programación legacy (local)
@@ -1170,30 +1094,6 @@ def verificar_programacion_legacy():
 
 verificar_programacion_legacy()
 
-# -------------------------
-# MODO AUTOMÁTICO: entrada desde Programador de Windows (--auto --jobname NAME)
-# -------------------------
-def modo_automatico_entry_and_exit():
-    if "--auto" in sys.argv:
-        jobname = None
-        if "--jobname" in sys.argv:
-            try:
-                idx = sys.argv.index("--jobname")
-                jobname = sys.argv[idx+1]
-            except:
-                jobname = None
-        if not jobname:
-            cfg = cargar_configparser()
-            for s in cfg.sections():
-                if s.startswith("job_"):
-                    jobname = s[len("job_"):]
-                    break
-        if jobname:
-            ejecutar_job_auto(jobname)
-        sys.exit(0)
-
-modo_automatico_entry_and_exit()
-
 # -------------------------
 # REFRESCO PERIÓDICO (cada 10 segundos)
 # -------------------------
@@ -1206,6 +1106,9 @@ def periodic_refresh():
     ventana.after(10000, periodic_refresh)
 
 periodic_refresh()
+procesar_eventos_trabajos()
+precalentar_ejecutables()
+ventana.protocol("WM_DELETE_WINDOW", al_cerrar_ventana)
 
 # -------------------------
 # INICIAR INTERFAZ
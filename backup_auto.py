@@ -0,0 +1,225 @@
+"""
+Entrada sin interfaz para las tareas del Programador de Windows:
+
+    python backup_auto.py --jobname BackupMySQL_abc123
+
+Solo importa el motor (sin tkinter): lee el job de config.ini, hace el
+backup, lo registra en el catálogo y termina. Código de salida 0 si el
+backup se completó, 1 si falló. Cada INTERVALO_LOG_S segundos se imprime
+el avance (MB, MB/s, ETA y tabla actual) para el log de la tarea.
+
+Antes de volcar, el job espera turno en la cola del catálogo ([cola] en
+config.ini: max_por_servidor, max_por_bd, espera_maxima_min). Si el mismo
+job ya está esperando, esta ejecución se suma a aquella y termina con 0.
+Jobs en cola o corriendo:
+
+    python backup_auto.py --cola
+
+Restauración a un punto en el tiempo de un job incremental:
+
+    python backup_auto.py --jobname BackupMySQL_abc123 --restaurar \
+        [--hasta "2024-05-01 13:45:00"]
+
+La restauración va siempre a la base del job: los eventos del binlog
+llevan el nombre de la base de origen.
+
+Informe del almacén deduplicado (compresion = dedup):
+
+    python backup_auto.py --informe-dedup C:\\Backups
+
+Retención (todos los jobs, o solo --jobname; --simular no borra nada):
+
+    python backup_auto.py --retencion [--jobname BackupMySQL_abc123] [--simular]
+
+Duraciones p50/p95 por job y por fase (metricas.jsonl):
+
+    python backup_auto.py --informe-metricas [--jobname BackupMySQL_abc123] [--desde 2024-05-01]
+
+Razón de compresión y velocidad por base y códec (catálogo):
+
+    python backup_auto.py --informe-codecs [--bd base]
+
+Simulacros de restauración (jobs con modo = simulacro): RTO p50/p95 y los
+últimos resultados por base:
+
+    python backup_auto.py --informe-simulacros [--bd base]
+
+Verificación de integridad (sha256 del catálogo, sin descomprimir; con
+--profunda además descomprime y busca el fin del volcado). Código 1 si
+alguna copia falla:
+
+    python backup_auto.py --verificar [--jobname BackupMySQL_abc123 | --carpeta C:\\Backups]
+        [--workers 4] [--profunda]
+"""
+import datetime
+import sys
+import time
+
+INICIO = time.perf_counter()
+
+from motor_backup import (
+    HILOS_VERIFICACION, aplicar_retencion_job, copias_a_verificar, ejecutar_job_auto, formatear_informe_codecs,
+    formatear_informe_dedup, formatear_informe_metricas, formatear_informe_simulacros, formatear_progreso,
+    formatear_verificacion, informe_codecs, informe_deduplicacion, informe_metricas, informe_simulacros,
+    leer_job_config, listar_cola, listar_jobs_config, restaurar_punto_en_el_tiempo, turno_job, verificar_copias,
+)
+
+INTERVALO_LOG_S = 5
+
+
+def leer_opcion(argv, nombre):
+    if nombre in argv:
+        try:
+            return argv[argv.index(nombre) + 1]
+        except IndexError:
+            return None
+    return None
+
+
+def leer_jobname(argv):
+    return leer_opcion(argv, "--jobname")
+
+
+def crear_log_progreso(jobname):
+    ultimo = {"momento": 0.0}
+
+    def registrar(estado):
+        ahora = time.monotonic()
+        if not estado["final"] and ahora - ultimo["momento"] < INTERVALO_LOG_S:
+            return
+        ultimo["momento"] = ahora
+        print(f"[{jobname}] {estado['fase']}: {formatear_progreso(estado)}", flush=True)
+
+    return registrar
+
+
+def restaurar(jobname, argv):
+    datos = leer_job_config(jobname)
+    if not datos:
+        print(f"No existe el job {jobname}.", file=sys.stderr)
+        return 1
+    hasta = leer_opcion(argv, "--hasta")
+    if hasta:
+        try:
+            hasta = datetime.datetime.strptime(hasta, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            print("--hasta debe tener el formato 'YYYY-MM-DD HH:MM:SS'.", file=sys.stderr)
+            return 1
+    bd = datos.get("bd", "")
+    ok, detalle = restaurar_punto_en_el_tiempo(datos.get("usuario", ""), datos.get("contrasena", ""),
+                                               bd, jobname, hasta=hasta, progreso=crear_log_progreso(jobname))
+    if not ok:
+        print(f"[{jobname}] Error al restaurar: {detalle}", file=sys.stderr)
+        return 1
+    print(f"[{jobname}] Restaurado en {bd}: {detalle}")
+    return 0
+
+
+def retencion(argv):
+    simular = "--simular" in argv
+    jobname = leer_jobname(argv)
+    jobnames = [jobname] if jobname else [j["_jobname"] for j in listar_jobs_config()]
+    codigo = 0
+    for nombre in jobnames:
+        ok, victimas = aplicar_retencion_job(nombre, simular=simular)
+        if not ok:
+            print(f"[{nombre}] Error en la retención: {victimas}", file=sys.stderr)
+            codigo = 1
+            continue
+        for v in victimas:
+            estado = f"no se pudo borrar ({v['error']})" if v.get("error") else ("se borraría" if simular else "borrada")
+            print(f"[{nombre}] {v['hora']}  {v['ruta']}  {estado}")
+        print(f"[{nombre}] {len(victimas)} copia(s) {'a borrar' if simular else 'borradas'}")
+    return codigo
+
+
+def verificar(argv):
+    try:
+        workers = int(leer_opcion(argv, "--workers") or HILOS_VERIFICACION)
+    except ValueError:
+        print("--workers debe ser un número.", file=sys.stderr)
+        return 1
+    copias = copias_a_verificar(job=leer_jobname(argv), carpeta=leer_opcion(argv, "--carpeta"))
+    t0 = time.perf_counter()
+    resultados = verificar_copias(copias, workers=workers, profunda="--profunda" in argv)
+    print(formatear_verificacion(resultados, time.perf_counter() - t0))
+    return 1 if any(r["estado"] == "error" for r in resultados) else 0
+
+
+def ejecutar_en_turno(jobname):
+    with turno_job(jobname) as turno:
+        if turno["estado"] == "coalescido":
+            print(f"[{jobname}] Ya hay una ejecución de este job en espera; se omite esta.")
+            return 0
+        if turno["estado"] == "vencido":
+            print(f"[{jobname}] Error: se agotó la espera en la cola ({turno['espera_s']:.0f} s).", file=sys.stderr)
+            return 1
+        if turno["espera_s"] >= 1:
+            print(f"[{jobname}] Turno obtenido tras {turno['espera_s']:.0f} s en cola.", flush=True)
+        ok, detalle = ejecutar_job_auto(jobname, progreso=crear_log_progreso(jobname))
+    if not ok:
+        print(f"[{jobname}] Error: {detalle}", file=sys.stderr)
+        return 1
+    simulacro = (leer_job_config(jobname) or {}).get("modo") == "simulacro"
+    print(f"[{jobname}] {'Simulacro completo' if simulacro else 'Backup creado'}: {detalle}")
+    return 0
+
+
+def mostrar_cola():
+    filas = listar_cola()
+    for f in filas:
+        desde = datetime.datetime.fromtimestamp(f["iniciado"] or f["creado"]).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{f['estado']:<10} {f['servidor']:<22} {f['bd'] or '-':<16} {f['job']}  pid {f['pid']}  desde {desde}")
+    print(f"{len(filas)} job(s) en cola")
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if "--medir-inicio" in argv:
+        # Usado por bench_backup.py: tiempo hasta tener el motor listo.
+        print(f"{time.perf_counter() - INICIO:.6f}")
+        return 0
+
+    if "--informe-dedup" in argv:
+        print(formatear_informe_dedup(informe_deduplicacion(leer_opcion(argv, "--informe-dedup") or ".")))
+        return 0
+
+    if "--informe-metricas" in argv:
+        print(formatear_informe_metricas(informe_metricas(leer_jobname(argv), leer_opcion(argv, "--desde"))))
+        return 0
+
+    if "--informe-codecs" in argv:
+        print(formatear_informe_codecs(informe_codecs(leer_opcion(argv, "--bd"))))
+        return 0
+
+    if "--informe-simulacros" in argv:
+        print(formatear_informe_simulacros(informe_simulacros(leer_opcion(argv, "--bd"))))
+        return 0
+
+    if "--retencion" in argv:
+        return retencion(argv)
+
+    if "--cola" in argv:
+        return mostrar_cola()
+
+    if "--verificar" in argv:
+        return verificar(argv)
+
+    jobname = leer_jobname(argv)
+    if not jobname:
+        jobs = listar_jobs_config()
+        if not jobs:
+            print("No hay jobs configurados.", file=sys.stderr)
+            return 1
+        jobname = jobs[0]["_jobname"]
+
+    if "--restaurar" in argv:
+        return restaurar(jobname, argv)
+
+    return ejecutar_en_turno(jobname)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+"""
+Benchmarks de Backup MySQL Pro.
+
+    python bench_backup.py inicio [--repeticiones N] [--presupuesto SEG]
+    python bench_backup.py motor [--mb 64] [--mb-s 0] [--historial 20000] [--jobs 500]
+                                 [--repeticiones 3] [--salida resultados.json]
+    python bench_backup.py comparar ANTERIOR.json NUEVO.json [--tolerancia 0.15]
+
+`inicio` mide el arranque de la entrada sin interfaz (backup_auto.py) que
+usan las tareas programadas y falla (código 1) si la mediana supera el
+presupuesto o si se llegó a importar tkinter.
+
+`motor` corre en una carpeta temporal con un mysqldump/mysql falsos (scripts
+Python que generan o consumen SQL sintético a `--mb-s` MB/s; 0 = sin límite)
+y mide zip_file, ejecutar_mysqldump por formato, ejecutar_mysql_restore, el
+catálogo con un historial grande y listar_jobs_config con muchos jobs. Los
+datos son deterministas, así dos corridas con los mismos parámetros se pueden
+comparar con `comparar`, que falla si alguna mediana empeoró más que la
+tolerancia.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+PRESUPUESTO_INICIO_S = 0.5
+VERSION_RESULTADOS = 1
+TOLERANCIA_COMPARACION = 0.15
+# Diferencias menores a esto son ruido del reloj, no regresiones.
+RUIDO_MINIMO_S = 0.005
+
+
+def bench_inicio(repeticiones=10, presupuesto=PRESUPUESTO_INICIO_S):
+    script = os.path.join(CARPETA, "backup_auto.py")
+    totales = []
+    internos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        r = subprocess.run([sys.executable, script, "--medir-inicio"],
+                           stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=CARPETA)
+        totales.append(time.perf_counter() - t0)
+        if r.returncode != 0:
+            print(r.stderr, file=sys.stderr)
+            return False, {}
+        internos.append(float(r.stdout.strip()))
+
+    r = subprocess.run([sys.executable, "-c", "import sys, backup_auto; print('tkinter' in sys.modules)"],
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=CARPETA)
+    carga_tkinter = r.stdout.strip() != "False"
+
+    resultado = {
+        "proceso_mediana_s": round(statistics.median(totales), 4),
+        "proceso_max_s": round(max(totales), 4),
+        "imports_mediana_s": round(statistics.median(internos), 4),
+        "presupuesto_s": presupuesto,
+        "carga_tkinter": carga_tkinter
+    }
+    ok = resultado["proceso_mediana_s"] <= presupuesto and not carga_tkinter
+    return ok, resultado
+
+
+# -------------------------
+# HERRAMIENTAS FALSAS (mysqldump / mysql)
+# -------------------------
+# Ambos scripts leen su configuración del entorno (BENCH_MB, BENCH_MB_S,
+# BENCH_TABLAS) para que el motor los invoque con los mismos argumentos que
+# a los reales.
+FALSO_MYSQLDUMP = r'''
+import os, random, sys, time
+if "--version" in sys.argv:
+    print("mysqldump  Ver 8.0.36 for Linux (bench)")
+    sys.exit(0)
+total = int(float(os.environ.get("BENCH_MB", "64")) * 1048576)
+tasa = float(os.environ.get("BENCH_MB_S", "0")) * 1048576
+tablas = int(os.environ.get("BENCH_TABLAS", "8"))
+azar = random.Random(1234)
+palabras = [("".join(azar.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(azar.randint(3, 12)))) for _ in range(500)]
+def linea(tabla, n):
+    filas = []
+    largo = 0
+    while largo < 60000:
+        fila = f"({n + len(filas)},'{azar.choice(palabras)} {azar.choice(palabras)}',{azar.randint(0, 10**6)},'2024-01-{azar.randint(10, 28)}')"
+        filas.append(fila)
+        largo += len(fila) + 1
+    return f"INSERT INTO `{tabla}` VALUES " + ",".join(filas) + ";\n"
+pozo = [linea("t", i * 1000) for i in range(48)]
+salida = sys.stdout.buffer
+t0 = time.perf_counter()
+escritos = 0
+def escribir(texto):
+    global escritos
+    datos = texto.encode()
+    salida.write(datos)
+    escritos += len(datos)
+    if tasa:
+        espera = escritos / tasa - (time.perf_counter() - t0)
+        if espera > 0:
+            time.sleep(espera)
+escribir("-- MySQL dump 10.13  Distrib 8.0.36, for Linux (x86_64)\n--\n-- Host: localhost    Database: bench\n")
+por_tabla = total // tablas
+for t in range(tablas):
+    nombre = f"tabla_{t:02d}"
+    escribir(f"\n--\n-- Table structure for table `{nombre}`\n--\n\nDROP TABLE IF EXISTS `{nombre}`;\n"
+             f"CREATE TABLE `{nombre}` (\n  `id` int NOT NULL,\n  `texto` varchar(64),\n"
+             f"  `n` int NOT NULL AUTO_INCREMENT,\n  `fecha` date,\n  PRIMARY KEY (`id`),\n"
+             f"  KEY `idx_n` (`n`),\n  KEY `idx_fecha` (`fecha`)\n) ENGINE=InnoDB;\n\n"
+             f"--\n-- Dumping data for table `{nombre}`\n--\n\n")
+    inicio = escritos
+    i = t
+    while escritos - inicio < por_tabla:
+        escribir(pozo[i % len(pozo)].replace("`t`", f"`{nombre}`", 1))
+        i += 1
+escribir("-- Dump completed on 2024-01-01  0:00:00\n")
+'''
+
+FALSO_MYSQL = r'''
+import os, sys, time
+if "--version" in sys.argv:
+    print("mysql  Ver 8.0.36 for Linux (bench)")
+    sys.exit(0)
+tablas = int(os.environ.get("BENCH_TABLAS", "8"))
+por_tabla = int(float(os.environ.get("BENCH_MB", "64")) * 1048576) // tablas
+if "-e" in sys.argv:
+    sql = sys.argv[sys.argv.index("-e") + 1]
+    if "VERSION()" in sql:
+        print("8.0.36")
+    elif "INDEX_LENGTH" in sql:
+        for t in range(tablas):
+            print(f"tabla_{t:02d}\tBASE TABLE\t{por_tabla}")
+    elif "DATA_LENGTH" in sql:
+        for t in range(tablas):
+            print(f"tabla_{t:02d}\t{por_tabla}")
+    sys.exit(0)
+tasa = float(os.environ.get("BENCH_MB_S", "0")) * 1048576
+t0 = time.perf_counter()
+leidos = 0
+for bloque in iter(lambda: sys.stdin.buffer.read(1048576), b""):
+    leidos += len(bloque)
+    if tasa:
+        espera = leidos / tasa - (time.perf_counter() - t0)
+        if espera > 0:
+            time.sleep(espera)
+'''
+
+
+def crear_herramientas_falsas(carpeta):
+    bin_dir = os.path.join(carpeta, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    for nombre, codigo in (("mysqldump", FALSO_MYSQLDUMP), ("mysql", FALSO_MYSQL)):
+        for archivo in (nombre, nombre + ".py"):
+            ruta = os.path.join(bin_dir, archivo)
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(f"#!{sys.executable}\n{codigo}")
+            os.chmod(ruta, 0o755)
+    return bin_dir
+
+
+# -------------------------
+# MEDICIÓN
+# -------------------------
+def medir(funcion, repeticiones, bytes_=None, preparar=None):
+    """Corre funcion() `repeticiones` veces (preparar() antes de cada una, sin medir)."""
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+        if isinstance(resultado, tuple) and resultado and resultado[0] is False:
+            raise RuntimeError(f"{getattr(funcion, '__name__', 'bench')}: {resultado[1]}")
+    mediana = statistics.median(tiempos)
+    datos = {
+        "mediana_s": round(mediana, 4),
+        "min_s": round(min(tiempos), 4),
+        "max_s": round(max(tiempos), 4),
+        "repeticiones": repeticiones
+    }
+    if bytes_:
+        datos["mb_s"] = round(bytes_ / 1048576 / mediana, 2) if mediana > 0 else None
+    return datos
+
+
+def escribir_config_jobs(cantidad):
+    lineas = []
+    for i in range(cantidad):
+        lineas += [f"[job_bench_{i:05d}]", "tipo = daily", "fecha = 2024-01-01", "hora = 03:00",
+                   "destino = salida", "tablas = clientes,ventas", "usuario = root", "contrasena =",
+                   "bd = bench", "zip = True", "repeticion_hours = 1", "dias_semana = MON", "workers = 2", ""]
+    with open("config.ini", "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas))
+
+
+def comprobar_carga_rapida(motor, sql):
+    """Transforma el volcado como la restauración paralela y verifica que el
+    índice de la columna AUTO_INCREMENT (`idx_n`) quede en el CREATE y que
+    el resto (`idx_fecha`) pase al ALTER final."""
+    with open(sql, "rb") as f:
+        salida = b"".join(motor.transformar_carga_rapida(f))
+    fin_creates = salida.find(b"ALTER TABLE")
+    if fin_creates < 0 or b"idx_n" in salida[fin_creates:] or b"idx_fecha" in salida[:fin_creates]:
+        raise RuntimeError("transformar_carga_rapida difirió mal los índices (AUTO_INCREMENT en el CREATE).")
+
+
+def bench_motor(mb=64, mb_s=0.0, historial=20000, jobs=500, repeticiones=3, tablas=8):
+    carpeta = tempfile.mkdtemp(prefix="bench_backup_")
+    anterior = os.getcwd()
+    entorno = {k: os.environ.get(k) for k in ("BENCH_MB", "BENCH_MB_S", "BENCH_TABLAS", "BACKUP_MYSQL_BIN")}
+    resultados = {}
+    try:
+        os.chdir(carpeta)
+        os.environ.update({"BENCH_MB": str(mb), "BENCH_MB_S": str(mb_s), "BENCH_TABLAS": str(tablas),
+                           "BACKUP_MYSQL_BIN": crear_herramientas_falsas(carpeta)})
+        sys.path.insert(0, CARPETA)
+        import motor_backup as motor
+
+        os.makedirs("salida", exist_ok=True)
+        sql = os.path.join("salida", "bench.sql")
+
+        def generar():
+            with open(sql, "wb") as f:
+                subprocess.run([sys.executable, os.path.join("bin", "mysqldump.py"), "bench"], stdout=f, check=True)
+        generar()
+        tamano = os.path.getsize(sql)
+
+        resultados["transformar_carga_rapida"] = medir(lambda: comprobar_carga_rapida(motor, sql),
+                                                       repeticiones, tamano)
+        resultados["zip_file"] = medir(lambda: motor.zip_file(sql, keep_original=True), repeticiones, tamano)
+
+        for formato in (None, "gz", "zip", "dedup"):
+            destino = os.path.join("salida", f"dump_{formato or 'sql'}.sql")
+            final = motor.ruta_comprimida(destino, formato)
+
+            def limpiar(final=final):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(final)
+                shutil.rmtree(os.path.join("salida", motor.CARPETA_ALMACEN_DEDUP), ignore_errors=True)
+            resultados[f"ejecutar_mysqldump[{formato or 'sql'}]"] = medir(
+                lambda destino=destino, formato=formato: motor.ejecutar_mysqldump(
+                    "root", "", "bench", None, destino, compresion=formato),
+                repeticiones, tamano, preparar=limpiar)
+            resultados[f"ejecutar_mysql_restore[{formato or 'sql'}]"] = medir(
+                lambda final=final: motor.ejecutar_mysql_restore("root", "", "bench", final),
+                repeticiones, tamano)
+
+        # Catálogo: historial grande ya cargado y luego altas, páginas y conteos.
+        base = datetime.datetime(2020, 1, 1)
+        with contextlib.closing(motor.conectar_catalogo()) as con:
+            with con:
+                for i in range(historial):
+                    hora = (base + datetime.timedelta(minutes=30 * i)).strftime("%Y-%m-%d %H:%M:%S")
+                    tabla = "" if i % 3 else ".clientes"
+                    motor.insertar_copia(con, "root", "", f"bench{tabla}", f"salida/b_{i}.sql", hora, None,
+                                         f"bench_{i % 20:05d}")
+        resultados["agregar_copia[x100]"] = medir(
+            lambda: [motor.agregar_copia("root", "", "bench.clientes", "salida/nuevo.sql", job="bench_00000")
+                     for _ in range(100)], repeticiones)
+        resultados["consultar_copias[pagina]"] = medir(
+            lambda: motor.consultar_copias(limite=200, offset=historial // 2, descendente=True), repeticiones)
+        resultados["consultar_copias[tabla]"] = medir(
+            lambda: motor.consultar_copias(bd="bench", tabla="clientes", limite=200, descendente=True), repeticiones)
+        resultados["contar_copias"] = medir(lambda: motor.contar_copias(job="bench_00001"), repeticiones)
+        resultados["retencion[simular]"] = medir(
+            lambda: motor.aplicar_retencion("bench_00002", {"max_backups": 10, "max_dias": None,
+                                                            "gfs": {"diarios": 7, "semanales": 4, "mensuales": 12}},
+                                            simular=True), repeticiones)
+
+        escribir_config_jobs(jobs)
+
+        def invalidar():
+            # Fuerza el reparseo: cambia la huella (mtime/tamaño) de config.ini.
+            with open("config.ini", "a", encoding="utf-8") as f:
+                f.write("\n")
+        resultados["listar_jobs_config[frio]"] = medir(motor.listar_jobs_config, repeticiones, preparar=invalidar)
+        resultados["listar_jobs_config[caliente x100]"] = medir(
+            lambda: [motor.listar_jobs_config() for _ in range(100)], repeticiones)
+    finally:
+        os.chdir(anterior)
+        for k, v in entorno.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    return {
+        "version": VERSION_RESULTADOS,
+        "fecha": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {"mb": mb, "mb_s": mb_s, "historial": historial, "jobs": jobs,
+                       "repeticiones": repeticiones, "tablas": tablas, "bytes_sql": tamano},
+        "resultados": resultados
+    }
+
+
+def comparar(anterior, nuevo, tolerancia=TOLERANCIA_COMPARACION):
+    """
+    Retorna (ok, lineas): ok es False si alguna mediana creció más que
+    `tolerancia` y además más que RUIDO_MINIMO_S.
+    """
+    ok = True
+    lineas = []
+    if anterior.get("parametros") != nuevo.get("parametros"):
+        lineas.append("AVISO: las corridas usan parámetros distintos.")
+    for nombre, datos in nuevo["resultados"].items():
+        previo = anterior["resultados"].get(nombre)
+        if not previo or not previo["mediana_s"]:
+            lineas.append(f"{nombre:<40} {datos['mediana_s']:>10.4f}s   (nuevo)")
+            continue
+        cambio = datos["mediana_s"] / previo["mediana_s"] - 1
+        marca = ""
+        if cambio > tolerancia and datos["mediana_s"] - previo["mediana_s"] > RUIDO_MINIMO_S:
+            marca = "  <-- REGRESIÓN"
+            ok = False
+        lineas.append(f"{nombre:<40} {previo['mediana_s']:>10.4f}s -> {datos['mediana_s']:>10.4f}s  {cambio:+7.1%}{marca}")
+    return ok, lineas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de Backup MySQL Pro")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    p_inicio = sub.add_parser("inicio", help="arranque de backup_auto.py")
+    p_inicio.add_argument("--repeticiones", type=int, default=10)
+    p_inicio.add_argument("--presupuesto", type=float, default=PRESUPUESTO_INICIO_S)
+    p_motor = sub.add_parser("motor", help="volcado, compresión, restauración, catálogo y config")
+    p_motor.add_argument("--mb", type=float, default=64, help="tamaño del dump sintético")
+    p_motor.add_argument("--mb-s", type=float, default=0, help="velocidad de los clientes falsos (0 = sin límite)")
+    p_motor.add_argument("--historial", type=int, default=20000, help="copias previas en el catálogo")
+    p_motor.add_argument("--jobs", type=int, default=500, help="jobs en config.ini")
+    p_motor.add_argument("--tablas", type=int, default=8)
+    p_motor.add_argument("--repeticiones", type=int, default=3)
+    p_motor.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    p_comparar = sub.add_parser("comparar", help="compara dos resultados JSON de `motor`")
+    p_comparar.add_argument("anterior")
+    p_comparar.add_argument("nuevo")
+    p_comparar.add_argument("--tolerancia", type=float, default=TOLERANCIA_COMPARACION)
+    args = parser.parse_args(argv)
+
+    if args.bench == "inicio":
+        ok, resultado = bench_inicio(args.repeticiones, args.presupuesto)
+        for k, v in resultado.items():
+            print(f"{k}: {v}")
+        if not ok:
+            print("FALLO: el arranque sin interfaz excede el presupuesto o carga tkinter.", file=sys.stderr)
+            return 1
+    elif args.bench == "motor":
+        informe = bench_motor(args.mb, args.mb_s, args.historial, args.jobs, args.repeticiones, args.tablas)
+        for nombre, datos in informe["resultados"].items():
+            extra = f"  {datos['mb_s']:>8.1f} MB/s" if datos.get("mb_s") else ""
+            print(f"{nombre:<40} {datos['mediana_s']:>10.4f}s{extra}")
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as f:
+                json.dump(informe, f, indent=4, ensure_ascii=False)
+    elif args.bench == "comparar":
+        with open(args.anterior, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+        with open(args.nuevo, "r", encoding="utf-8") as f:
+            nuevo = json.load(f)
+        ok, lineas = comparar(anterior, nuevo, args.tolerancia)
+        print("\n".join(lineas))
+        if not ok:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
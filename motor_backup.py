@@ -0,0 +1,4405 @@
+"""
+Motor de Backup MySQL Pro: configuración, catálogo de copias, volcado,
+compresión, restauración y tareas de Windows. No depende de tkinter, así
+las tareas programadas (backup_auto.py) arrancan sin cargar la interfaz.
+"""
+import subprocess
+import atexit
+import datetime
+import os
+import sys
+import json
+import shutil
+import tempfile
+import configparser
+import csv
+import sqlite3
+import zipfile
+import gzip
+import bz2
+import lzma
+import zlib
+import hashlib
+import contextlib
+import time
+import re
+import io
+import itertools
+import threading
+import queue
+import collections
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+try:
+    import pymysql
+except ImportError:
+    pymysql = None
+
+# Archivo de configuración y historial
+CONFIG_FILE = "config.ini"
+ARCHIVO_COPIAS = "copias.json"
+ARCHIVO_CATALOGO = "catalogo.db"
+ARCHIVO_CACHE_EJECUTABLES = "ejecutables.json"
+
+# -------------------------
+# Traducciones (inglés -> español) y normalizaciones
+# -------------------------
+ESTADO_MAP = {
+    "Ready": "Listo",
+    "Running": "Ejecutándose",
+    "Disabled": "Deshabilitada",
+    # Posibles valores en Windows español
+    "Listo": "Listo",
+    "En ejecución": "Ejecutándose",
+    "En ejecución.": "Ejecutándose",
+    "Deshabilitada": "Deshabilitada",
+    "Deshabilitada.": "Deshabilitada"
+}
+
+# -------------------------
+# UTILIDADES DE CONFIGURACIÓN
+# -------------------------
+# config.ini se parsea una sola vez y se vuelve a leer solo si cambia su
+# mtime o tamaño (por ejemplo, si otra instancia guardó una tarea).
+cache_config = {"firma": None, "config": None, "jobs": {}}
+lock_config = threading.Lock()
+
+def firma_archivo(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def _config_vigente():
+    """Retorna el ConfigParser cacheado (no modificarlo) y los jobs tipados."""
+    with lock_config:
+        firma = firma_archivo(CONFIG_FILE)
+        if cache_config["config"] is None or firma != cache_config["firma"]:
+            config = configparser.ConfigParser()
+            if firma is not None:
+                config.read(CONFIG_FILE, encoding="utf-8")
+            jobs = {}
+            for s in config.sections():
+                if s.startswith("job_"):
+                    jobs[s[len("job_"):]] = parsear_job(config[s])
+            cache_config.update(firma=firma, config=config, jobs=jobs)
+        return cache_config["config"], cache_config["jobs"]
+
+def cargar_configparser():
+    """Copia independiente de config.ini, para modificar y guardar."""
+    cacheado, _ = _config_vigente()
+    config = configparser.ConfigParser()
+    # Valores crudos: con los interpolados un "%%" pasaría a "%" y no se podría volver a guardar.
+    config.read_dict({s: dict(cacheado.items(s, raw=True)) for s in cacheado.sections()})
+    return config
+
+def guardar_configparser(config):
+    # Escritura atómica: un corte a mitad de escritura no deja config.ini truncado.
+    tmp = CONFIG_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        config.write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, CONFIG_FILE)
+    with lock_config:
+        cache_config["config"] = None
+
+def guardar_job_config(nombre, datos: dict):
+    config = cargar_configparser()
+    seccion = f"job_{nombre}"
+    if seccion in config:
+        config.remove_section(seccion)
+    config[seccion] = {}
+    for k, v in datos.items():
+        if isinstance(v, (list, tuple)):
+            config[seccion][k] = ",".join(map(str, v))
+        else:
+            config[seccion][k] = "" if v is None else str(v)
+    guardar_configparser(config)
+
+def parsear_job(seccion):
+    data = {}
+    for k, v in seccion.items():
+        if k in ("tablas", "dias_semana", "servidores", "bds"):
+            data[k] = v.split(",") if v else []
+        elif k in ("zip", "omitir_sin_cambios", "consistente"):
+            data[k] = seccion.getboolean(k, fallback=False)
+        elif k in ("repeticion_hours", "workers", "max_backups", "max_dias", "nivel_compresion", "hilos_compresion",
+                   "puerto", "workers_bds", "max_por_servidor", "dividir_mb", "dividir_sentencias"):
+            try:
+                data[k] = int(v)
+            except:
+                data[k] = None
+        else:
+            data[k] = v
+    return data
+
+def copiar_job(datos):
+    return {k: list(v) if isinstance(v, list) else v for k, v in datos.items()}
+
+def leer_job_config(nombre):
+    _, jobs = _config_vigente()
+    if nombre not in jobs:
+        return None
+    return copiar_job(jobs[nombre])
+
+def listar_jobs_config():
+    _, jobs = _config_vigente()
+    lista = []
+    for jobname, datos in jobs.items():
+        datos = copiar_job(datos)
+        datos["_jobname"] = jobname
+        lista.append(datos)
+    return lista
+
+# -------------------------
+# HISTORIAL DE COPIAS (catálogo SQLite indexado, solo se agregan filas)
+# -------------------------
+ESQUEMA_CATALOGO = """
+CREATE TABLE IF NOT EXISTS copias (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario TEXT,
+    contrasena TEXT,
+    bd TEXT,
+    base TEXT,
+    hora TEXT,
+    ruta TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_copias_base_hora ON copias(base, hora);
+CREATE INDEX IF NOT EXISTS idx_copias_hora ON copias(hora);
+CREATE INDEX IF NOT EXISTS idx_copias_ruta ON copias(ruta);
+CREATE TABLE IF NOT EXISTS copias_tablas (
+    copia_id INTEGER NOT NULL REFERENCES copias(id) ON DELETE CASCADE,
+    tabla TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_copias_tablas_tabla ON copias_tablas(tabla, copia_id);
+CREATE INDEX IF NOT EXISTS idx_copias_tablas_copia ON copias_tablas(copia_id);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+CREATE TABLE IF NOT EXISTS cola_trabajos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,
+    servidor TEXT NOT NULL,
+    bd TEXT,
+    pid INTEGER,
+    estado TEXT NOT NULL,
+    creado REAL,
+    iniciado REAL,
+    latido REAL
+);
+CREATE INDEX IF NOT EXISTS idx_cola_job ON cola_trabajos(job, estado);
+"""
+
+estado_catalogo = {"inicializado": False}
+lock_catalogo = threading.Lock()
+
+def conectar_catalogo():
+    # El esquema y la migración se resuelven en la primera conexión, no al importar.
+    if not estado_catalogo["inicializado"]:
+        inicializar_catalogo()
+    return _abrir_conexion_catalogo()
+
+def _abrir_conexion_catalogo():
+    con = sqlite3.connect(ARCHIVO_CATALOGO, timeout=30)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA foreign_keys = ON")
+    return con
+
+def inicializar_catalogo():
+    with lock_catalogo:
+        if estado_catalogo["inicializado"]:
+            return
+        _inicializar_catalogo()
+        estado_catalogo["inicializado"] = True
+
+def _inicializar_catalogo():
+    with contextlib.closing(_abrir_conexion_catalogo()) as con:
+        # WAL: las tareas automáticas pueden escribir mientras la interfaz lee.
+        con.execute("PRAGMA journal_mode = WAL")
+        con.executescript(ESQUEMA_CATALOGO)
+        asegurar_columnas_catalogo(con)
+        con.commit()
+        migrar_copias_json(con)
+
+# Columnas agregadas después de la primera versión del catálogo: se suman con
+# ALTER TABLE a los catálogos existentes.
+COLUMNAS_CATALOGO = {
+    "job": "TEXT",
+    "sha256": "TEXT",
+    "verificacion": "TEXT"
+}
+
+def asegurar_columnas_catalogo(con):
+    existentes = {f["name"] for f in con.execute("PRAGMA table_info(copias)")}
+    for columna, tipo in COLUMNAS_CATALOGO.items():
+        if columna not in existentes:
+            con.execute(f"ALTER TABLE copias ADD COLUMN {columna} {tipo}")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_copias_job ON copias(job, id)")
+
+def separar_bd_tablas(bd):
+    """'miguelhogar.clientes,ventas' -> ('miguelhogar', ['clientes', 'ventas'])"""
+    base, _, tablas = (bd or "").partition(".")
+    return base, [t for t in tablas.split(",") if t]
+
+def normalizar_hora_copia(hora):
+    try:
+        return datetime.datetime.strptime(hora, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return hora
+
+def insertar_copia(con, usuario, contrasena, bd, ruta, hora, extra=None, job=None, sha256=None):
+    base, tablas = separar_bd_tablas(bd)
+    cur = con.execute(
+        "INSERT INTO copias (usuario, contrasena, bd, base, hora, ruta, extra, job, sha256) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (usuario, contrasena, bd, base, normalizar_hora_copia(hora), ruta,
+         json.dumps(extra, ensure_ascii=False) if extra else None, job, sha256)
+    )
+    if tablas:
+        con.executemany("INSERT INTO copias_tablas (copia_id, tabla) VALUES (?, ?)",
+                        [(cur.lastrowid, t) for t in tablas])
+    return cur.lastrowid
+
+def migrar_copias_json(con):
+    """Importa una sola vez el copias.json heredado y lo renombra a .migrado."""
+    if con.execute("SELECT 1 FROM meta WHERE clave = 'migrado_copias_json'").fetchone():
+        return
+    if os.path.exists(ARCHIVO_COPIAS):
+        try:
+            with open(ARCHIVO_COPIAS, "r", encoding="utf-8") as f:
+                anteriores = json.load(f)
+        except Exception:
+            # Un copias.json dañado no se pisa: se deja para revisarlo a mano.
+            return
+        with con:
+            for c in anteriores:
+                insertar_copia(con, c.get("usuario"), c.get("contrasena"), c.get("bd"),
+                               c.get("ruta"), c.get("hora"))
+            con.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('migrado_copias_json', ?)",
+                        (str(len(anteriores)),))
+        try:
+            os.replace(ARCHIVO_COPIAS, ARCHIVO_COPIAS + ".migrado")
+        except OSError:
+            pass
+    else:
+        with con:
+            con.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('migrado_copias_json', '0')")
+
+def filtros_copias(bd=None, tabla=None, desde=None, hasta=None, ruta=None, job=None):
+    condiciones, params = [], []
+    if job:
+        condiciones.append("c.job = ?")
+        params.append(job)
+    if bd:
+        condiciones.append("c.base = ?")
+        params.append(bd)
+    if tabla:
+        condiciones.append("c.id IN (SELECT copia_id FROM copias_tablas WHERE tabla = ?)")
+        params.append(tabla)
+    if desde:
+        condiciones.append("c.hora >= ?")
+        params.append(desde)
+    if hasta:
+        condiciones.append("c.hora <= ?")
+        params.append(hasta)
+    if ruta:
+        condiciones.append("c.ruta = ?")
+        params.append(ruta)
+    return (" WHERE " + " AND ".join(condiciones)) if condiciones else "", params
+
+def fila_a_copia(fila):
+    copia = dict(fila)
+    copia["extra"] = json.loads(copia["extra"]) if copia.get("extra") else {}
+    if copia.get("verificacion"):
+        copia["verificacion"] = json.loads(copia["verificacion"])
+    return copia
+
+def consultar_copias(bd=None, tabla=None, desde=None, hasta=None, ruta=None, job=None,
+                     limite=None, offset=0, descendente=False):
+    """
+    Consulta el catálogo por base, tabla, rango de fechas (YYYY-MM-DD HH:MM:SS),
+    ruta o job usando los índices. Retorna una lista de dicts.
+    """
+    where, params = filtros_copias(bd, tabla, desde, hasta, ruta, job)
+    sql = f"SELECT c.* FROM copias c{where} ORDER BY c.id {'DESC' if descendente else 'ASC'}"
+    if limite is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [int(limite), int(offset)]
+    with contextlib.closing(conectar_catalogo()) as con:
+        return [fila_a_copia(f) for f in con.execute(sql, params)]
+
+def contar_copias(bd=None, tabla=None, desde=None, hasta=None, ruta=None, job=None):
+    where, params = filtros_copias(bd, tabla, desde, hasta, ruta, job)
+    with contextlib.closing(conectar_catalogo()) as con:
+        return con.execute(f"SELECT COUNT(*) FROM copias c{where}", params).fetchone()[0]
+
+def ultima_copia(bd=None, tabla=None, job=None):
+    copias = consultar_copias(bd=bd, tabla=tabla, job=job, limite=1, descendente=True)
+    return copias[0] if copias else None
+
+# -------------------------
+# BUSCAR mysqldump / mysql EN SISTEMA
+# -------------------------
+# Orden de búsqueda: caché persistida (si la huella coincide), ubicación
+# configurada en config.ini ([ejecutables] mysql_bin), variables de entorno,
+# PATH, rutas típicas de XAMPP/MySQL y, solo como último recurso, un
+# recorrido de C:\ y D:\ con profundidad limitada.
+PROFUNDIDAD_MAXIMA_BUSQUEDA = 4
+VARIABLES_ENTORNO_MYSQL = ("BACKUP_MYSQL_BIN", "MYSQL_HOME", "MYSQL_BIN")
+ejecutables_resueltos = {}
+lock_ejecutables = threading.Lock()
+
+def nombres_candidatos(nombre):
+    nombres = [nombre]
+    if os.name != "nt" and nombre.lower().endswith(".exe"):
+        nombres.append(nombre[:-4])
+    return nombres
+
+def huella_ejecutable(ruta):
+    try:
+        st = os.stat(ruta)
+        return {"ruta": ruta, "tamano": st.st_size, "mtime": int(st.st_mtime)}
+    except OSError:
+        return None
+
+def leer_cache_ejecutables():
+    try:
+        with open(ARCHIVO_CACHE_EJECUTABLES, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def guardar_cache_ejecutable(nombre, ruta):
+    huella = huella_ejecutable(ruta)
+    if huella is None:
+        return
+    try:
+        r = subprocess.run([ruta, "--version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                           text=True, timeout=10)
+        huella["version"] = (r.stdout.strip().splitlines() or [None])[0]
+    except Exception:
+        huella["version"] = None
+    cache = leer_cache_ejecutables()
+    cache[nombre] = huella
+    try:
+        escribir_json_atomico(ARCHIVO_CACHE_EJECUTABLES, cache)
+    except Exception:
+        pass
+
+def ejecutable_en_cache(nombre):
+    huella = leer_cache_ejecutables().get(nombre)
+    if not huella:
+        return None
+    actual = huella_ejecutable(huella.get("ruta", ""))
+    if actual and actual["tamano"] == huella.get("tamano") and actual["mtime"] == huella.get("mtime"):
+        return huella["ruta"]
+    return None
+
+def buscar_ejecutable_rapido(nombre):
+    """Búsqueda sin recorrer discos: configuración, entorno, PATH y rutas típicas."""
+    carpetas = []
+    cfg, _ = _config_vigente()
+    if cfg.has_option("ejecutables", "mysql_bin"):
+        carpetas.append(cfg.get("ejecutables", "mysql_bin"))
+    for var in VARIABLES_ENTORNO_MYSQL:
+        valor = os.environ.get(var)
+        if valor:
+            carpetas += [valor, os.path.join(valor, "bin")]
+    for carpeta in carpetas:
+        for n in nombres_candidatos(nombre):
+            ruta = os.path.join(carpeta, n)
+            if os.path.isfile(ruta):
+                return ruta
+
+    for n in nombres_candidatos(nombre):
+        ruta = shutil.which(n)
+        if ruta:
+            return ruta
+
+    posibles = [
+        rf"C:\\xampp\\mysql\\bin\\{nombre}",
+        rf"C:\\Program Files\\xampp\\mysql\\bin\\{nombre}",
+        rf"C:\\Program Files (x86)\\xampp\\mysql\\bin\\{nombre}",
+        rf"D:\\xampp\\mysql\\bin\\{nombre}",
+        rf"D:\\Program Files\\xampp\\mysql\\bin\\{nombre}",
+    ]
+    for ruta in posibles:
+        if os.path.exists(ruta):
+            return ruta
+    return None
+
+def buscar_ejecutable_en_discos(nombre, profundidad=PROFUNDIDAD_MAXIMA_BUSQUEDA):
+    for unidad in ["C:\\", "D:\\"]:
+        if not os.path.isdir(unidad):
+            continue
+        base = unidad.rstrip("\\").count(os.sep)
+        for raiz, dirs, archivos in os.walk(unidad):
+            if nombre in archivos:
+                return os.path.join(raiz, nombre)
+            if raiz.rstrip("\\").count(os.sep) - base >= profundidad:
+                dirs[:] = []
+    return None
+
+def buscar_ejecutable(nombre):
+    with lock_ejecutables:
+        ruta = ejecutables_resueltos.get(nombre)
+        if ruta and os.path.isfile(ruta):
+            return ruta
+
+        ruta = ejecutable_en_cache(nombre)
+        if ruta is None:
+            ruta = buscar_ejecutable_rapido(nombre) or buscar_ejecutable_en_discos(nombre)
+            if ruta:
+                guardar_cache_ejecutable(nombre, ruta)
+        if ruta:
+            ejecutables_resueltos[nombre] = ruta
+        return ruta
+
+def precalentar_ejecutables():
+    """Resuelve mysqldump/mysql en un hilo aparte para no demorar el primer backup."""
+    def resolver():
+        for nombre in ("mysqldump.exe", "mysql.exe"):
+            buscar_ejecutable(nombre)
+    threading.Thread(target=resolver, daemon=True).start()
+
+def mensaje_no_encontrado(nombre):
+    return (f"No se encontró {nombre}. Instalá XAMPP o indicá su carpeta en config.ini "
+            "(sección [ejecutables], clave mysql_bin).")
+
+def obtener_ejecutable_seguro(nombre):
+    encontrado = buscar_ejecutable(nombre)
+    if not encontrado:
+        return None
+    temp_dir = os.path.join(tempfile.gettempdir(), f"{nombre}_safe")
+    if not os.path.exists(temp_dir):
+        os.makedirs(temp_dir)
+    destino = os.path.join(temp_dir, os.path.basename(encontrado))
+    try:
+        if not os.path.exists(destino) or os.path.getsize(destino) != os.path.getsize(encontrado):
+            shutil.copy(encontrado, destino)
+    except Exception:
+        return encontrado
+    return destino
+
+# -------------------------
+# VALIDACIONES DE RUTAS
+# -------------------------
+def carpeta_valida(path):
+    path = (path or "").lower().replace("/", "\\")
+    prohibidas = [
+        "c:\\program files",
+        "c:\\program files (x86)",
+        "c:\\windows",
+        "c:\\programdata",
+        "c:\\xampp\\mysql\\bin"
+    ]
+    return not any(path.startswith(p) for p in prohibidas)
+
+def leer_workers(valor):
+    try:
+        return max(1, int(str(valor).strip() or 1))
+    except ValueError:
+        return 1
+
+# -------------------------
+# TRABAJOS EN SEGUNDO PLANO (procesos hijos cancelables y eventos de progreso)
+# -------------------------
+_contexto_hilo = threading.local()
+eventos_trabajos = queue.Queue()
+
+def trabajo_actual():
+    return getattr(_contexto_hilo, "trabajo", None)
+
+def asignar_trabajo_actual(trabajo):
+    _contexto_hilo.trabajo = trabajo
+
+def servidor_actual():
+    return getattr(_contexto_hilo, "servidor", None)
+
+def asignar_servidor_actual(servidor):
+    """(host, puerto) al que apuntan mysql/mysqldump/mysqlbinlog en este hilo; None = servidor local."""
+    _contexto_hilo.servidor = servidor
+
+@contextlib.contextmanager
+def usar_servidor(servidor):
+    anterior = servidor_actual()
+    asignar_servidor_actual(servidor)
+    try:
+        yield
+    finally:
+        asignar_servidor_actual(anterior)
+
+def argumentos_servidor():
+    servidor = servidor_actual()
+    if not servidor:
+        return []
+    return ["-h", servidor[0], "-P", str(servidor[1])]
+
+def lanzar_proceso(comando, **kwargs):
+    """
+    subprocess.Popen que registra el proceso en el trabajo del hilo actual,
+    para que cancelar_trabajo pueda terminarlo.
+    """
+    trabajo = trabajo_actual()
+    if trabajo is None:
+        return subprocess.Popen(comando, **kwargs)
+    with trabajo["lock"]:
+        if trabajo["cancelado"]:
+            raise RuntimeError("Trabajo cancelado.")
+        proceso = subprocess.Popen(comando, **kwargs)
+        trabajo["procesos"].append(proceso)
+    return proceso
+
+def cancelar_trabajo(trabajo):
+    with trabajo["lock"]:
+        trabajo["cancelado"] = True
+        for proceso in trabajo["procesos"]:
+            if proceso.poll() is None:
+                try:
+                    proceso.terminate()
+                except Exception:
+                    pass
+
+def publicar_progreso(texto):
+    trabajo = trabajo_actual()
+    if trabajo is not None:
+        eventos_trabajos.put(("progreso", trabajo, texto))
+
+# -------------------------
+# PROGRESO Y RENDIMIENTO (bytes, MB/s, ETA y tabla actual)
+# -------------------------
+# Un medidor es un dict compartido por los hilos de un mismo volcado o
+# restauración. Cada bloque suma bytes y, como mucho cada INTERVALO_PROGRESO_S,
+# se llama a progreso(estado) y se publica el texto en la cola de trabajos.
+INTERVALO_PROGRESO_S = 0.5
+PATRON_TABLA_DUMP = re.compile(rb"^-- (?:Table structure for table|Dumping data for table) `([^`]+)`", re.M)
+
+def crear_medidor(fase, total=None, totales_tabla=None, progreso=None):
+    return {
+        "fase": fase,
+        "total": total,
+        "totales_tabla": totales_tabla or {},
+        "progreso": progreso,
+        "bytes": 0,
+        "tabla": None,
+        "bytes_tabla": 0,
+        "tablas": None,
+        "inicio": time.monotonic(),
+        "ultimo_aviso": 0.0,
+        "lock": threading.Lock()
+    }
+
+def medidor_si_corresponde(fase, progreso, estimar):
+    """Crea el medidor solo si alguien lo va a leer: un callback o un trabajo de la GUI."""
+    if progreso is None and trabajo_actual() is None:
+        return None
+    total, totales_tabla = estimar()
+    return crear_medidor(fase, total, totales_tabla, progreso)
+
+def estado_medidor(medidor, final=False):
+    segundos = time.monotonic() - medidor["inicio"]
+    bytes_ = medidor["bytes"]
+    mb_s = bytes_ / 1048576 / segundos if segundos > 0 else None
+    total = medidor["total"]
+    eta = None
+    if total and mb_s and bytes_ < total:
+        eta = (total - bytes_) / 1048576 / mb_s
+    return {
+        "fase": medidor["fase"],
+        "bytes": bytes_,
+        "total": total,
+        "porcentaje": min(100.0, bytes_ * 100 / total) if total else None,
+        "mb_s": round(mb_s, 2) if mb_s is not None else None,
+        "eta_s": round(eta) if eta is not None else None,
+        "segundos": round(segundos, 3),
+        "tabla": medidor["tabla"],
+        "bytes_tabla": medidor["bytes_tabla"],
+        "total_tabla": medidor["totales_tabla"].get(medidor["tabla"]),
+        "tablas": medidor["tablas"],
+        "final": final
+    }
+
+def formatear_progreso(estado):
+    texto = f"{estado['bytes'] / 1048576:.0f}"
+    if estado["total"]:
+        texto += f" de ~{estado['total'] / 1048576:.0f} MB ({estado['porcentaje']:.0f}%)"
+    else:
+        texto += " MB"
+    if estado["mb_s"] is not None:
+        texto += f", {estado['mb_s']:.1f} MB/s"
+    if estado["eta_s"] is not None and not estado["final"]:
+        texto += f", ETA {estado['eta_s'] // 60}:{estado['eta_s'] % 60:02d}"
+    if estado["tablas"]:
+        texto += f", {estado['tablas'][0]}/{estado['tablas'][1]} tablas"
+    elif estado["tabla"]:
+        texto += f", tabla {estado['tabla']}"
+        if estado["total_tabla"]:
+            texto += f" ({min(100, estado['bytes_tabla'] * 100 // estado['total_tabla'])}%)"
+    return texto
+
+def avisar_medidor(medidor, final=False):
+    estado = estado_medidor(medidor, final)
+    if medidor["progreso"]:
+        medidor["progreso"](estado)
+    publicar_progreso(formatear_progreso(estado))
+
+def avanzar_medidor(medidor, n, tabla=None):
+    if medidor is None:
+        return
+    with medidor["lock"]:
+        medidor["bytes"] += n
+        if tabla is not None and tabla != medidor["tabla"]:
+            medidor["tabla"] = tabla
+            medidor["bytes_tabla"] = 0
+        medidor["bytes_tabla"] += n
+        ahora = time.monotonic()
+        if ahora - medidor["ultimo_aviso"] < INTERVALO_PROGRESO_S:
+            return
+        medidor["ultimo_aviso"] = ahora
+        avisar_medidor(medidor)
+
+def avanzar_con_sql(medidor, bloque):
+    """Suma un bloque de SQL y toma la tabla actual de los comentarios de mysqldump."""
+    if medidor is None:
+        return
+    tablas = PATRON_TABLA_DUMP.findall(bloque)
+    avanzar_medidor(medidor, len(bloque), tablas[-1].decode("utf-8", errors="replace") if tablas else None)
+
+def marcar_tablas_medidor(medidor, hechas, total):
+    if medidor is not None:
+        with medidor["lock"]:
+            medidor["tablas"] = (hechas, total)
+
+def cerrar_medidor(medidor):
+    if medidor is not None:
+        with medidor["lock"]:
+            avisar_medidor(medidor, final=True)
+
+def contar_bloques(bloques, medidor):
+    """
+    Pasa `bloques` (líneas o bloques de SQL) contándolos en el medidor. Los
+    bytes se acumulan y se suman de a TAMANO_BLOQUE para no tomar el lock
+    del medidor por cada línea.
+    """
+    if medidor is None:
+        yield from bloques
+        return
+    pendiente = 0
+    for bloque in bloques:
+        yield bloque
+        pendiente += len(bloque)
+        tablas = PATRON_TABLA_DUMP.findall(bloque) if b"-- " in bloque else None
+        if tablas or pendiente >= TAMANO_BLOQUE:
+            avanzar_medidor(medidor, pendiente, tablas[-1].decode("utf-8", errors="replace") if tablas else None)
+            pendiente = 0
+    if pendiente:
+        avanzar_medidor(medidor, pendiente)
+
+# -------------------------
+# FUNCIONES DE BACKUP Y ZIP
+# -------------------------
+def agregar_copia(usuario, contrasena, bd, ruta, hora=None, extra=None, job=None, sha256=None):
+    if hora is None:
+        hora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if sha256 is None and (ruta.endswith(EXTENSION_DEDUP) or os.path.basename(ruta).lower() == ARCHIVO_MANIFIESTO):
+        # Los manifiestos son chicos: se sellan acá aunque el volcado no traiga su suma.
+        try:
+            sha256 = sha256_archivo(ruta)
+        except OSError:
+            pass
+    if ruta.endswith(EXTENSION_DEDUP):
+        resumen = resumen_manifiesto_dedup(ruta)
+        if resumen:
+            extra = dict(extra or {}, dedup=resumen)
+    if not (extra or {}).get("compresion") and codec_de_ruta(ruta):
+        extra = dict(extra or {}, compresion={"codec": codec_de_ruta(ruta)})
+    with contextlib.closing(conectar_catalogo()) as con:
+        with con:
+            copia_id = insertar_copia(con, usuario, contrasena, bd, ruta, hora, extra, job, sha256)
+    return copia_id
+
+def zip_file(path_sql, keep_original=False, nivel=None):
+    try:
+        base = os.path.splitext(path_sql)[0]
+        zip_path = base + ".zip"
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED,
+                             compresslevel=nivel_compresion("zip", nivel)) as zf:
+            zf.write(path_sql, arcname=os.path.basename(path_sql))
+        if not keep_original:
+            try:
+                os.remove(path_sql)
+            except:
+                pass
+        return zip_path
+    except Exception:
+        return None
+
+# -------------------------
+# CÓDECS DE COMPRESIÓN (formato, nivel y compresión en paralelo por bloques)
+# -------------------------
+# Por job en config.ini: compresion = zip | gz | bz2 | xz | zstd | lz4 | dedup,
+# nivel_compresion y hilos_compresion. gz, bz2, xz y lz4 comprimen bloques
+# independientes en un pool de hilos (zlib, bz2 y lzma liberan el GIL) y los
+# escriben en orden como miembros/streams concatenados, que los lectores
+# estándar de cada formato leen como un único archivo. zstd usa los hilos de
+# la propia librería; zip queda en un solo hilo (un solo stream deflate).
+TAMANO_BLOQUE_COMPRESION = 4 * 1024 * 1024
+HILOS_COMPRESION_DEFECTO = min(4, os.cpu_count() or 1)
+
+def comprimir_bloque_gz(datos, nivel):
+    return gzip.compress(datos, compresslevel=nivel, mtime=0)
+
+def comprimir_bloque_bz2(datos, nivel):
+    return bz2.compress(datos, nivel)
+
+def comprimir_bloque_xz(datos, nivel):
+    return lzma.compress(datos, preset=nivel)
+
+def comprimir_bloque_lz4(datos, nivel):
+    return lz4_frame.compress(datos, compression_level=nivel)
+
+CODECS = {
+    "zip": {"sufijo": ".zip", "nivel": 6, "bloque": None},
+    "gz": {"sufijo": ".gz", "nivel": 6, "bloque": comprimir_bloque_gz},
+    "bz2": {"sufijo": ".bz2", "nivel": 9, "bloque": comprimir_bloque_bz2},
+    "xz": {"sufijo": ".xz", "nivel": 6, "bloque": comprimir_bloque_xz},
+    "zstd": {"sufijo": ".zst", "nivel": 3, "bloque": None},
+    "lz4": {"sufijo": ".lz4", "nivel": 0, "bloque": comprimir_bloque_lz4},
+}
+
+def codec_disponible(formato):
+    if formato == "zstd":
+        return zstandard is not None
+    if formato == "lz4":
+        return lz4_frame is not None
+    return formato in CODECS or formato == "dedup"
+
+def codecs_disponibles():
+    return [f for f in list(CODECS) + ["dedup"] if codec_disponible(f)]
+
+def codec_de_ruta(ruta):
+    minus = (ruta or "").lower()
+    if os.path.basename(minus) == ARCHIVO_MANIFIESTO:
+        return "multiarchivo"
+    if minus.endswith(EXTENSION_DEDUP):
+        return "dedup"
+    for formato, codec in CODECS.items():
+        if minus.endswith(codec["sufijo"]):
+            return formato
+    return None
+
+def nivel_compresion(formato, nivel=None):
+    try:
+        return int(nivel) if nivel not in (None, "") else CODECS[formato]["nivel"]
+    except (ValueError, KeyError):
+        return CODECS.get(formato, {}).get("nivel")
+
+class EscritorPorBloques(io.RawIOBase):
+    """
+    Acumula lo escrito en bloques de TAMANO_BLOQUE_COMPRESION, los comprime en
+    `hilos` hilos con `comprimir(bloque, nivel)` y los escribe en orden en
+    `destino`. Como mucho hay 2 * hilos bloques en memoria.
+    """
+
+    def __init__(self, destino, comprimir, nivel, hilos):
+        self.destino = destino
+        self.comprimir = comprimir
+        self.nivel = nivel
+        self.hilos = hilos
+        self.pool = ThreadPoolExecutor(max_workers=hilos)
+        self.pendientes = collections.deque()
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self.buffer += datos
+        while len(self.buffer) >= TAMANO_BLOQUE_COMPRESION:
+            self.enviar(bytes(self.buffer[:TAMANO_BLOQUE_COMPRESION]))
+            del self.buffer[:TAMANO_BLOQUE_COMPRESION]
+        return len(datos)
+
+    def enviar(self, bloque):
+        self.pendientes.append(self.pool.submit(self.comprimir, bloque, self.nivel))
+        while len(self.pendientes) > 2 * self.hilos:
+            self.destino.write(self.pendientes.popleft().result())
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self.buffer:
+                self.enviar(bytes(self.buffer))
+                self.buffer.clear()
+            while self.pendientes:
+                self.destino.write(self.pendientes.popleft().result())
+        finally:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            super().close()
+
+# -------------------------
+# COMPRESIÓN EN STREAMING (mysqldump -> archivo comprimido, sin .sql intermedio)
+# -------------------------
+TAMANO_BLOQUE = 1024 * 1024
+# mysqldump cierra con "-- Dump completed on ...": si falta, la salida quedó cortada.
+MARCA_FIN_DUMP = b"-- Dump completed"
+LARGO_COLA_DUMP = 256
+OPCIONES_SIN_MARCA_FIN = ("--skip-comments", "--compact")
+
+class ArchivoConSuma(io.RawIOBase):
+    """Archivo de escritura que suma a `suma` (hashlib) los bytes tal como quedan en disco."""
+
+    def __init__(self, destino_file, suma=None):
+        self.archivo = open(destino_file, "wb")
+        self.suma = suma
+        self.posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        n = self.archivo.write(b)
+        if self.suma is not None:
+            self.suma.update(memoryview(b)[:n])
+        self.posicion += n
+        return n
+
+    def tell(self):
+        return self.posicion
+
+    def flush(self):
+        self.archivo.flush()
+
+    def close(self):
+        if not self.closed:
+            try:
+                super().close()
+            finally:
+                self.archivo.close()
+
+def copiar_salida_dump(proceso, escribir, medidor):
+    """Pasa el stdout de `proceso` a `escribir` por bloques; retorna los últimos bytes (ver error_fin_dump)."""
+    cola = b""
+    for bloque in iter(lambda: proceso.stdout.read(TAMANO_BLOQUE), b""):
+        escribir(bloque)
+        avanzar_con_sql(medidor, bloque)
+        cola = (cola + bloque[-LARGO_COLA_DUMP:])[-LARGO_COLA_DUMP:]
+    proceso.stdout.close()
+    return cola
+
+def error_fin_dump(comando, cola):
+    """Mensaje de error si la salida de mysqldump (o del motor nativo) no termina con MARCA_FIN_DUMP, o None."""
+    if not es_volcado_nativo(comando):
+        if not os.path.basename(comando[0]).lower().startswith("mysqldump"):
+            return None
+        if any(opcion in comando for opcion in OPCIONES_SIN_MARCA_FIN):
+            return None
+    if MARCA_FIN_DUMP in cola:
+        return None
+    return "El volcado terminó sin la línea '-- Dump completed': la salida de mysqldump quedó incompleta."
+
+def ruta_comprimida(path_sql, formato):
+    if formato == "zip":
+        return os.path.splitext(path_sql)[0] + ".zip"
+    if formato == "dedup":
+        return path_sql + EXTENSION_DEDUP
+    if formato in CODECS:
+        return path_sql + CODECS[formato]["sufijo"]
+    return path_sql
+
+def abrir_salida_comprimida(pila, destino_file, formato, arcname, nivel=None, hilos=1, suma=None):
+    """
+    Abre destino_file para escritura binaria comprimida dentro de `pila`
+    (contextlib.ExitStack) y retorna el objeto donde escribir los bloques.
+    Con hilos > 1 los códecs por bloques comprimen en paralelo. `suma`
+    (hashlib) recibe los bytes comprimidos a medida que se escriben.
+    """
+    if formato not in CODECS:
+        raise ValueError(f"Formato de compresión desconocido: {formato}")
+    if not codec_disponible(formato):
+        paquete = {"zstd": "zstandard", "lz4": "lz4"}[formato]
+        raise RuntimeError(f"Compresión {formato} no disponible (instalá el paquete '{paquete}').")
+    nivel = nivel_compresion(formato, nivel)
+    hilos = max(1, int(hilos or 1))
+
+    f = pila.enter_context(ArchivoConSuma(destino_file, suma))
+    if formato == "zip":
+        # Sin seek el zip lleva descriptores de datos: se escribe de corrido.
+        zf = pila.enter_context(zipfile.ZipFile(f, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=nivel))
+        return pila.enter_context(zf.open(arcname, "w", force_zip64=True))
+    if formato == "zstd":
+        compresor = zstandard.ZstdCompressor(level=nivel, threads=hilos if hilos > 1 else 0)
+        return pila.enter_context(compresor.stream_writer(f))
+    if hilos > 1:
+        return pila.enter_context(EscritorPorBloques(f, CODECS[formato]["bloque"], nivel, hilos))
+    if formato == "gz":
+        return pila.enter_context(gzip.GzipFile(destino_file, "wb", compresslevel=nivel, fileobj=f))
+    if formato == "bz2":
+        return pila.enter_context(bz2.BZ2File(f, "wb", compresslevel=nivel))
+    if formato == "xz":
+        return pila.enter_context(lzma.LZMAFile(f, "wb", preset=nivel))
+    return pila.enter_context(lz4_frame.LZ4FrameFile(f, "wb", compression_level=nivel))
+
+def construir_comando_mysqldump(mysqldump, usuario, contrasena, bd, tablas, extra=None):
+    comando = [mysqldump] + argumentos_servidor() + ["-u", usuario]
+    if contrasena:
+        comando.append(f"-p{contrasena}")
+    if extra:
+        comando += list(extra)
+
+    if tablas:
+        if isinstance(tablas, str):
+            tablas = tablas.split()
+        comando += [bd] + list(tablas)
+    else:
+        comando.append(bd)
+    return comando
+
+def ejecutar_mysqldump(usuario, contrasena, bd, tablas, destino_file, compresion=None, extra=None,
+                       progreso=None, nivel=None, hilos=None, partes=None, integridad=None, motor=None):
+    """
+    Si `compresion` es "zip", "gz" o "zstd", la salida de mysqldump se lee en
+    bloques binarios y se comprime directamente en ruta_comprimida(destino_file),
+    sin llegar a escribir el .sql plano en disco. Con "dedup" se guarda en el
+    almacén deduplicado (ver volcar_deduplicado). `nivel` y `hilos` eligen el
+    nivel del códec y cuántos hilos comprimen en paralelo (ver CODECS).
+    `progreso(estado)` recibe bytes, MB/s, ETA y tabla actual (ver estado_medidor).
+    Con `partes` (ver limites_partes) la salida va a la carpeta del mismo
+    nombre sin extensión, en partes de tamaño acotado con su manifest.json.
+    Si el volcado sale bien, `integridad` (dict) recibe el sha256 del archivo
+    resultante, calculado mientras se escribe. Con `motor` "nativo" el SQL
+    lo genera pymysql en el proceso (ver MOTOR NATIVO) y `extra` no se usa.
+    """
+    if motor == "nativo":
+        if not motor_nativo_disponible():
+            return (False, mensaje_motor_nativo_no_disponible())
+        comando = volcado_nativo(usuario, contrasena, bd, tablas)
+    else:
+        mysqldump = obtener_ejecutable_seguro("mysqldump.exe")
+        if not mysqldump:
+            return (False, mensaje_no_encontrado("mysqldump"))
+        comando = construir_comando_mysqldump(mysqldump, usuario, contrasena, bd, tablas, extra=extra)
+    medidor = medidor_si_corresponde("volcado", progreso,
+                                     lambda: estimar_bytes_volcado(usuario, contrasena, bd, tablas, motor=motor))
+    if hilos is None:
+        hilos = HILOS_COMPRESION_DEFECTO
+    resultado = volcar_a_archivo(comando, destino_file, compresion, medidor=medidor, nivel=nivel, hilos=hilos,
+                                 partes=partes, integridad=integridad)
+    cerrar_medidor(medidor)
+    return resultado
+
+def volcar_a_archivo(comando, destino_file, compresion=None, medidor=None, nivel=None, hilos=1, partes=None,
+                     integridad=None):
+    if compresion == "dedup":
+        return volcar_deduplicado(comando, ruta_comprimida(destino_file, compresion), medidor=medidor,
+                                  integridad=integridad)
+    if partes:
+        return volcar_por_partes(comando, os.path.splitext(destino_file)[0], partes, compresion,
+                                 medidor=medidor, nivel=nivel, hilos=hilos, integridad=integridad)
+    if compresion:
+        return volcar_comprimido(comando, ruta_comprimida(destino_file, compresion),
+                                 compresion, os.path.basename(destino_file), medidor=medidor,
+                                 nivel=nivel, hilos=hilos, integridad=integridad)
+
+    proceso = None
+    suma = hashlib.sha256()
+    try:
+        with tempfile.TemporaryFile() as errores:
+            with open(destino_file, "wb") as salida:
+                proceso = lanzar_volcado(comando, errores)
+
+                def escribir(bloque):
+                    salida.write(bloque)
+                    suma.update(bloque)
+
+                cola = copiar_salida_dump(proceso, escribir, medidor)
+                returncode = proceso.wait()
+
+            error = errores_volcado(returncode, errores, comando, cola)
+            if error:
+                eliminar_archivo_parcial(destino_file)
+                return (False, error)
+        if integridad is not None:
+            integridad["sha256"] = suma.hexdigest()
+        return (True, None)
+    except Exception as e:
+        if proceso is not None and proceso.poll() is None:
+            proceso.kill()
+            proceso.wait()
+        eliminar_archivo_parcial(destino_file)
+        return (False, str(e))
+
+def volcar_comprimido(comando, destino_file, formato, arcname, medidor=None, nivel=None, hilos=1,
+                      integridad=None):
+    proceso = None
+    suma = hashlib.sha256()
+    try:
+        with tempfile.TemporaryFile() as errores:
+            with contextlib.ExitStack() as pila:
+                salida = abrir_salida_comprimida(pila, destino_file, formato, arcname, nivel=nivel, hilos=hilos,
+                                                 suma=suma)
+                proceso = lanzar_volcado(comando, errores)
+                cola = copiar_salida_dump(proceso, salida.write, medidor)
+                returncode = proceso.wait()
+
+            error = errores_volcado(returncode, errores, comando, cola)
+            if error:
+                eliminar_archivo_parcial(destino_file)
+                return (False, error)
+        if integridad is not None:
+            integridad["sha256"] = suma.hexdigest()
+        return (True, None)
+    except Exception as e:
+        if proceso is not None and proceso.poll() is None:
+            proceso.kill()
+            proceso.wait()
+        eliminar_archivo_parcial(destino_file)
+        return (False, str(e))
+
+def errores_volcado(returncode, errores, comando, cola):
+    """Error del volcado (stderr si falló, o la marca de fin ausente), o None si salió completo."""
+    if returncode != 0:
+        errores.seek(0)
+        return errores.read().decode("utf-8", errors="replace")
+    return error_fin_dump(comando, cola)
+
+def eliminar_archivo_parcial(path):
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+    except:
+        pass
+
+# -------------------------
+# ALMACÉN DEDUPLICADO (chunks por contenido)
+# -------------------------
+# Con compresion = "dedup" la salida de mysqldump se corta en chunks
+# definidos por el contenido, cada chunk se guarda una sola vez en
+# almacen_dedup/chunks/<sha256[:2]>/<sha256> (comprimido con zlib) y el
+# backup queda como un manifiesto .sql.dedup con la lista de chunks.
+# Los cortes dependen solo de las líneas, así una tabla que no cambió
+# produce los mismos chunks aunque cambien las tablas de alrededor.
+CARPETA_ALMACEN_DEDUP = "almacen_dedup"
+EXTENSION_DEDUP = ".dedup"
+CHUNK_MINIMO = 256 * 1024
+CHUNK_OBJETIVO = 1024 * 1024
+CHUNK_MAXIMO = 8 * 1024 * 1024
+NIVEL_ZLIB_CHUNKS = 6
+# Líneas que siempre abren un chunk: el inicio de cada tabla y el pie con la fecha.
+CORTES_FIJOS_CHUNK = (b"-- Table structure for table", b"-- Dump completed")
+
+def carpeta_almacen_dedup(directorio):
+    """Usa el almacén de `directorio` o de alguna carpeta superior; si no hay, lo crea en `directorio`."""
+    actual = os.path.abspath(directorio or ".")
+    while True:
+        candidato = os.path.join(actual, CARPETA_ALMACEN_DEDUP)
+        if os.path.isdir(candidato):
+            return candidato
+        padre = os.path.dirname(actual)
+        if padre == actual:
+            return os.path.join(os.path.abspath(directorio or "."), CARPETA_ALMACEN_DEDUP)
+        actual = padre
+
+def ruta_chunk(almacen, hash_hex):
+    return os.path.join(almacen, "chunks", hash_hex[:2], hash_hex)
+
+def trocear_por_contenido(lineas):
+    """
+    Agrupa líneas en chunks de ~CHUNK_OBJETIVO bytes. Una línea cierra el
+    chunk con probabilidad proporcional a su largo (crc32 % objetivo < largo),
+    así el tamaño medio no depende de si el dump usa INSERT extendidos o no.
+    Las líneas de CORTES_FIJOS_CHUNK abren un chunk nuevo.
+    """
+    partes = []
+    tamano = 0
+    for linea in lineas:
+        if partes and (linea.startswith(CORTES_FIJOS_CHUNK) or tamano + len(linea) > CHUNK_MAXIMO):
+            yield b"".join(partes)
+            partes, tamano = [], 0
+        while len(linea) > CHUNK_MAXIMO:
+            yield linea[:CHUNK_MAXIMO]
+            linea = linea[CHUNK_MAXIMO:]
+        partes.append(linea)
+        tamano += len(linea)
+        if tamano >= CHUNK_MINIMO and zlib.crc32(linea) % CHUNK_OBJETIVO < len(linea):
+            yield b"".join(partes)
+            partes, tamano = [], 0
+    if partes:
+        yield b"".join(partes)
+
+def guardar_chunk(almacen, datos):
+    """Guarda el chunk si no existía. Retorna (hash, bytes_escritos_en_disco)."""
+    hash_hex = hashlib.sha256(datos).hexdigest()
+    destino = ruta_chunk(almacen, hash_hex)
+    if os.path.exists(destino):
+        try:
+            # La fecha de uso protege al chunk de limpiar_chunks_huerfanos.
+            os.utime(destino)
+            return hash_hex, 0
+        except FileNotFoundError:
+            pass
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    comprimido = zlib.compress(datos, NIVEL_ZLIB_CHUNKS)
+    tmp = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(comprimido)
+    os.replace(tmp, destino)
+    return hash_hex, len(comprimido)
+
+def volcar_deduplicado(comando, destino_file, medidor=None, integridad=None):
+    almacen = carpeta_almacen_dedup(os.path.dirname(destino_file))
+    proceso = None
+    try:
+        chunks = []
+        nuevos = 0
+        cola = b""
+        with tempfile.TemporaryFile() as errores:
+            proceso = lanzar_volcado(comando, errores)
+            for datos in trocear_por_contenido(proceso.stdout):
+                hash_hex, escritos = guardar_chunk(almacen, datos)
+                chunks.append([hash_hex, len(datos)])
+                nuevos += escritos
+                avanzar_con_sql(medidor, datos)
+                cola = (cola + datos[-LARGO_COLA_DUMP:])[-LARGO_COLA_DUMP:]
+            proceso.stdout.close()
+            error = errores_volcado(proceso.wait(), errores, comando, cola)
+            if error:
+                return (False, error)
+
+        escribir_json_atomico(destino_file, {
+            "version": 1,
+            "formato": "dedup",
+            "almacen": os.path.relpath(almacen, os.path.dirname(os.path.abspath(destino_file))),
+            "bytes": sum(t for _, t in chunks),
+            "bytes_nuevos": nuevos,
+            "chunks": chunks
+        })
+        if integridad is not None:
+            integridad["sha256"] = sha256_archivo(destino_file)
+        return (True, None)
+    except Exception as e:
+        if proceso is not None and proceso.poll() is None:
+            proceso.kill()
+            proceso.wait()
+        eliminar_archivo_parcial(destino_file)
+        return (False, str(e))
+
+def leer_manifiesto_dedup(path):
+    with open(path, "r", encoding="utf-8") as f:
+        manifiesto = json.load(f)
+    if manifiesto.get("formato") != "dedup":
+        raise ValueError(f"{path} no es un manifiesto de backup deduplicado.")
+    manifiesto["almacen"] = os.path.join(os.path.dirname(os.path.abspath(path)), manifiesto["almacen"])
+    return manifiesto
+
+def resumen_manifiesto_dedup(path):
+    try:
+        manifiesto = leer_manifiesto_dedup(path)
+    except Exception:
+        return None
+    return {"bytes": manifiesto["bytes"], "bytes_nuevos": manifiesto.get("bytes_nuevos"),
+            "chunks": len(manifiesto["chunks"])}
+
+def leer_chunk(almacen, hash_hex):
+    with open(ruta_chunk(almacen, hash_hex), "rb") as f:
+        datos = zlib.decompress(f.read())
+    if hashlib.sha256(datos).hexdigest() != hash_hex:
+        raise ValueError(f"Chunk dañado en el almacén: {hash_hex}")
+    return datos
+
+class LectorDedup(io.RawIOBase):
+    """Archivo de solo lectura que rearma el SQL de un manifiesto chunk a chunk."""
+
+    def __init__(self, path):
+        manifiesto = leer_manifiesto_dedup(path)
+        self.almacen = manifiesto["almacen"]
+        self.pendientes = iter(manifiesto["chunks"])
+        self.actual = b""
+        self.posicion = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        while self.posicion >= len(self.actual):
+            siguiente = next(self.pendientes, None)
+            if siguiente is None:
+                return 0
+            self.actual = leer_chunk(self.almacen, siguiente[0])
+            self.posicion = 0
+        n = min(len(destino), len(self.actual) - self.posicion)
+        destino[:n] = self.actual[self.posicion:self.posicion + n]
+        self.posicion += n
+        return n
+
+def informe_deduplicacion(carpeta):
+    """
+    Recorre los manifiestos .dedup bajo `carpeta` que usan su almacén y
+    retorna bytes lógicos (suma de todos los backups), bytes únicos de los
+    chunks, bytes ocupados en disco y las razones de deduplicación.
+    """
+    almacen = os.path.abspath(carpeta_almacen_dedup(carpeta))
+    backups = 0
+    logicos = 0
+    unicos = {}
+    for raiz, dirs, archivos in os.walk(carpeta):
+        dirs[:] = [d for d in dirs if d != CARPETA_ALMACEN_DEDUP]
+        for nombre in archivos:
+            if not nombre.endswith(EXTENSION_DEDUP):
+                continue
+            try:
+                manifiesto = leer_manifiesto_dedup(os.path.join(raiz, nombre))
+            except Exception:
+                continue
+            if os.path.abspath(manifiesto["almacen"]) != almacen:
+                continue
+            backups += 1
+            logicos += manifiesto["bytes"]
+            for hash_hex, tamano in manifiesto["chunks"]:
+                unicos[hash_hex] = tamano
+
+    en_disco = 0
+    for raiz, _, archivos in os.walk(os.path.join(almacen, "chunks")):
+        for nombre in archivos:
+            try:
+                en_disco += os.path.getsize(os.path.join(raiz, nombre))
+            except OSError:
+                pass
+    bytes_unicos = sum(unicos.values())
+    return {
+        "almacen": almacen,
+        "backups": backups,
+        "chunks": len(unicos),
+        "bytes_logicos": logicos,
+        "bytes_unicos": bytes_unicos,
+        "bytes_en_disco": en_disco,
+        "razon_dedup": round(logicos / bytes_unicos, 2) if bytes_unicos else None,
+        "razon_total": round(logicos / en_disco, 2) if en_disco else None
+    }
+
+def formatear_informe_dedup(informe):
+    mb = lambda b: f"{b / 1048576:.1f} MB"
+    lineas = [
+        f"Almacén: {informe['almacen']}",
+        f"Backups: {informe['backups']} ({informe['chunks']} chunks únicos)",
+        f"Tamaño lógico: {mb(informe['bytes_logicos'])}",
+        f"Chunks únicos: {mb(informe['bytes_unicos'])}",
+        f"En disco (zlib): {mb(informe['bytes_en_disco'])}",
+    ]
+    if informe["razon_dedup"]:
+        lineas.append(f"Deduplicación: {informe['razon_dedup']}x  |  Total con compresión: {informe['razon_total']}x")
+    return "\n".join(lineas)
+
+# -------------------------
+# CONSULTAS CON EL CLIENTE mysql
+# -------------------------
+def construir_comando_mysql(mysql_exe, usuario, contrasena, bd=None, extra=None):
+    comando = [mysql_exe] + argumentos_servidor() + ["-u", usuario]
+    if contrasena:
+        comando.append(f"-p{contrasena}")
+    if extra:
+        comando += list(extra)
+    if bd:
+        comando.append(bd)
+    return comando
+
+def literal_sql(valor):
+    return "'" + str(valor).replace("\\", "\\\\").replace("'", "''") + "'"
+
+def consultar_mysql(usuario, contrasena, sql, bd=None, motor=None):
+    """
+    Ejecuta `sql` con el cliente mysql en modo batch y retorna
+    (True, filas) con cada fila como lista de columnas, o (False, error).
+    Con `motor` "nativo" va por una conexión del pool (ver consultar_nativo).
+    """
+    if motor == "nativo":
+        return consultar_nativo(usuario, contrasena, sql, bd)
+    mysql_exe = obtener_ejecutable_seguro("mysql.exe")
+    if not mysql_exe:
+        return (False, mensaje_no_encontrado("mysql"))
+
+    comando = construir_comando_mysql(mysql_exe, usuario, contrasena, bd, extra=["-N", "-B", "-e", sql])
+    try:
+        r = subprocess.run(comando, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8")
+        if r.returncode != 0:
+            return (False, r.stderr)
+        return (True, [l.split("\t") for l in r.stdout.splitlines()])
+    except Exception as e:
+        return (False, str(e))
+
+def estimar_bytes_volcado(usuario, contrasena, bd, tablas=None, motor=None):
+    """
+    Estima el tamaño del volcado con DATA_LENGTH de information_schema.
+    Retorna (total, {tabla: bytes}); (None, {}) si no se pudo consultar.
+    """
+    sql = (
+        "SELECT TABLE_NAME, COALESCE(DATA_LENGTH, 0) FROM information_schema.TABLES "
+        f"WHERE TABLE_SCHEMA = {literal_sql(bd)} AND TABLE_TYPE = 'BASE TABLE'"
+    )
+    ok, filas = consultar_mysql(usuario, contrasena, sql, motor=motor)
+    if not ok:
+        return (None, {})
+    if isinstance(tablas, str):
+        tablas = tablas.split()
+    filtro = set(tablas) if tablas else None
+    por_tabla = {}
+    for fila in filas:
+        if len(fila) >= 2 and (filtro is None or fila[0] in filtro):
+            try:
+                por_tabla[fila[0]] = int(fila[1])
+            except ValueError:
+                pass
+    return (sum(por_tabla.values()) or None, por_tabla)
+
+# -------------------------
+# VOLCADO PARALELO POR TABLA (un archivo por tabla + manifiesto)
+# -------------------------
+ARCHIVO_MANIFIESTO = "manifest.json"
+
+def listar_tablas_bd(usuario, contrasena, bd, tablas=None, motor=None):
+    """
+    Retorna (True, [{"tabla", "tipo", "bytes_estimados"}]) ordenado de mayor a
+    menor tamaño, con las vistas al final (se restauran después de las tablas).
+    """
+    sql = (
+        "SELECT TABLE_NAME, TABLE_TYPE, COALESCE(DATA_LENGTH, 0) + COALESCE(INDEX_LENGTH, 0) "
+        f"FROM information_schema.TABLES WHERE TABLE_SCHEMA = {literal_sql(bd)}"
+    )
+    ok, filas = consultar_mysql(usuario, contrasena, sql, motor=motor)
+    if not ok:
+        return (False, filas)
+
+    filtro = set(tablas) if tablas else None
+    resultado = []
+    for fila in filas:
+        if len(fila) < 3:
+            continue
+        nombre, tipo, tam = fila[0], fila[1], fila[2]
+        if filtro is not None and nombre not in filtro:
+            continue
+        try:
+            tam = int(tam)
+        except ValueError:
+            tam = 0
+        resultado.append({"tabla": nombre, "tipo": tipo, "bytes_estimados": tam})
+
+    resultado.sort(key=lambda t: (t["tipo"] == "VIEW", -t["bytes_estimados"]))
+    return (True, resultado)
+
+def abrir_bloqueo_lectura_global(usuario, contrasena, motor=None):
+    """
+    Abre una sesión de control que mantiene FLUSH TABLES WITH READ LOCK.
+    Mientras siga abierta no hay escrituras, por lo que todos los workers
+    (con --single-transaction) ven el mismo estado de la base.
+    """
+    if motor == "nativo":
+        return bloqueo_lectura_nativo(usuario, contrasena)
+    mysql_exe = obtener_ejecutable_seguro("mysql.exe")
+    if not mysql_exe:
+        return (False, mensaje_no_encontrado("mysql"))
+
+    comando = construir_comando_mysql(mysql_exe, usuario, contrasena, extra=["-N", "-B"])
+    try:
+        sesion = lanzar_proceso(comando, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True)
+        sesion.stdin.write("FLUSH TABLES WITH READ LOCK;\nSELECT 'LOCK_OK';\n")
+        sesion.stdin.flush()
+        linea = sesion.stdout.readline().strip()
+        if linea != "LOCK_OK":
+            sesion.kill()
+            _, err = sesion.communicate()
+            return (False, err or "No se pudo obtener el bloqueo de lectura global.")
+        return (True, sesion)
+    except Exception as e:
+        return (False, str(e))
+
+def cerrar_bloqueo_lectura_global(sesion):
+    if not isinstance(sesion, subprocess.Popen):
+        soltar_bloqueo_nativo(sesion)
+        return
+    try:
+        sesion.stdin.write("UNLOCK TABLES;\n")
+        sesion.stdin.close()
+        sesion.wait(timeout=30)
+    except Exception:
+        sesion.kill()
+
+def escribir_json_atomico(path, datos):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def ejecutar_mysqldump_paralelo(usuario, contrasena, bd, tablas, destino_dir,
+                                workers=4, compresion=None, consistente=None, progreso=None, nivel=None,
+                                motor=None):
+    """
+    Vuelca cada tabla con su propio proceso mysqldump, repartidas de la más
+    grande a la más chica entre `workers` procesos simultáneos, y escribe
+    destino_dir/manifest.json. Con `motor` "nativo" cada tabla usa una
+    conexión del pool en vez de un proceso.
+
+    `consistente` hace que el conjunto sea coherente con un bloqueo de
+    lectura global (FLUSH TABLES WITH READ LOCK), que frena las escrituras
+    en todas las bases del servidor. Con el motor nativo cada worker abre su
+    snapshot bajo el bloqueo y este se suelta enseguida, así que es lo que se
+    usa por defecto. Con mysqldump cada tabla es un proceso aparte que no
+    comparte snapshot con los demás: el bloqueo dura todo el volcado y por
+    eso solo se toma si se pide explícitamente (`consistente = true` en el job).
+    Sin él cada tabla sale coherente por sí misma (--single-transaction),
+    pero tomada en un momento distinto al de las otras.
+    """
+    if consistente is None:
+        consistente = motor == "nativo"
+    if motor == "nativo":
+        if not motor_nativo_disponible():
+            return (False, mensaje_motor_nativo_no_disponible())
+    else:
+        mysqldump = obtener_ejecutable_seguro("mysqldump.exe")
+        if not mysqldump:
+            return (False, mensaje_no_encontrado("mysqldump"))
+
+    if isinstance(tablas, str):
+        tablas = tablas.split()
+    ok, lista = listar_tablas_bd(usuario, contrasena, bd, tablas, motor=motor)
+    if not ok:
+        return (False, lista)
+    if not lista:
+        return (False, f"No se encontraron tablas en {bd}.")
+
+    os.makedirs(destino_dir, exist_ok=True)
+    if compresion == "dedup":
+        # El almacén va junto a la carpeta del volcado para compartirlo entre corridas.
+        os.makedirs(os.path.join(os.path.dirname(os.path.abspath(destino_dir)), CARPETA_ALMACEN_DEDUP),
+                    exist_ok=True)
+
+    # Cada tabla siempre en su propia transacción; el bloqueo global solo alinea los snapshots.
+    extra = ["--single-transaction", "--skip-lock-tables"]
+    inicio = time.time()
+
+    sesion = None
+    snapshots = None
+    if consistente:
+        ok, sesion = abrir_bloqueo_lectura_global(usuario, contrasena, motor=motor)
+        if not ok:
+            return (False, sesion)
+        if motor == "nativo":
+            try:
+                snapshots = abrir_snapshots_nativos(usuario, contrasena, min(max(1, int(workers)), len(lista)))
+            except Exception as e:
+                return (False, str(e))
+            finally:
+                # Todos los workers ya tienen su snapshot (o falló): no hace falta seguir bloqueando.
+                cerrar_bloqueo_lectura_global(sesion)
+                sesion = None
+
+    trabajo = trabajo_actual()
+    servidor = servidor_actual()
+    medidor = medidor_si_corresponde("volcado", progreso,
+                                     lambda: estimar_bytes_volcado(usuario, contrasena, bd, tablas, motor=motor))
+    marcar_tablas_medidor(medidor, 0, len(lista))
+
+    def volcar_tabla(entrada):
+        asignar_trabajo_actual(trabajo)
+        asignar_servidor_actual(servidor)
+        t0 = time.time()
+        archivo = os.path.join(destino_dir, f"{entrada['tabla']}.sql")
+        conexion = snapshots.get() if snapshots is not None else None
+        if motor == "nativo":
+            comando = volcado_nativo(usuario, contrasena, bd, [entrada["tabla"]], conexion=conexion)
+        else:
+            comando = construir_comando_mysqldump(mysqldump, usuario, contrasena, bd, [entrada["tabla"]],
+                                                  extra=extra)
+        # Las tablas ya van en paralelo: cada una comprime en un solo hilo.
+        integridad = {}
+        try:
+            ok, err = volcar_a_archivo(comando, archivo, compresion, medidor=medidor, nivel=nivel,
+                                       integridad=integridad)
+        finally:
+            if conexion is not None:
+                snapshots.put(conexion)
+        final = ruta_comprimida(archivo, compresion)
+        if ok:
+            entrada["archivo"] = os.path.basename(final)
+            entrada["bytes"] = os.path.getsize(final)
+            entrada["sha256"] = integridad.get("sha256")
+            entrada["segundos"] = round(time.time() - t0, 3)
+        return ok, err
+
+    errores = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+            # El pool consume la cola en orden FIFO: al enviar primero las
+            # tablas grandes se evita que una grande quede sola al final.
+            futuros = {pool.submit(volcar_tabla, entrada): entrada for entrada in lista}
+            for hechas, fut in enumerate(as_completed(futuros), 1):
+                ok, err = fut.result()
+                if medidor is None:
+                    publicar_progreso(f"{hechas}/{len(lista)} tablas volcadas")
+                marcar_tablas_medidor(medidor, hechas, len(lista))
+                if not ok:
+                    errores.append(f"{futuros[fut]['tabla']}: {err}")
+                    for f in futuros:
+                        f.cancel()
+    finally:
+        if sesion is not None:
+            cerrar_bloqueo_lectura_global(sesion)
+        if snapshots is not None:
+            cerrar_snapshots_nativos(snapshots)
+        cerrar_medidor(medidor)
+
+    if errores:
+        return (False, "\n".join(errores))
+
+    manifiesto = {
+        "version": 1,
+        "bd": bd,
+        "fecha": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "workers": int(workers),
+        "consistente": consistente,
+        "compresion": compresion,
+        "segundos": round(time.time() - inicio, 3),
+        "tablas": lista
+    }
+    try:
+        escribir_json_atomico(os.path.join(destino_dir, ARCHIVO_MANIFIESTO), manifiesto)
+    except Exception as e:
+        return (False, str(e))
+    return (True, None)
+
+# -------------------------
+# VOLCADO EN PARTES (dividir_mb / dividir_sentencias + manifiesto)
+# -------------------------
+# La salida de un mysqldump se reparte en carpeta/parte_0001.sql[.gz], ...:
+# cada parte se cierra al pasar `dividir_mb` MB de SQL o `dividir_sentencias`
+# sentencias, siempre al terminar una sentencia, y se comprime por separado.
+# manifest.json (tipo "partes") guarda tamaño y sha256 de cada parte. Las
+# partes comparten el estado de sesión de la cabecera del volcado, así que
+# se restauran en orden como un único flujo (ver LectorPartes).
+PATRON_PARTE = "parte_{:04d}.sql"
+
+def limites_partes(datos):
+    """{"bytes", "sentencias"} según el job, o None si la salida no se divide."""
+    mb = datos.get("dividir_mb") or 0
+    sentencias = datos.get("dividir_sentencias") or 0
+    if mb <= 0 and sentencias <= 0:
+        return None
+    return {"bytes": mb * 1048576 if mb > 0 else None, "sentencias": sentencias if sentencias > 0 else None}
+
+def sha256_archivo(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+class EscritorPorPartes(io.RawIOBase):
+    """
+    Recibe el SQL en bloques y lo reparte en partes. Solo corta después de
+    una línea terminada en ";" y nunca dentro de un bloque DELIMITER (triggers
+    y rutinas). Al cerrarse, `partes` tiene archivo, bytes, sentencias y sha256.
+    """
+
+    def __init__(self, carpeta, limites, compresion=None, nivel=None, hilos=1):
+        self.carpeta = carpeta
+        self.limites = limites
+        self.compresion = compresion
+        self.nivel = nivel
+        self.hilos = hilos
+        self.partes = []
+        self.delimitador = b";"
+        self.fin_sentencia = None
+        self.resto = b""
+        self.pila = None
+        self.salida = None
+        self.hash_sql = None
+        self.hash_archivo = None
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        datos = self.resto + bytes(b)
+        if self.fin_sentencia is None:
+            # mysqldump escribe \r\n en la consola de Windows.
+            self.fin_sentencia = b";\r\n" if b"\r\n" in datos else b";\n"
+        fin = datos.rfind(b"\n") + 1
+        self.resto = datos[fin:]
+        if fin:
+            self.escribir_lineas(datos[:fin])
+        return len(b)
+
+    def escribir_lineas(self, datos):
+        if b"DELIMITER" not in datos:
+            self.escribir_segun_delimitador(datos)
+            return
+        for linea in datos.splitlines(keepends=True):
+            if linea.startswith(b"DELIMITER"):
+                campos = linea.split()
+                self.delimitador = campos[1] if len(campos) > 1 else b";"
+                self.escribir_en_parte(linea, 0)
+            else:
+                self.escribir_segun_delimitador(linea)
+
+    def escribir_segun_delimitador(self, datos):
+        if self.delimitador != b";":
+            self.escribir_en_parte(datos, datos.count(self.delimitador + self.fin_sentencia[1:]))
+            return
+        while datos:
+            corte = self.corte(datos)
+            if corte is None:
+                self.escribir_en_parte(datos, datos.count(self.fin_sentencia))
+                return
+            if corte:
+                self.escribir_en_parte(datos[:corte], datos.count(self.fin_sentencia, 0, corte))
+            self.cerrar_parte()
+            datos = datos[corte:]
+
+    def corte(self, datos):
+        """
+        Posición después de la sentencia que completa la parte actual, 0 si
+        la parte ya está llena, o None si `datos` entra entero.
+        """
+        fin = self.fin_sentencia
+        parte = self.partes[-1] if self.salida is not None else {"bytes_sql": 0, "sentencias": 0}
+        cortes = []
+        if self.limites.get("bytes"):
+            falta = self.limites["bytes"] - parte["bytes_sql"]
+            if len(datos) >= falta:
+                pos = datos.find(fin, max(0, falta - len(fin)))
+                if pos >= 0:
+                    cortes.append(pos + len(fin))
+        if self.limites.get("sentencias"):
+            falta = self.limites["sentencias"] - parte["sentencias"]
+            if falta <= 0:
+                # Un bloque DELIMITER ya llenó la parte: datos empieza en una sentencia nueva.
+                return 0
+            if datos.count(fin) >= falta:
+                pos = -len(fin)
+                for _ in range(falta):
+                    pos = datos.find(fin, pos + len(fin))
+                cortes.append(pos + len(fin))
+        return min(cortes) if cortes else None
+
+    def abrir_parte(self):
+        nombre = PATRON_PARTE.format(len(self.partes) + 1)
+        ruta = ruta_comprimida(os.path.join(self.carpeta, nombre), self.compresion)
+        self.pila = contextlib.ExitStack()
+        self.hash_archivo = hashlib.sha256()
+        if self.compresion:
+            self.salida = abrir_salida_comprimida(self.pila, ruta, self.compresion, nombre,
+                                                  nivel=self.nivel, hilos=self.hilos, suma=self.hash_archivo)
+        else:
+            self.salida = self.pila.enter_context(ArchivoConSuma(ruta, self.hash_archivo))
+        self.hash_sql = hashlib.sha256()
+        self.partes.append({"archivo": os.path.basename(ruta), "bytes_sql": 0, "sentencias": 0})
+
+    def escribir_en_parte(self, datos, sentencias):
+        if self.salida is None:
+            self.abrir_parte()
+        self.salida.write(datos)
+        self.hash_sql.update(datos)
+        parte = self.partes[-1]
+        parte["bytes_sql"] += len(datos)
+        parte["sentencias"] += sentencias
+
+    def cerrar_parte(self):
+        if self.pila is None:
+            return
+        pila, self.pila, self.salida = self.pila, None, None
+        pila.close()
+        parte = self.partes[-1]
+        ruta = os.path.join(self.carpeta, parte["archivo"])
+        parte["bytes"] = os.path.getsize(ruta)
+        parte["sha256"] = self.hash_archivo.hexdigest()
+        parte["sha256_sql"] = self.hash_sql.hexdigest()
+
+    def close(self):
+        if not self.closed:
+            try:
+                if self.resto:
+                    self.escribir_en_parte(self.resto, 0)
+                    self.resto = b""
+                self.cerrar_parte()
+            finally:
+                super().close()
+
+def volcar_por_partes(comando, carpeta, limites, compresion=None, medidor=None, nivel=None, hilos=1,
+                      integridad=None):
+    """Vuelca la salida de `comando` en partes dentro de `carpeta` y escribe su manifest.json."""
+    inicio = time.time()
+    proceso = None
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        with tempfile.TemporaryFile() as errores:
+            with EscritorPorPartes(carpeta, limites, compresion, nivel=nivel, hilos=hilos) as salida:
+                proceso = lanzar_volcado(comando, errores)
+                cola = copiar_salida_dump(proceso, salida.write, medidor)
+                returncode = proceso.wait()
+
+            error = errores_volcado(returncode, errores, comando, cola)
+            if error:
+                shutil.rmtree(carpeta, ignore_errors=True)
+                return (False, error)
+
+        manifiesto = {
+            "version": 1,
+            "tipo": "partes",
+            "fecha": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "compresion": compresion,
+            "limites": limites,
+            "bytes_sql": sum(p["bytes_sql"] for p in salida.partes),
+            "segundos": round(time.time() - inicio, 3),
+            "partes": salida.partes
+        }
+        escribir_json_atomico(os.path.join(carpeta, ARCHIVO_MANIFIESTO), manifiesto)
+        if integridad is not None:
+            integridad["sha256"] = sha256_archivo(os.path.join(carpeta, ARCHIVO_MANIFIESTO))
+        return (True, None)
+    except Exception as e:
+        if proceso is not None and proceso.poll() is None:
+            proceso.kill()
+            proceso.wait()
+        shutil.rmtree(carpeta, ignore_errors=True)
+        return (False, str(e))
+
+def leer_manifiesto(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def es_manifiesto_partes(path):
+    if os.path.basename(path).lower() != ARCHIVO_MANIFIESTO:
+        return False
+    try:
+        return leer_manifiesto(path).get("tipo") == "partes"
+    except Exception:
+        return False
+
+class LectorPartes(io.RawIOBase):
+    """Archivo de solo lectura con el SQL de todas las partes en orden; verifica el sha256 de cada una."""
+
+    def __init__(self, path):
+        self.carpeta = os.path.dirname(path)
+        self.pendientes = iter(leer_manifiesto(path).get("partes", []))
+        self.parte = None
+        self.pila = None
+        self.actual = None
+        self.hash_sql = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        while True:
+            if self.actual is None:
+                self.parte = next(self.pendientes, None)
+                if self.parte is None:
+                    return 0
+                self.pila = contextlib.ExitStack()
+                self.actual = abrir_lectura_backup(self.pila, os.path.join(self.carpeta, self.parte["archivo"]))
+                self.hash_sql = hashlib.sha256()
+            n = self.actual.readinto(destino)
+            if n:
+                self.hash_sql.update(memoryview(destino)[:n])
+                return n
+            self.cerrar_actual()
+            esperado = self.parte.get("sha256_sql")
+            if esperado and self.hash_sql.hexdigest() != esperado:
+                raise ValueError(f"{self.parte['archivo']}: el contenido no coincide con el sha256 del manifiesto.")
+
+    def cerrar_actual(self):
+        if self.pila is not None:
+            self.pila.close()
+        self.pila = None
+        self.actual = None
+
+    def close(self):
+        self.cerrar_actual()
+        super().close()
+
+# -------------------------
+# MOTOR NATIVO (volcado con pymysql y conexiones reutilizadas, motor = nativo)
+# -------------------------
+# Con `motor = nativo` en el job el volcado no lanza mysqldump.exe: lee las
+# filas con cursores del lado del servidor (SSCursor) en lotes y arma
+# INSERT de varias filas con el mismo formato que mysqldump, así que la
+# restauración, el volcado en partes y la restauración paralela lo tratan
+# igual. Las conexiones quedan en un pool por (servidor, usuario) y se
+# reutilizan entre tablas, bases y jobs del mismo proceso.
+# Siempre lee dentro de START TRANSACTION WITH CONSISTENT SNAPSHOT (como
+# --single-transaction); los incrementales siguen usando mysqldump porque
+# necesitan las coordenadas del binlog.
+MOTORES_VOLCADO = ("mysqldump", "nativo")
+MAX_CONEXIONES_LIBRES = 8
+INACTIVIDAD_MAXIMA_CONEXION_S = 300
+FILAS_POR_LOTE = 1000
+TAMANO_INSERT_NATIVO = 1024 * 1024
+NET_WRITE_TIMEOUT_NATIVO_S = 600
+# FIELD_TYPE de MySQL que se escriben sin comillas: DECIMAL, TINY, SHORT,
+# LONG, FLOAT, DOUBLE, LONGLONG, INT24, YEAR y NEWDECIMAL.
+TIPOS_NUMERICOS = {0, 1, 2, 3, 4, 5, 8, 9, 13, 246}
+ESCAPES_SQL = str.maketrans({"\0": "\\0", "\n": "\\n", "\r": "\\r", "\\": "\\\\", "'": "\\'", '"': '\\"',
+                             "\x1a": "\\Z"})
+
+CABECERA_NATIVA = """-- MySQL dump (motor nativo de backup_app)
+--
+-- Host: {host}    Database: {bd}
+-- ------------------------------------------------------
+-- Server version\t{version}
+
+/*!40101 SET @OLD_CHARACTER_SET_CLIENT=@@CHARACTER_SET_CLIENT */;
+/*!40101 SET @OLD_CHARACTER_SET_RESULTS=@@CHARACTER_SET_RESULTS */;
+/*!40101 SET @OLD_COLLATION_CONNECTION=@@COLLATION_CONNECTION */;
+/*!40101 SET NAMES utf8mb4 */;
+/*!40103 SET @OLD_TIME_ZONE=@@TIME_ZONE */;
+/*!40103 SET TIME_ZONE='+00:00' */;
+/*!40014 SET @OLD_UNIQUE_CHECKS=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0 */;
+/*!40014 SET @OLD_FOREIGN_KEY_CHECKS=@@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS=0 */;
+/*!40101 SET @OLD_SQL_MODE=@@SQL_MODE, SQL_MODE='NO_AUTO_VALUE_ON_ZERO' */;
+/*!40111 SET @OLD_SQL_NOTES=@@SQL_NOTES, SQL_NOTES=0 */;
+"""
+
+PIE_NATIVO = """
+/*!40103 SET TIME_ZONE=@OLD_TIME_ZONE */;
+/*!40101 SET SQL_MODE=@OLD_SQL_MODE */;
+/*!40014 SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS */;
+/*!40014 SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS */;
+/*!40101 SET CHARACTER_SET_CLIENT=@OLD_CHARACTER_SET_CLIENT */;
+/*!40101 SET CHARACTER_SET_RESULTS=@OLD_CHARACTER_SET_RESULTS */;
+/*!40101 SET COLLATION_CONNECTION=@OLD_COLLATION_CONNECTION */;
+/*!40111 SET SQL_NOTES=@OLD_SQL_NOTES */;
+
+-- Dump completed on {fecha}
+"""
+
+_pool_conexiones = {}
+_lock_pool = threading.Lock()
+estado_pool = {"cierre_registrado": False}
+
+def motor_nativo_disponible():
+    return pymysql is not None
+
+def mensaje_motor_nativo_no_disponible():
+    return "El motor nativo necesita el paquete 'pymysql' (pip install pymysql)."
+
+def motores_disponibles():
+    return [m for m in MOTORES_VOLCADO if m != "nativo" or motor_nativo_disponible()]
+
+def clave_conexion(usuario, contrasena, servidor):
+    host, puerto = servidor or ("localhost", 3306)
+    return (host, int(puerto), usuario, contrasena or "")
+
+def abrir_conexion_nativa(clave):
+    host, puerto, usuario, contrasena = clave
+    # Sin decodificadores: los valores llegan como texto (o bytes si son
+    # binarios) y se escriben tal cual, sin pasar por datetime/Decimal.
+    conv = {k: v for k, v in pymysql.converters.conversions.items() if not isinstance(k, int)}
+    # MULTI_STATEMENTS: consultar_nativo acepta "SET ...; SELECT ..." como el cliente mysql.
+    return pymysql.connect(host=host, port=puerto, user=usuario, password=contrasena, charset="utf8mb4",
+                           autocommit=True, conv=conv, connect_timeout=15,
+                           client_flag=pymysql.constants.CLIENT.MULTI_STATEMENTS)
+
+def tomar_conexion(usuario, contrasena, servidor=None):
+    """Conexión libre del pool para ese servidor y usuario, o una nueva."""
+    clave = clave_conexion(usuario, contrasena, servidor)
+    while True:
+        with _lock_pool:
+            libres = _pool_conexiones.get(clave) or []
+            conexion, desde = libres.pop() if libres else (None, None)
+        if conexion is None:
+            registrar_cierre_pool()
+            conexion = abrir_conexion_nativa(clave)
+            break
+        if time.monotonic() - desde <= INACTIVIDAD_MAXIMA_CONEXION_S:
+            try:
+                conexion.ping(reconnect=False)
+                break
+            except Exception:
+                pass
+        cerrar_conexion(conexion)
+    conexion.clave_pool = clave
+    return conexion
+
+def devolver_conexion(conexion):
+    with _lock_pool:
+        libres = _pool_conexiones.setdefault(conexion.clave_pool, [])
+        if len(libres) < MAX_CONEXIONES_LIBRES:
+            libres.append((conexion, time.monotonic()))
+            return
+    cerrar_conexion(conexion)
+
+def cerrar_conexion(conexion):
+    try:
+        conexion.close()
+    except Exception:
+        pass
+
+def registrar_cierre_pool():
+    # Al salir del proceso las conexiones libres se cierran con COM_QUIT en
+    # vez de cortar el socket (el servidor no suma Aborted_clients).
+    with _lock_pool:
+        if estado_pool["cierre_registrado"]:
+            return
+        estado_pool["cierre_registrado"] = True
+    atexit.register(cerrar_pool_conexiones)
+
+def cerrar_pool_conexiones():
+    with _lock_pool:
+        libres = [c for lista in _pool_conexiones.values() for c, _ in lista]
+        _pool_conexiones.clear()
+    for conexion in libres:
+        cerrar_conexion(conexion)
+
+@contextlib.contextmanager
+def conexion_nativa(usuario, contrasena, servidor=None):
+    """
+    Presta una conexión del pool. Vuelve al pool si el bloque termina bien;
+    si falla (o se corta a mitad de un SSCursor) se cierra.
+    """
+    conexion = tomar_conexion(usuario, contrasena, servidor)
+    try:
+        yield conexion
+    except BaseException:
+        cerrar_conexion(conexion)
+        raise
+    devolver_conexion(conexion)
+
+def texto_columna(valor):
+    if valor is None:
+        return "NULL"
+    if isinstance(valor, bytes):
+        return valor.decode("utf-8", errors="replace")
+    return str(valor)
+
+def consultar_nativo(usuario, contrasena, sql, bd=None):
+    """Como consultar_mysql pero por una conexión del pool: (True, filas de texto) o (False, error)."""
+    if not motor_nativo_disponible():
+        return (False, mensaje_motor_nativo_no_disponible())
+    try:
+        with conexion_nativa(usuario, contrasena, servidor_actual()) as conexion:
+            if bd:
+                conexion.select_db(bd)
+            with conexion.cursor() as cursor:
+                cursor.execute(sql)
+                filas = list(cursor.fetchall())
+                while cursor.nextset():
+                    filas += cursor.fetchall()
+        return (True, [[texto_columna(v) for v in fila] for fila in filas])
+    except Exception as e:
+        return (False, str(e))
+
+def bloqueo_lectura_nativo(usuario, contrasena):
+    """FLUSH TABLES WITH READ LOCK en una conexión del pool (ver abrir_bloqueo_lectura_global)."""
+    if not motor_nativo_disponible():
+        return (False, mensaje_motor_nativo_no_disponible())
+    try:
+        conexion = tomar_conexion(usuario, contrasena, servidor_actual())
+    except Exception as e:
+        return (False, str(e))
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute("FLUSH TABLES WITH READ LOCK")
+        return (True, conexion)
+    except Exception as e:
+        cerrar_conexion(conexion)
+        return (False, str(e))
+
+def soltar_bloqueo_nativo(conexion):
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute("UNLOCK TABLES")
+        devolver_conexion(conexion)
+    except Exception:
+        cerrar_conexion(conexion)
+
+def abrir_snapshot_nativo(conexion):
+    with conexion.cursor() as cursor:
+        cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        cursor.execute(f"SET SESSION time_zone = '+00:00', SESSION net_write_timeout = {NET_WRITE_TIMEOUT_NATIVO_S}")
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+
+def abrir_snapshots_nativos(usuario, contrasena, cantidad):
+    """
+    Cola con `cantidad` conexiones del pool, cada una con su snapshot abierto.
+    Se llama con el bloqueo de lectura global tomado: todas ven el mismo estado.
+    """
+    snapshots = queue.Queue()
+    try:
+        for _ in range(cantidad):
+            conexion = tomar_conexion(usuario, contrasena, servidor_actual())
+            snapshots.put(conexion)
+            abrir_snapshot_nativo(conexion)
+    except Exception:
+        cerrar_snapshots_nativos(snapshots)
+        raise
+    return snapshots
+
+def cerrar_snapshots_nativos(snapshots):
+    while not snapshots.empty():
+        conexion = snapshots.get()
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute("COMMIT")
+            devolver_conexion(conexion)
+        except Exception:
+            cerrar_conexion(conexion)
+
+def volcado_nativo(usuario, contrasena, bd, tablas=None, conexion=None):
+    """
+    Especificación de un volcado del motor nativo; se usa en lugar del
+    comando de mysqldump. Con `conexion` (ver abrir_snapshots_nativos) se lee
+    en su snapshot ya abierto en vez de tomar una conexión del pool.
+    """
+    if isinstance(tablas, str):
+        tablas = tablas.split()
+    return {"motor": "nativo", "usuario": usuario, "contrasena": contrasena, "bd": bd,
+            "tablas": list(tablas or []), "servidor": servidor_actual(), "conexion": conexion}
+
+def es_volcado_nativo(comando):
+    return isinstance(comando, dict) and comando.get("motor") == "nativo"
+
+def lanzar_volcado(comando, errores):
+    """Lanza mysqldump, o el motor nativo si `comando` viene de volcado_nativo; stdout da el SQL."""
+    if not es_volcado_nativo(comando):
+        return lanzar_proceso(comando, stdout=subprocess.PIPE, stderr=errores)
+    proceso = ProcesoNativo(comando, errores)
+    trabajo = trabajo_actual()
+    if trabajo is not None:
+        with trabajo["lock"]:
+            if trabajo["cancelado"]:
+                raise RuntimeError("Trabajo cancelado.")
+            trabajo["procesos"].append(proceso)
+    return proceso
+
+def numero_sql(valor):
+    return "NULL" if valor is None else valor
+
+def texto_sql(valor):
+    if valor is None:
+        return "NULL"
+    if isinstance(valor, str):
+        return "'" + valor.translate(ESCAPES_SQL) + "'"
+    # Binarios en hexadecimal, como mysqldump --hex-blob.
+    return "0x" + valor.hex() if valor else "''"
+
+def ordenar_vistas(creates):
+    """Ordena {vista: CREATE VIEW} para que cada vista vaya después de las vistas que usa."""
+    pendientes = dict(creates)
+    orden = []
+    while pendientes:
+        listas = [v for v, sql in pendientes.items()
+                  if not any(identificador_sql(o) in sql for o in pendientes if o != v)]
+        # Con referencias circulares se agregan como están.
+        for v in listas or list(pendientes):
+            orden.append(v)
+            del pendientes[v]
+    return orden
+
+def sentencias_volcado_nativo(volcado, debe_parar):
+    conexion = volcado.get("conexion")
+    if conexion is not None:
+        try:
+            yield from _sentencias_volcado_nativo(conexion, volcado, debe_parar)
+        except BaseException:
+            # Cortada a mitad de un SSCursor no sirve más: quien la use después falla enseguida.
+            cerrar_conexion(conexion)
+            raise
+        return
+    with conexion_nativa(volcado["usuario"], volcado["contrasena"], volcado["servidor"]) as conexion:
+        abrir_snapshot_nativo(conexion)
+        yield from _sentencias_volcado_nativo(conexion, volcado, debe_parar)
+        with conexion.cursor() as cursor:
+            cursor.execute("COMMIT")
+
+def _sentencias_volcado_nativo(conexion, volcado, debe_parar):
+    bd = volcado["bd"]
+    cursor = conexion.cursor()
+    cursor.execute("SELECT VERSION()")
+    version = cursor.fetchone()[0]
+    yield CABECERA_NATIVA.format(host=conexion.host, bd=bd, version=version)
+
+    cursor.execute(f"SHOW FULL TABLES FROM {identificador_sql(bd)}")
+    tipos = dict(cursor.fetchall())
+    if volcado["tablas"]:
+        faltan = [t for t in volcado["tablas"] if t not in tipos]
+        if faltan:
+            raise RuntimeError(f"No existen en {bd}: {', '.join(faltan)}")
+        nombres = volcado["tablas"]
+    else:
+        nombres = sorted(tipos)
+    tablas = [t for t in nombres if tipos[t] != "VIEW"]
+    vistas = [t for t in nombres if tipos[t] == "VIEW"]
+
+    triggers = collections.defaultdict(list)
+    if tablas:
+        cursor.execute(f"SHOW TRIGGERS FROM {identificador_sql(bd)}")
+        for fila in cursor.fetchall():
+            triggers[fila[2]].append(fila[0])
+
+    for tabla in tablas:
+        if debe_parar():
+            raise RuntimeError("Trabajo cancelado.")
+        yield from sentencias_tabla_nativa(conexion, bd, tabla, triggers.get(tabla, []), debe_parar)
+
+    creates = {}
+    for vista in vistas:
+        cursor.execute(f"SHOW CREATE VIEW {identificador_sql(bd)}.{identificador_sql(vista)}")
+        creates[vista] = cursor.fetchone()[1]
+    for vista in ordenar_vistas(creates):
+        ident = identificador_sql(vista)
+        yield (f"\n--\n-- Final view structure for view {ident}\n--\n\n"
+               f"DROP TABLE IF EXISTS {ident};\nDROP VIEW IF EXISTS {ident};\n{creates[vista]};\n")
+
+    cursor.close()
+    yield PIE_NATIVO.format(fecha=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+def sentencias_tabla_nativa(conexion, bd, tabla, triggers, debe_parar):
+    ident = identificador_sql(tabla)
+    completo = f"{identificador_sql(bd)}.{ident}"
+    cursor = conexion.cursor()
+    cursor.execute(f"SHOW CREATE TABLE {completo}")
+    create = cursor.fetchone()[1]
+    yield f"\n--\n-- Table structure for table {ident}\n--\n\nDROP TABLE IF EXISTS {ident};\n{create};\n"
+
+    # Las columnas generadas no admiten valores en el INSERT.
+    cursor.execute("SELECT COLUMN_NAME, EXTRA FROM information_schema.COLUMNS "
+                   "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION", (bd, tabla))
+    columnas = cursor.fetchall()
+    guardadas = [c for c, extra in columnas
+                 if not re.search(r"\b(VIRTUAL|STORED) GENERATED\b", extra or "", re.I)]
+    if len(guardadas) < len(columnas):
+        lista = ",".join(identificador_sql(c) for c in guardadas)
+        prefijo = f"INSERT INTO {ident} ({lista}) VALUES "
+    else:
+        lista = "*"
+        prefijo = f"INSERT INTO {ident} VALUES "
+
+    yield (f"\n--\n-- Dumping data for table {ident}\n--\n\n"
+           f"LOCK TABLES {ident} WRITE;\n/*!40000 ALTER TABLE {ident} DISABLE KEYS */;\n")
+    lector = conexion.cursor(pymysql.cursors.SSCursor)
+    lector.execute(f"SELECT {lista} FROM {completo}")
+    conversores = [numero_sql if d[1] in TIPOS_NUMERICOS else texto_sql for d in lector.description]
+    filas_insert = []
+    tamano = 0
+    while True:
+        filas = lector.fetchmany(FILAS_POR_LOTE)
+        if not filas:
+            break
+        if debe_parar():
+            raise RuntimeError("Trabajo cancelado.")
+        for fila in filas:
+            valores = "(" + ",".join([convertir(v) for convertir, v in zip(conversores, fila)]) + ")"
+            if filas_insert and tamano + len(valores) > TAMANO_INSERT_NATIVO:
+                yield prefijo + ",".join(filas_insert) + ";\n"
+                filas_insert = []
+                tamano = 0
+            filas_insert.append(valores)
+            tamano += len(valores) + 1
+    if filas_insert:
+        yield prefijo + ",".join(filas_insert) + ";\n"
+    lector.close()
+    yield f"/*!40000 ALTER TABLE {ident} ENABLE KEYS */;\nUNLOCK TABLES;\n"
+
+    for trigger in triggers:
+        cursor.execute(f"SHOW CREATE TRIGGER {identificador_sql(bd)}.{identificador_sql(trigger)}")
+        yield f"DELIMITER ;;\n{cursor.fetchone()[2]} ;;\nDELIMITER ;\n"
+    cursor.close()
+
+def agrupar_en_bloques(piezas, tamano=TAMANO_BLOQUE):
+    """Junta las piezas de texto del volcado en bloques de bytes de ~`tamano`."""
+    buffer = []
+    acumulado = 0
+    for pieza in piezas:
+        buffer.append(pieza)
+        acumulado += len(pieza)
+        if acumulado >= tamano:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            acumulado = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+class SalidaNativa(io.RawIOBase):
+    """stdout de ProcesoNativo: entrega los bloques generados a medida que se leen."""
+
+    def __init__(self, proceso):
+        self.proceso = proceso
+        self.pendiente = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self.pendiente:
+            bloque = self.proceso.siguiente_bloque()
+            if bloque is None:
+                return 0
+            self.pendiente = memoryview(bloque)
+        n = min(len(b), len(self.pendiente))
+        b[:n] = self.pendiente[:n]
+        self.pendiente = self.pendiente[n:]
+        return n
+
+class ProcesoNativo:
+    """
+    Volcado del motor nativo con la parte de subprocess.Popen que usan los
+    destinos del volcado (stdout, poll, wait, terminate, kill). El SQL se
+    genera al leer stdout, en el hilo que lo consume; los errores van a
+    `errores` como el stderr de mysqldump.
+    """
+
+    def __init__(self, volcado, errores):
+        self.errores = errores
+        self.returncode = None
+        self.cancelado = False
+        self.bloques = agrupar_en_bloques(sentencias_volcado_nativo(volcado, lambda: self.cancelado))
+        self.stdout = io.BufferedReader(SalidaNativa(self), TAMANO_BLOQUE)
+
+    def siguiente_bloque(self):
+        if self.returncode is not None:
+            return None
+        try:
+            return next(self.bloques)
+        except StopIteration:
+            self.returncode = 0
+        except Exception as e:
+            self.errores.write(f"{e}\n".encode("utf-8", errors="replace"))
+            self.returncode = 1
+        return None
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if self.returncode is None:
+            # Quien leía dejó de hacerlo antes del final: el volcado no está completo.
+            self.kill()
+        return self.returncode
+
+    def terminate(self):
+        # Puede llamarse desde otro hilo (cancelar_trabajo): el generador lo ve en el próximo lote.
+        self.cancelado = True
+
+    def kill(self):
+        self.cancelado = True
+        if self.returncode is None:
+            self.bloques.close()
+            self.returncode = -9
+
+# -------------------------
+# RESTAURACIÓN DE SQL
+# -------------------------
+def ejecutar_mysql_restore(usuario, contrasena, bd, sql_path, progreso=None):
+    """
+    Restaura un .sql o cualquier formato de CODECS / .dedup. Los comprimidos se descomprimen en
+    bloques de TAMANO_BLOQUE directo al stdin del cliente, sin extraerlos a
+    disco. `progreso(estado)` recibe bytes, MB/s, ETA y tabla actual (ver
+    estado_medidor); el total es None si el tamaño descomprimido no se conoce.
+    """
+    mysql_exe = obtener_ejecutable_seguro("mysql.exe")
+    if not mysql_exe:
+        return (False, mensaje_no_encontrado("mysql"))
+
+    comando = construir_comando_mysql(mysql_exe, usuario, contrasena, bd)
+    medidor = medidor_si_corresponde("restauración", progreso, lambda: (tamano_descomprimido(sql_path), {}))
+
+    def bloques():
+        with contextlib.ExitStack() as pila:
+            f = abrir_lectura_backup(pila, sql_path)
+            yield from contar_bloques(iter(lambda: f.read(TAMANO_BLOQUE), b""), medidor)
+
+    try:
+        ok, err, _ = cargar_en_cliente(comando, bloques())
+        return (ok, err)
+    except Exception as e:
+        return (False, str(e))
+    finally:
+        cerrar_medidor(medidor)
+
+def tamano_descomprimido(path):
+    try:
+        minus = path.lower()
+        if minus.endswith(".zip"):
+            with zipfile.ZipFile(path) as zf:
+                return sum(i.file_size for i in zf.infolist())
+        if minus.endswith((".gz", ".bz2", ".xz", ".lz4", ".zst")):
+            return None
+        if minus.endswith(EXTENSION_DEDUP):
+            return leer_manifiesto_dedup(path)["bytes"]
+        if os.path.basename(minus) == ARCHIVO_MANIFIESTO:
+            manifiesto = leer_manifiesto(path)
+            return manifiesto["bytes_sql"] if manifiesto.get("tipo") == "partes" else None
+        return os.path.getsize(path)
+    except Exception:
+        return None
+
+# -------------------------
+# RESTAURACIÓN PARALELA (un cliente mysql por tabla)
+# -------------------------
+PREFIJO_CARGA_RAPIDA = b"SET FOREIGN_KEY_CHECKS=0;\nSET UNIQUE_CHECKS=0;\n"
+SUFIJO_CARGA_RAPIDA = b"SET UNIQUE_CHECKS=1;\nSET FOREIGN_KEY_CHECKS=1;\n"
+PREFIJOS_INDICE_SECUNDARIO = (b"KEY ", b"UNIQUE KEY ", b"FULLTEXT KEY ", b"SPATIAL KEY ")
+
+def abrir_lectura_backup(pila, path):
+    """
+    Abre un backup (.sql, .zip, .gz, .bz2, .xz, .lz4, .zst, .dedup o manifest.json
+    de un volcado en partes) dentro de `pila`
+    (contextlib.ExitStack) y retorna un archivo binario con el SQL plano.
+    """
+    minus = path.lower()
+    if minus.endswith(EXTENSION_DEDUP):
+        return pila.enter_context(io.BufferedReader(LectorDedup(path), TAMANO_BLOQUE))
+    if es_manifiesto_partes(path):
+        return pila.enter_context(io.BufferedReader(LectorPartes(path), TAMANO_BLOQUE))
+    if minus.endswith(".zip"):
+        zf = pila.enter_context(zipfile.ZipFile(path))
+        nombres = [n for n in zf.namelist() if not n.endswith("/")]
+        if not nombres:
+            raise ValueError(f"{path} no contiene archivos.")
+        return pila.enter_context(zf.open(nombres[0]))
+    if minus.endswith(".gz"):
+        return pila.enter_context(gzip.open(path, "rb"))
+    if minus.endswith(".bz2"):
+        return pila.enter_context(bz2.open(path, "rb"))
+    if minus.endswith(".xz"):
+        return pila.enter_context(lzma.open(path, "rb"))
+    if minus.endswith(".lz4"):
+        if lz4_frame is None:
+            raise RuntimeError("Compresión lz4 no disponible (instalá el paquete 'lz4').")
+        return pila.enter_context(lz4_frame.open(path, "rb"))
+    if minus.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Compresión zstd no disponible (instalá el paquete 'zstandard').")
+        f = pila.enter_context(open(path, "rb"))
+        return pila.enter_context(io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(f)))
+    return pila.enter_context(open(path, "rb"))
+
+def diferir_indices_create(lineas_create):
+    """
+    Recibe las líneas de un CREATE TABLE y retorna (lineas_sin_indices, alter)
+    quitando los índices secundarios para crearlos con un único ALTER TABLE
+    después de la carga. Las tablas con claves foráneas no se tocan, y un
+    índice que empieza por la columna AUTO_INCREMENT queda en el CREATE
+    (MySQL no acepta la columna sin índice).
+    """
+    if any(b"FOREIGN KEY" in l for l in lineas_create):
+        return lineas_create, None
+    m = re.match(rb"\s*CREATE TABLE\s+(`[^`]+`)", lineas_create[0])
+    cierre = max((i for i, l in enumerate(lineas_create) if l.lstrip().startswith(b")")), default=None)
+    if not m or cierre is None:
+        return lineas_create, None
+
+    definiciones = [l.strip().rstrip(b",") for l in lineas_create[1:cierre]]
+    auto = next((re.match(rb"`(?:[^`]|``)+`", d).group(0) for d in definiciones
+                 if d.startswith(b"`") and re.search(rb"\sAUTO_INCREMENT\b", d)), None)
+    columnas, indices = [], []
+    for definicion in definiciones:
+        primera = re.search(rb"\((`(?:[^`]|``)+`)", definicion)
+        if (definicion.startswith(PREFIJOS_INDICE_SECUNDARIO)
+                and not (auto and primera and primera.group(1) == auto)):
+            indices.append(definicion)
+        else:
+            columnas.append(definicion)
+    if not indices or not columnas:
+        return lineas_create, None
+
+    fin = b"\r\n" if lineas_create[0].endswith(b"\r\n") else b"\n"
+    cuerpo = [b"  " + c + (b"," if i < len(columnas) - 1 else b"") + fin for i, c in enumerate(columnas)]
+    alter = b"ALTER TABLE " + m.group(1) + b" ADD " + b", ADD ".join(indices) + b";" + fin
+    return [lineas_create[0]] + cuerpo + lineas_create[cierre:], alter
+
+def transformar_carga_rapida(lineas, diferir_indices=True):
+    """
+    Genera el flujo a enviar al cliente mysql: desactiva chequeos de claves
+    foráneas/únicas durante la carga y, si corresponde, difiere los índices
+    secundarios al final.
+    """
+    yield PREFIJO_CARGA_RAPIDA
+    alters = []
+    create = None
+    for linea in lineas:
+        if create is not None:
+            create.append(linea)
+            if linea.rstrip().endswith(b";"):
+                nuevas, alter = diferir_indices_create(create)
+                if alter:
+                    alters.append(alter)
+                yield b"".join(nuevas)
+                create = None
+            continue
+        if diferir_indices and linea.startswith(b"CREATE TABLE"):
+            create = [linea]
+            if linea.rstrip().endswith(b";"):
+                yield linea
+                create = None
+            continue
+        yield linea
+    if create:
+        yield b"".join(create)
+    for alter in alters:
+        yield alter
+    yield SUFIJO_CARGA_RAPIDA
+
+def cargar_en_cliente(comando, bloques):
+    """Envía `bloques` (bytes) al stdin de un cliente mysql. Retorna (ok, err, bytes)."""
+    enviados = 0
+    with tempfile.TemporaryFile() as errores:
+        try:
+            proceso = lanzar_proceso(comando, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=errores)
+        except Exception as e:
+            return (False, str(e), 0)
+        try:
+            for bloque in bloques:
+                try:
+                    proceso.stdin.write(bloque)
+                except OSError:
+                    # El cliente terminó antes: su código de salida dice por qué.
+                    break
+                enviados += len(bloque)
+            try:
+                proceso.stdin.close()
+            except OSError:
+                pass
+        except Exception as e:
+            proceso.kill()
+            proceso.wait()
+            return (False, str(e), enviados)
+        returncode = proceso.wait()
+        if returncode != 0:
+            errores.seek(0)
+            return (False, errores.read().decode("utf-8", errors="replace"), enviados)
+    return (True, None, enviados)
+
+def leer_rango(path, inicio, fin):
+    with open(path, "rb") as f:
+        f.seek(inicio)
+        restante = fin - inicio
+        while restante > 0:
+            linea = f.readline(min(restante, TAMANO_BLOQUE))
+            if not linea:
+                break
+            restante -= len(linea)
+            yield linea
+
+def dividir_dump_por_tabla(sql_path):
+    """
+    Recorre un .sql de mysqldump y retorna (cabecera, secciones, final) como
+    rangos de bytes: la cabecera (SET iniciales), una sección por tabla
+    cortando en "-- Table structure for table" / CREATE TABLE, y el resto
+    (vistas, rutinas, pie) que debe cargarse al final y en serie.
+    """
+    cabecera = None
+    secciones = []
+    final = None
+    actual = None
+    actual_tiene_create = False
+    offset = 0
+    with open(sql_path, "rb") as f:
+        for linea in f:
+            es_tabla = linea.startswith(b"-- Table structure for table")
+            es_otro = linea.startswith((b"-- Temporary view structure", b"-- Temporary table structure for view",
+                                        b"-- Final view structure", b"-- Dumping routines", b"-- Dumping events"))
+            es_create = linea.startswith((b"DROP TABLE IF EXISTS", b"CREATE TABLE"))
+            if es_tabla or es_otro or (es_create and (actual is None or actual_tiene_create) and final is None):
+                if cabecera is None:
+                    cabecera = (0, offset)
+                if actual is not None and final is None:
+                    actual["fin"] = offset
+                    secciones.append(actual)
+                    actual = None
+                if es_otro and final is None:
+                    final = [offset, None]
+                elif final is None:
+                    m = re.search(rb"`([^`]+)`", linea)
+                    actual = {"tabla": m.group(1).decode("utf-8", errors="replace") if m else f"parte_{len(secciones) + 1}",
+                              "inicio": offset, "fin": None}
+                    actual_tiene_create = False
+            if linea.startswith(b"CREATE TABLE"):
+                actual_tiene_create = True
+            offset += len(linea)
+
+    if cabecera is None:
+        cabecera = (0, 0)
+    if actual is not None:
+        actual["fin"] = offset
+        secciones.append(actual)
+    if final is not None:
+        final[1] = offset
+    return cabecera, secciones, (tuple(final) if final else None)
+
+def ejecutar_mysql_restore_paralelo(usuario, contrasena, bd, path, workers=4, diferir_indices=True,
+                                    progreso=None):
+    """
+    Restaura un backup multiarchivo (manifest.json) o un .sql único dividido
+    por tabla, cargando las tablas en paralelo con `workers` clientes mysql.
+    Retorna (True, reporte) con bytes, segundos y MB/s por tabla, o (False, error).
+    `progreso(estado)` como en ejecutar_mysql_restore.
+    """
+    mysql_exe = obtener_ejecutable_seguro("mysql.exe")
+    if not mysql_exe:
+        return (False, mensaje_no_encontrado("mysql"))
+    comando = construir_comando_mysql(mysql_exe, usuario, contrasena, bd)
+
+    paralelas = []
+    serie = []
+    try:
+        if os.path.basename(path).lower() == ARCHIVO_MANIFIESTO:
+            with open(path, "r", encoding="utf-8") as f:
+                manifiesto = json.load(f)
+            carpeta = os.path.dirname(path)
+            if manifiesto.get("tipo") == "partes":
+                # Las partes comparten la sesión de la cabecera: van en orden, en un solo cliente.
+                serie.append((os.path.basename(carpeta), lambda: lineas_de_archivo(path)))
+            for entrada in manifiesto.get("tablas", []):
+                archivo = os.path.join(carpeta, entrada["archivo"])
+                parte = (entrada["tabla"], lambda a=archivo: lineas_de_archivo(a))
+                (serie if entrada.get("tipo") == "VIEW" else paralelas).append(parte)
+        elif path.lower().endswith(".sql"):
+            cabecera, secciones, final = dividir_dump_por_tabla(path)
+            for s in secciones:
+                paralelas.append((s["tabla"], lambda s=s: itertools.chain(
+                    leer_rango(path, *cabecera), leer_rango(path, s["inicio"], s["fin"]))))
+            if final:
+                serie.append(("(vistas/rutinas)", lambda: itertools.chain(
+                    leer_rango(path, *cabecera), leer_rango(path, *final))))
+        else:
+            # Un único archivo comprimido no admite saltos: se carga en serie.
+            serie.append((os.path.basename(path), lambda: lineas_de_archivo(path)))
+    except Exception as e:
+        return (False, str(e))
+
+    reporte = []
+    trabajo = trabajo_actual()
+    servidor = servidor_actual()
+    medidor = medidor_si_corresponde("restauración", progreso, lambda: (tamano_restauracion(path), {}))
+    marcar_tablas_medidor(medidor, 0, len(paralelas) + len(serie))
+
+    def cargar(parte, diferir):
+        asignar_trabajo_actual(trabajo)
+        asignar_servidor_actual(servidor)
+        nombre, abrir = parte
+        t0 = time.time()
+        ok, err, enviados = cargar_en_cliente(comando, transformar_carga_rapida(contar_bloques(abrir(), medidor), diferir))
+        segundos = time.time() - t0
+        reporte.append({
+            "tabla": nombre,
+            "bytes": enviados,
+            "segundos": round(segundos, 3),
+            "mb_s": round(enviados / 1048576 / segundos, 2) if segundos > 0 else None
+        })
+        return ok, err
+
+    errores = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+            futuros = {pool.submit(cargar, parte, diferir_indices): parte for parte in paralelas}
+            for hechas, fut in enumerate(as_completed(futuros), 1):
+                ok, err = fut.result()
+                if medidor is None:
+                    publicar_progreso(f"{hechas}/{len(paralelas)} tablas cargadas")
+                marcar_tablas_medidor(medidor, hechas, len(paralelas) + len(serie))
+                if not ok:
+                    errores.append(f"{futuros[fut][0]}: {err}")
+                    for f in futuros:
+                        f.cancel()
+        if errores:
+            return (False, "\n".join(errores))
+
+        for i, parte in enumerate(serie, 1):
+            ok, err = cargar(parte, False)
+            if not ok:
+                return (False, f"{parte[0]}: {err}")
+            marcar_tablas_medidor(medidor, len(paralelas) + i, len(paralelas) + len(serie))
+    finally:
+        cerrar_medidor(medidor)
+
+    return (True, reporte)
+
+def tamano_restauracion(path):
+    """Bytes de SQL a cargar desde un .sql, un comprimido o un manifest.json (None si no se sabe)."""
+    if os.path.basename(path).lower() != ARCHIVO_MANIFIESTO or es_manifiesto_partes(path):
+        return tamano_descomprimido(path)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifiesto = json.load(f)
+        tamanos = [tamano_descomprimido(os.path.join(os.path.dirname(path), e["archivo"]))
+                   for e in manifiesto.get("tablas", [])]
+    except Exception:
+        return None
+    return None if None in tamanos else sum(tamanos)
+
+def lineas_de_archivo(path):
+    with contextlib.ExitStack() as pila:
+        f = abrir_lectura_backup(pila, path)
+        for linea in f:
+            yield linea
+
+def formatear_reporte_restauracion(reporte, limite=15):
+    filas = sorted(reporte, key=lambda r: -r["segundos"])
+    lineas = [f"{r['tabla']}: {r['bytes'] / 1048576:.1f} MB en {r['segundos']:.1f} s"
+              + (f" ({r['mb_s']} MB/s)" if r["mb_s"] is not None else "") for r in filas[:limite]]
+    if len(filas) > limite:
+        lineas.append(f"... y {len(filas) - limite} más")
+    return "\n".join(lineas)
+
+# -------------------------
+# DETECCIÓN DE CAMBIOS POR TABLA (omitir_sin_cambios = True)
+# -------------------------
+# Antes de volcar se toma una huella barata de cada tabla: CREATE_TIME,
+# UPDATE_TIME y TABLE_ROWS de information_schema, o CHECKSUM TABLE cuando el
+# motor no informa UPDATE_TIME (InnoDB tras un reinicio). Si coincide con la
+# guardada en la copia anterior del job, la tabla no se vuelve a volcar y la
+# copia nueva apunta a la anterior en extra["tablas_desde"]. Esa copia sola
+# es parcial: restaurar_archivo_backup (restauración de la interfaz y del
+# --restaurar) carga antes las copias de las que toma tablas.
+def version_servidor(usuario, contrasena, motor=None):
+    ok, filas = consultar_mysql(usuario, contrasena, "SELECT VERSION()", motor=motor)
+    if not ok or not filas or not filas[0]:
+        return (False, None)
+    texto = filas[0][0]
+    m = re.match(r"(\d+)\.(\d+)\.(\d+)", texto)
+    return ("mariadb" in texto.lower(), tuple(int(x) for x in m.groups()) if m else None)
+
+def huellas_tablas(usuario, contrasena, bd, tablas=None, motor=None):
+    """
+    Retorna (True, {tabla: huella}) de las tablas base de `bd` (o solo de
+    `tablas`). La huella es None cuando la tabla se modificó en el último
+    segundo: así nunca coincide y la próxima corrida la vuelca.
+    """
+    sql = (
+        "SELECT TABLE_NAME, COALESCE(CREATE_TIME, ''), COALESCE(UPDATE_TIME, ''), COALESCE(TABLE_ROWS, ''), "
+        "COALESCE(UPDATE_TIME >= NOW() - INTERVAL 1 SECOND, 0) "
+        f"FROM information_schema.TABLES WHERE TABLE_SCHEMA = {literal_sql(bd)} AND TABLE_TYPE = 'BASE TABLE'"
+    )
+    es_mariadb, version = version_servidor(usuario, contrasena, motor=motor)
+    if not es_mariadb and version and version >= (8, 0, 0):
+        # MySQL 8 cachea UPDATE_TIME y TABLE_ROWS hasta 24 h por defecto.
+        sql = "SET SESSION information_schema_stats_expiry = 0; " + sql
+    ok, filas = consultar_mysql(usuario, contrasena, sql, motor=motor)
+    if not ok:
+        return (False, filas)
+
+    filtro = set(tablas) if tablas else None
+    huellas = {}
+    sin_update_time = []
+    for fila in filas:
+        if len(fila) < 5 or (filtro is not None and fila[0] not in filtro):
+            continue
+        nombre, creada, actualizada, filas_aprox, reciente = fila[:5]
+        if reciente == "1":
+            huellas[nombre] = None
+        elif actualizada:
+            huellas[nombre] = f"meta:{creada}|{actualizada}|{filas_aprox}"
+        else:
+            sin_update_time.append(nombre)
+
+    if sin_update_time:
+        lista = ", ".join(f"{identificador_sql(bd)}.{identificador_sql(t)}" for t in sin_update_time)
+        ok, filas = consultar_mysql(usuario, contrasena, f"CHECKSUM TABLE {lista}", motor=motor)
+        if not ok:
+            return (False, filas)
+        for fila in filas:
+            if len(fila) >= 2:
+                # Viene como "bd.tabla"; se quita el prefijo entero por si la base lleva puntos.
+                nombre = fila[0][len(bd) + 1:] if fila[0].startswith(bd + ".") else fila[0].split(".", 1)[-1]
+                huellas[nombre] = None if fila[1] == "NULL" else f"checksum:{fila[1]}"
+    return (True, huellas)
+
+def detectar_cambios_tablas(jobname, usuario, contrasena, bd, tablas=None, motor=None):
+    """
+    Compara las huellas actuales con las de la última copia del job. Retorna
+    (True, {"cambiadas", "sin_cambios", "huellas", "tablas_desde"}) o (False, error).
+    Con `motor` "nativo" consulta por el pool de conexiones en vez del cliente mysql.
+    """
+    ok, huellas = huellas_tablas(usuario, contrasena, bd, tablas, motor=motor)
+    if not ok:
+        return (False, huellas)
+    anterior = ultima_copia(job=jobname)
+    previas = anterior["extra"].get("huellas", {}) if anterior else {}
+    desde_previas = anterior["extra"].get("tablas_desde", {}) if anterior else {}
+
+    orden = list(tablas) if tablas else sorted(huellas)
+    cambiadas, sin_cambios, tablas_desde = [], [], {}
+    for tabla in orden:
+        huella = huellas.get(tabla)
+        if huella is not None and previas.get(tabla) == huella:
+            sin_cambios.append(tabla)
+            tablas_desde[tabla] = desde_previas.get(tabla, anterior["id"])
+        else:
+            cambiadas.append(tabla)
+    if not tablas and set(previas) != set(huellas):
+        # Se agregaron o borraron tablas: el volcado completo cambió.
+        cambiadas, sin_cambios, tablas_desde = orden, [], {}
+    return (True, {"cambiadas": cambiadas, "sin_cambios": sin_cambios,
+                   "huellas": huellas, "tablas_desde": tablas_desde})
+
+def fuentes_de_copia(copia):
+    """
+    Copias de las que `copia` toma tablas sin cambios (extra["tablas_desde"]),
+    de la más vieja a la más nueva. Retorna (True, copias) o (False, error)
+    si alguna ya no está en el catálogo o en disco.
+    """
+    ids = sorted(set(copia["extra"].get("tablas_desde", {}).values()))
+    if not ids:
+        return (True, [])
+    with contextlib.closing(conectar_catalogo()) as con:
+        fuentes = [fila_a_copia(f) for f in con.execute(
+            f"SELECT * FROM copias WHERE id IN ({', '.join('?' * len(ids))}) ORDER BY id", ids)]
+    faltan = sorted(set(ids) - {f["id"] for f in fuentes})
+    if faltan:
+        return (False, f"{copia['ruta']} toma tablas de copias que ya no están en el catálogo (ids {faltan}).")
+    for fuente in fuentes:
+        if not os.path.exists(fuente["ruta"]):
+            return (False, f"{copia['ruta']} toma tablas de {fuente['ruta']}, que ya no existe.")
+    return (True, fuentes)
+
+def restaurar_archivo_backup(usuario, contrasena, bd, ruta, workers=None, progreso=None):
+    """
+    Restaura `ruta`. Si en el catálogo es una copia parcial (tablas_desde),
+    antes restaura sus fuentes de la más vieja a la más nueva: cada volcado
+    reemplaza solo sus tablas, así que cada una queda con su último volcado.
+    Retorna el resultado de la restauración de `ruta`. Sin `workers` los
+    manifest.json se cargan con los workers por defecto y el resto de a uno.
+    """
+    copias = (consultar_copias(ruta=ruta, limite=1, descendente=True)
+              or consultar_copias(ruta=os.path.normpath(ruta), limite=1, descendente=True))
+    fuentes = []
+    if copias:
+        ok, fuentes = fuentes_de_copia(copias[0])
+        if not ok:
+            return (False, fuentes)
+    for archivo in [f["ruta"] for f in fuentes] + [ruta]:
+        if (workers or 1) > 1 or os.path.basename(archivo).lower() == ARCHIVO_MANIFIESTO:
+            ok, detalle = ejecutar_mysql_restore_paralelo(usuario, contrasena, bd, archivo, workers=workers or 4,
+                                                          progreso=progreso)
+        else:
+            ok, detalle = ejecutar_mysql_restore(usuario, contrasena, bd, archivo, progreso=progreso)
+        if not ok:
+            return (False, f"{archivo}: {detalle}" if archivo != ruta else detalle)
+    return (ok, detalle)
+
+# -------------------------
+# MÉTRICAS POR FASE (metricas.jsonl)
+# -------------------------
+# Cada ejecución de un job agrega una línea JSON con la duración y el
+# resultado de cada fase, los bytes de SQL, el tamaño final y la razón de
+# compresión. El resumen también queda en extra["metricas"] de la copia.
+ARCHIVO_METRICAS = "metricas.jsonl"
+TAMANO_MAXIMO_METRICAS = 20 * 1024 * 1024
+lock_metricas = threading.Lock()
+
+def nuevas_metricas(jobname):
+    return {
+        "job": jobname,
+        "inicio": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "ok": None,
+        "error": None,
+        "fases": []
+    }
+
+@contextlib.contextmanager
+def medir_fase(metricas, fase):
+    """Mide el bloque como una fase; el llamador puede anotar ok/bytes en el dict que recibe."""
+    registro = {"fase": fase, "ok": True}
+    t0 = time.perf_counter()
+    try:
+        yield registro
+    except Exception:
+        registro["ok"] = False
+        raise
+    finally:
+        registro["segundos"] = round(time.perf_counter() - t0, 4)
+        metricas["fases"].append(registro)
+
+def resumen_metricas(metricas):
+    resumen = {f["fase"]: f["segundos"] for f in metricas["fases"]}
+    for clave in ("bytes_sql", "bytes_archivo", "razon_compresion"):
+        if metricas.get(clave) is not None:
+            resumen[clave] = metricas[clave]
+    return resumen
+
+def escribir_metricas(metricas):
+    linea = json.dumps(metricas, ensure_ascii=False) + "\n"
+    with lock_metricas:
+        try:
+            if os.path.getsize(ARCHIVO_METRICAS) > TAMANO_MAXIMO_METRICAS:
+                os.replace(ARCHIVO_METRICAS, ARCHIVO_METRICAS + ".1")
+        except OSError:
+            pass
+        try:
+            with open(ARCHIVO_METRICAS, "a", encoding="utf-8") as f:
+                f.write(linea)
+        except OSError:
+            pass
+
+def tamano_en_disco(ruta):
+    try:
+        if os.path.isdir(ruta):
+            return sum(os.path.getsize(os.path.join(r, n)) for r, _, ns in os.walk(ruta) for n in ns)
+        if os.path.basename(ruta).lower() == ARCHIVO_MANIFIESTO:
+            return tamano_en_disco(os.path.dirname(ruta))
+        return os.path.getsize(ruta)
+    except OSError:
+        return None
+
+def leer_metricas(job=None, desde=None):
+    registros = []
+    for path in (ARCHIVO_METRICAS + ".1", ARCHIVO_METRICAS):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for linea in f:
+                    try:
+                        registro = json.loads(linea)
+                    except ValueError:
+                        continue
+                    if job and registro.get("job") != job:
+                        continue
+                    if desde and (registro.get("inicio") or "") < desde:
+                        continue
+                    registros.append(registro)
+        except OSError:
+            continue
+    return registros
+
+def percentil(valores, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not valores:
+        return None
+    indice = min(len(valores), max(1, -(-p * len(valores) // 100))) - 1
+    return valores[indice]
+
+def informe_metricas(job=None, desde=None):
+    """
+    Agrupa metricas.jsonl por job. Retorna {job: {"ejecuciones", "fallidas",
+    "total": (p50, p95), "fases": {fase: (p50, p95)}, "ultima"}}.
+    """
+    por_job = {}
+    for registro in leer_metricas(job, desde):
+        datos = por_job.setdefault(registro.get("job"), {"ejecuciones": 0, "fallidas": 0, "total": [],
+                                                         "fases": {}, "ultima": None})
+        datos["ejecuciones"] += 1
+        if not registro.get("ok"):
+            datos["fallidas"] += 1
+        datos["ultima"] = registro.get("inicio")
+        if registro.get("segundos") is not None:
+            datos["total"].append(registro["segundos"])
+        for fase in registro.get("fases", []):
+            datos["fases"].setdefault(fase["fase"], []).append(fase["segundos"])
+
+    for datos in por_job.values():
+        datos["total"] = (percentil(sorted(datos["total"]), 50), percentil(sorted(datos["total"]), 95))
+        datos["fases"] = {fase: (percentil(sorted(v), 50), percentil(sorted(v), 95))
+                          for fase, v in datos["fases"].items()}
+    return por_job
+
+def formatear_informe_metricas(informe):
+    if not informe:
+        return "Sin métricas registradas."
+    seg = lambda v: "-" if v is None else f"{v:.2f}s"
+    lineas = []
+    for job, datos in sorted(informe.items(), key=lambda x: str(x[0])):
+        p50, p95 = datos["total"]
+        lineas.append(f"{job}: {datos['ejecuciones']} ejecuciones, {datos['fallidas']} fallidas, "
+                      f"total p50 {seg(p50)} / p95 {seg(p95)} (última {datos['ultima']})")
+        for fase, (f50, f95) in datos["fases"].items():
+            lineas.append(f"    {fase:<20} p50 {seg(f50):>9}   p95 {seg(f95):>9}")
+    return "\n".join(lineas)
+
+def informe_codecs(bd=None):
+    """
+    Agrupa el catálogo por base y códec: copias, razón de compresión media y
+    MB/s medio del volcado (de extra["metricas"]), para elegir códec por base.
+    """
+    sql = "SELECT base, extra FROM copias WHERE extra LIKE '%\"compresion\"%'"
+    params = []
+    if bd:
+        sql += " AND base = ?"
+        params.append(bd)
+    grupos = {}
+    with contextlib.closing(conectar_catalogo()) as con:
+        for base, extra in con.execute(sql, params):
+            extra = json.loads(extra)
+            codec = extra["compresion"]
+            clave = (base, codec.get("codec"), codec.get("nivel"))
+            grupo = grupos.setdefault(clave, {"copias": 0, "razones": [], "velocidades": []})
+            grupo["copias"] += 1
+            if codec.get("razon"):
+                grupo["razones"].append(codec["razon"])
+            metricas = extra.get("metricas", {})
+            if metricas.get("bytes_sql") and metricas.get("volcado"):
+                grupo["velocidades"].append(metricas["bytes_sql"] / 1048576 / metricas["volcado"])
+
+    promedio = lambda v: round(sum(v) / len(v), 2) if v else None
+    return [{"base": base, "codec": codec, "nivel": nivel, "copias": g["copias"],
+             "razon": promedio(g["razones"]), "mb_s": promedio(g["velocidades"])}
+            for (base, codec, nivel), g in sorted(grupos.items(), key=lambda x: tuple(str(v) for v in x[0]))]
+
+def formatear_informe_codecs(filas):
+    if not filas:
+        return "Sin copias con datos de compresión."
+    lineas = [f"{'Base':<24} {'Códec':<8} {'Nivel':>5} {'Copias':>7} {'Razón':>7} {'MB/s':>8}"]
+    for f in filas:
+        lineas.append(f"{f['base'] or '':<24} {f['codec'] or '':<8} {'' if f['nivel'] is None else f['nivel']:>5} "
+                      f"{f['copias']:>7} {'' if f['razon'] is None else f['razon']:>7} "
+                      f"{'' if f['mb_s'] is None else f['mb_s']:>8}")
+    return "\n".join(lineas)
+
+# -------------------------
+# EJECUTAR JOB AUTOMÁTICO (Programador Windows)
+# -------------------------
+def ejecutar_job_auto(jobname, progreso=None):
+    """
+    Ejecuta el job `jobname` de config.ini. Retorna (ok, error_o_ruta).
+    `progreso(estado)` se pasa al volcado (ver estado_medidor). Las duraciones
+    de cada fase se agregan a metricas.jsonl. Los jobs con `bds` o varios
+    `servidores` se reparten entre bases (ver ejecutar_job_multiple) y los
+    de `modo = simulacro` restauran la última copia (ver ejecutar_simulacro).
+    """
+    datos = leer_job_config(jobname)
+    if datos and datos.get("modo") == "simulacro":
+        return ejecutar_midiendo(jobname, ejecutar_simulacro, datos, progreso)
+    if datos and es_job_multiple(datos):
+        return ejecutar_midiendo(jobname, ejecutar_job_multiple, datos, progreso)
+    return ejecutar_midiendo(jobname, _ejecutar_job, datos, progreso)
+
+def ejecutar_midiendo(jobname, funcion, datos, progreso, **campos):
+    """Llama funcion(jobname, metricas, progreso, datos) y agrega sus métricas a metricas.jsonl."""
+    metricas = nuevas_metricas(jobname)
+    metricas.update(campos)
+    t0 = time.perf_counter()
+    try:
+        ok, detalle = funcion(jobname, metricas, progreso, datos)
+    except Exception as e:
+        ok, detalle = (False, str(e))
+    metricas["ok"] = ok
+    if not ok:
+        metricas["error"] = detalle
+    metricas["segundos"] = round(time.perf_counter() - t0, 4)
+    escribir_metricas(metricas)
+    return (ok, detalle)
+
+def _ejecutar_job(jobname, metricas, progreso, datos):
+    if not datos:
+        return (False, f"No existe el job {jobname} en {CONFIG_FILE}.")
+    with usar_servidor(servidor_explicito(datos)):
+        return _volcar_job(jobname, datos, metricas, progreso)
+
+def motor_del_job(datos):
+    """Motor de volcado del job; los incrementales necesitan las coordenadas del binlog que escribe mysqldump."""
+    if datos.get("modo") == "incremental" and not datos.get("tablas"):
+        return "mysqldump"
+    return datos.get("motor") or "mysqldump"
+
+def comprobar_motor(metricas, motor):
+    """Fase "ejecutables": (True, None) si el motor se puede usar, o (False, error)."""
+    metricas["motor"] = motor
+    if motor not in MOTORES_VOLCADO:
+        return (False, f"Motor de volcado desconocido: {motor}")
+    with medir_fase(metricas, "ejecutables") as fase:
+        if motor == "nativo":
+            fase["ok"] = motor_nativo_disponible()
+        else:
+            fase["ok"] = bool(obtener_ejecutable_seguro("mysqldump.exe"))
+    if not fase["ok"]:
+        if motor == "nativo":
+            return (False, mensaje_motor_nativo_no_disponible())
+        return (False, mensaje_no_encontrado("mysqldump"))
+    return (True, None)
+
+def _volcar_job(jobname, datos, metricas, progreso):
+    usuario = datos.get("usuario", "")
+    contrasena = datos.get("contrasena", "")
+    bd = datos.get("bd", "")
+    destino = datos.get("destino", "") or "."
+    tablas = datos.get("tablas", []) or []
+    zip_opt = datos.get("zip", False)
+    tablas_param = tablas if tablas else None
+    compresion = datos.get("compresion") or ("zip" if zip_opt else None)
+    workers = datos.get("workers") or 1
+    incremental = datos.get("modo") == "incremental" and not tablas_param
+    nivel = datos.get("nivel_compresion")
+    hilos = datos.get("hilos_compresion") or HILOS_COMPRESION_DEFECTO
+    motor = motor_del_job(datos)
+    metricas["compresion"] = compresion
+
+    ok, err = comprobar_motor(metricas, motor)
+    if not ok:
+        return (False, err)
+
+    extra = None
+    if datos.get("omitir_sin_cambios") and not incremental:
+        with medir_fase(metricas, "deteccion_cambios") as fase:
+            ok, cambios = detectar_cambios_tablas(jobname, usuario, contrasena, bd, tablas_param, motor=motor)
+            fase["ok"] = ok
+        # Si la detección falla se vuelca igual: nunca se omite sin certeza.
+        if ok:
+            if not cambios["cambiadas"]:
+                return (True, f"Sin cambios en {bd}: {len(cambios['sin_cambios'])} tabla(s) omitidas")
+            extra = {"huellas": cambios["huellas"]}
+            if tablas_param:
+                tablas_param = cambios["cambiadas"]
+                if cambios["tablas_desde"]:
+                    extra["tablas_desde"] = cambios["tablas_desde"]
+
+    fecha = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+    if tablas_param:
+        tablas_name = "_".join(tablas_param).replace(" ", "_")
+        archivo = os.path.join(destino, f"{bd}_TABLAS_{tablas_name}_{fecha}.sql")
+    else:
+        archivo = os.path.join(destino, f"{bd}_backup_{fecha}.sql")
+
+    def progreso_job(estado):
+        metricas["bytes_sql"] = estado["bytes"]
+        if progreso:
+            progreso(estado)
+
+    if incremental:
+        with medir_fase(metricas, "incremental") as fase:
+            ok, detalle = ejecutar_job_incremental(jobname, datos, archivo, compresion, progreso=progreso_job)
+            fase["ok"] = ok
+        if ok:
+            with medir_fase(metricas, "retencion"):
+                aplicar_retencion_job(jobname, datos)
+        return (ok, detalle)
+
+    # La compresión va en streaming dentro del volcado: su costo se refleja en
+    # la fase "volcado" y en razon_compresion.
+    integridad = {}
+    with medir_fase(metricas, "volcado") as fase:
+        if workers > 1:
+            carpeta = os.path.splitext(archivo)[0]
+            ok, err = ejecutar_mysqldump_paralelo(usuario, contrasena, bd, tablas_param, carpeta,
+                                                  workers=workers, compresion=compresion, progreso=progreso_job,
+                                                  nivel=nivel, motor=motor, consistente=datos.get("consistente"))
+            archivo_result = os.path.join(carpeta, ARCHIVO_MANIFIESTO)
+        else:
+            partes = limites_partes(datos) if compresion != "dedup" else None
+            ok, err = ejecutar_mysqldump(usuario, contrasena, bd, tablas_param, archivo, compresion=compresion,
+                                         progreso=progreso_job, nivel=nivel, hilos=hilos, partes=partes,
+                                         integridad=integridad, motor=motor)
+            if partes:
+                archivo_result = os.path.join(os.path.splitext(archivo)[0], ARCHIVO_MANIFIESTO)
+            else:
+                archivo_result = ruta_comprimida(archivo, compresion)
+        fase["ok"] = ok
+        fase["bytes"] = metricas.get("bytes_sql")
+    if not ok:
+        return (False, err)
+
+    metricas["bytes_archivo"] = tamano_en_disco(archivo_result)
+    if metricas.get("bytes_sql") and metricas["bytes_archivo"]:
+        metricas["razon_compresion"] = round(metricas["bytes_sql"] / metricas["bytes_archivo"], 2)
+
+    with medir_fase(metricas, "catalogo"):
+        extra = dict(extra or {}, metricas=resumen_metricas(metricas))
+        if compresion:
+            extra["compresion"] = {
+                "codec": compresion,
+                "nivel": nivel_compresion(compresion, nivel) if compresion in CODECS else None,
+                "hilos": 1 if workers > 1 else hilos,
+                "razon": metricas.get("razon_compresion")
+            }
+        metricas["copia_id"] = agregar_copia(usuario, contrasena,
+                                             f"{bd}{'.' + ','.join(tablas_param) if tablas_param else ''}",
+                                             archivo_result, extra=extra, job=jobname,
+                                             sha256=integridad.get("sha256"))
+    with medir_fase(metricas, "retencion") as fase:
+        ok, victimas = aplicar_retencion_job(jobname, datos)
+        fase["ok"] = ok
+        fase["borradas"] = len(victimas) if ok else 0
+    return (True, archivo_result)
+
+# -------------------------
+# JOBS MÚLTIPLES (varias bases y servidores en una sola tarea)
+# -------------------------
+# Un job con `bds` (lista de bases o patrones como tenant_*) o con varios
+# `servidores` (host[:puerto]) copia cada base en un pool de `workers_bds`
+# hilos, sin más de `max_por_servidor` volcados a la vez contra un mismo
+# servidor. Cada base se registra en el catálogo y en metricas.jsonl como el
+# subjob "job/host:puerto/bd" (así su retención, detección de cambios e
+# incrementales son independientes) y el job guarda el resultado agregado.
+WORKERS_BDS_DEFECTO = 4
+MAX_POR_SERVIDOR_DEFECTO = 2
+BASES_SISTEMA = {"information_schema", "performance_schema", "mysql", "sys"}
+
+def parsear_servidor(texto, puerto=None):
+    host, _, resto = texto.strip().partition(":")
+    try:
+        puerto = int(resto) if resto else int(puerto or 3306)
+    except ValueError:
+        puerto = 3306
+    return (host or "localhost", puerto)
+
+def servidor_explicito(datos):
+    """(host, puerto) si el job indica `host`; None para el servidor local por defecto."""
+    return parsear_servidor(datos["host"], datos.get("puerto")) if datos.get("host") else None
+
+def servidores_job(datos):
+    servidores = [parsear_servidor(s, datos.get("puerto")) for s in datos.get("servidores") or [] if s.strip()]
+    return servidores or [servidor_explicito(datos)]
+
+def nombre_servidor(servidor):
+    return "localhost:3306" if servidor is None else f"{servidor[0]}:{servidor[1]}"
+
+def es_job_multiple(datos):
+    return bool([b for b in datos.get("bds") or [] if b.strip()]) or len(servidores_job(datos)) > 1
+
+def es_patron_bd(nombre):
+    return any(c in nombre for c in "*?[")
+
+def bases_de_servidor(usuario, contrasena, datos, servidor):
+    """Retorna (True, [bases]) del servidor según `bds` (nombres o patrones) o `bd`, o (False, error)."""
+    pedidas = [b.strip() for b in datos.get("bds") or [] if b.strip()] or [datos.get("bd", "")]
+    if not any(es_patron_bd(b) for b in pedidas):
+        return (True, pedidas)
+    with usar_servidor(servidor):
+        ok, filas = consultar_mysql(usuario, contrasena, "SHOW DATABASES", motor=datos.get("motor"))
+    if not ok:
+        return (False, filas)
+    existentes = [f[0] for f in filas if f and f[0] not in BASES_SISTEMA]
+    bases = []
+    for b in pedidas:
+        for nombre in (fnmatch.filter(existentes, b) if es_patron_bd(b) else [b]):
+            if nombre not in bases:
+                bases.append(nombre)
+    return (True, bases)
+
+def datos_subjob(datos, servidor, bd, carpeta_servidor):
+    sub = copiar_job(datos)
+    for clave in ("servidores", "bds", "host", "puerto"):
+        sub.pop(clave, None)
+    sub["bd"] = bd
+    if servidor is not None:
+        sub["host"], sub["puerto"] = servidor
+    if carpeta_servidor:
+        sub["destino"] = os.path.join(datos.get("destino", "") or ".",
+                                      nombre_servidor(servidor).replace(":", "_"))
+    return sub
+
+def intercalar_por_servidor(tareas):
+    """Reparte el orden entre servidores para que un servidor lleno no frene a los demás."""
+    grupos = collections.defaultdict(list)
+    for t in tareas:
+        grupos[t["servidor"]].append(t)
+    return [t for fila in itertools.zip_longest(*grupos.values()) for t in fila if t is not None]
+
+def ejecutar_job_multiple(jobname, metricas, progreso, datos):
+    usuario = datos.get("usuario", "")
+    contrasena = datos.get("contrasena", "")
+    servidores = servidores_job(datos)
+    resultados = []
+
+    ok, err = comprobar_motor(metricas, motor_del_job(datos))
+    if not ok:
+        return (False, err)
+
+    tareas = []
+    with medir_fase(metricas, "descubrimiento") as fase:
+        for servidor in servidores:
+            ok, bases = bases_de_servidor(usuario, contrasena, datos, servidor)
+            if not ok:
+                resultados.append({"servidor": nombre_servidor(servidor), "bd": None, "ok": False,
+                                   "detalle": bases.strip()})
+                continue
+            for bd in bases:
+                tareas.append({"servidor": servidor, "bd": bd,
+                               "datos": datos_subjob(datos, servidor, bd, len(servidores) > 1)})
+        fase["ok"] = not resultados
+        fase["bases"] = len(tareas)
+    if not tareas:
+        return (False, "; ".join(r["detalle"] for r in resultados) or "No hay bases que copiar.")
+
+    for t in tareas:
+        if t["datos"].get("destino"):
+            os.makedirs(t["datos"]["destino"], exist_ok=True)
+
+    max_por_servidor = datos.get("max_por_servidor") or MAX_POR_SERVIDOR_DEFECTO
+    cupos = {servidor: threading.BoundedSemaphore(max_por_servidor) for servidor in servidores}
+    trabajo = trabajo_actual()
+
+    def copiar(tarea):
+        asignar_trabajo_actual(trabajo)
+        nombre = f"{jobname}/{nombre_servidor(tarea['servidor'])}/{tarea['bd']}"
+
+        def progreso_bd(estado):
+            if progreso:
+                progreso(dict(estado, fase=f"{tarea['bd']} {estado['fase']}"))
+
+        t0 = time.perf_counter()
+        with cupos[tarea["servidor"]]:
+            ok, detalle = ejecutar_midiendo(nombre, _ejecutar_job, tarea["datos"], progreso_bd,
+                                            padre=jobname, servidor=nombre_servidor(tarea["servidor"]),
+                                            bd=tarea["bd"])
+        return {"servidor": nombre_servidor(tarea["servidor"]), "bd": tarea["bd"], "ok": ok,
+                "detalle": detalle, "segundos": round(time.perf_counter() - t0, 3)}
+
+    with medir_fase(metricas, "volcado") as fase:
+        workers = max(1, min(datos.get("workers_bds") or WORKERS_BDS_DEFECTO, len(tareas)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futuros = [pool.submit(copiar, t) for t in intercalar_por_servidor(tareas)]
+            for futuro in as_completed(futuros):
+                try:
+                    resultados.append(futuro.result())
+                except Exception as e:
+                    resultados.append({"servidor": None, "bd": None, "ok": False, "detalle": str(e)})
+        fase["ok"] = all(r["ok"] for r in resultados)
+        fase["bases"] = len(tareas)
+
+    resultados.sort(key=lambda r: (r["servidor"] or "", r["bd"] or ""))
+    metricas["bases"] = resultados
+    fallidas = [r for r in resultados if not r["ok"]]
+    if fallidas:
+        return (False, f"{len(fallidas)} de {len(resultados)} base(s) fallaron: " +
+                "; ".join(f"{r['servidor']}/{r['bd']}: {r['detalle']}" for r in fallidas))
+    return (True, f"{len(resultados)} base(s) copiadas en {len(servidores)} servidor(es)")
+
+# -------------------------
+# BACKUPS INCREMENTALES (posición del binlog)
+# -------------------------
+# Un job con `modo = incremental` hace un volcado completo que guarda las
+# coordenadas del binlog y, en las ejecuciones siguientes, solo exporta con
+# mysqlbinlog los eventos desde la última posición registrada. Cada eslabón
+# queda en el catálogo con extra = {"tipo", "cadena", "binlog_inicio", "binlog"}.
+FULL_CADA_HORAS_DEFECTO = 24
+PATRON_COORDENADAS_DUMP = re.compile(
+    r"CHANGE (?:MASTER|REPLICATION SOURCE) TO (?:MASTER|SOURCE)_LOG_FILE='([^']+)',\s*"
+    r"(?:MASTER|SOURCE)_LOG_POS=(\d+)"
+)
+PATRON_EVENTO_BINLOG = re.compile(r"^#(\d{6})\s+(\d{1,2}:\d{2}:\d{2})\s+server id")
+LINEAS_CABECERA_DUMP = 200
+
+def parsear_coordenadas_dump(lineas):
+    """Busca el comentario CHANGE MASTER/REPLICATION SOURCE de --master-data=2."""
+    for i, linea in enumerate(lineas):
+        if i >= LINEAS_CABECERA_DUMP:
+            break
+        if isinstance(linea, bytes):
+            linea = linea.decode("utf-8", errors="replace")
+        m = PATRON_COORDENADAS_DUMP.search(linea)
+        if m:
+            return {"archivo": m.group(1), "posicion": int(m.group(2))}
+    return None
+
+def leer_coordenadas_dump(path):
+    try:
+        with contextlib.ExitStack() as pila:
+            return parsear_coordenadas_dump(abrir_lectura_backup(pila, path))
+    except Exception:
+        return None
+
+def version_mysqldump():
+    """Retorna (es_mariadb, (mayor, menor, parche)) según `mysqldump --version`."""
+    huella = leer_cache_ejecutables().get("mysqldump.exe") or {}
+    texto = huella.get("version") or ""
+    if not texto:
+        ruta = buscar_ejecutable("mysqldump.exe")
+        if ruta:
+            try:
+                texto = subprocess.run([ruta, "--version"], stdout=subprocess.PIPE, text=True).stdout
+            except Exception:
+                texto = ""
+    m = re.search(r"(?:Distrib|Ver)\s+(\d+)\.(\d+)\.(\d+)", texto)
+    return ("mariadb" in texto.lower(), tuple(int(x) for x in m.groups()) if m else None)
+
+def opcion_coordenadas_dump():
+    es_mariadb, version = version_mysqldump()
+    if not es_mariadb and version and version >= (8, 0, 26):
+        return "--source-data=2"
+    return "--master-data=2"
+
+def posicion_binlog_actual(usuario, contrasena):
+    for sql in ("SHOW MASTER STATUS", "SHOW BINARY LOG STATUS"):
+        ok, filas = consultar_mysql(usuario, contrasena, sql)
+        if ok and filas and len(filas[0]) >= 2:
+            return (True, {"archivo": filas[0][0], "posicion": int(filas[0][1])})
+    return (False, "No se pudo leer la posición del binlog (¿log_bin desactivado o faltan permisos REPLICATION CLIENT?).")
+
+def listar_binlogs(usuario, contrasena):
+    ok, filas = consultar_mysql(usuario, contrasena, "SHOW BINARY LOGS")
+    if not ok:
+        return (False, filas)
+    return (True, [f[0] for f in filas if f])
+
+def filtrar_binlog_hasta(lineas, hasta):
+    """
+    Recorta la salida de texto de mysqlbinlog en el primer evento posterior a
+    `hasta` (datetime). La transacción abierta en el corte se descarta con
+    ROLLBACK, igual que hace mysqlbinlog con --stop-datetime.
+    """
+    pendiente = None
+    for linea in lineas:
+        texto = linea.decode("utf-8", errors="replace") if isinstance(linea, bytes) else linea
+        if texto.startswith("# at "):
+            if pendiente is not None:
+                yield pendiente
+            pendiente = linea
+            continue
+        m = PATRON_EVENTO_BINLOG.match(texto)
+        if m:
+            momento = datetime.datetime.strptime(f"{m.group(1)} {m.group(2)}", "%y%m%d %H:%M:%S")
+            if momento > hasta:
+                fin = "ROLLBACK /* corte de restauración a un punto en el tiempo */ /*!*/;\nDELIMITER ;\n"
+                yield fin.encode("utf-8") if isinstance(linea, bytes) else fin
+                return
+        if pendiente is not None:
+            yield pendiente
+            pendiente = None
+        yield linea
+    if pendiente is not None:
+        yield pendiente
+
+def eslabones_job(jobname):
+    """Cadena vigente del job: [full, incremental, incremental, ...] (puede ser [])."""
+    recientes = consultar_copias(job=jobname, limite=500, descendente=True)
+    cadena = []
+    for copia in recientes:
+        tipo = copia["extra"].get("tipo")
+        if tipo == "incremental":
+            cadena.append(copia)
+        elif tipo == "full":
+            cadena.append(copia)
+            break
+        else:
+            return []
+    if not cadena or cadena[-1]["extra"].get("tipo") != "full":
+        return []
+    cadena.reverse()
+    return [c for c in cadena if c["id"] == cadena[0]["id"] or c["extra"].get("cadena") == cadena[0]["id"]]
+
+def necesita_full(cadena, full_cada_horas):
+    if not cadena or not cadena[-1]["extra"].get("binlog"):
+        return True
+    try:
+        inicio = datetime.datetime.strptime(cadena[0]["hora"], "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return True
+    return datetime.datetime.now() - inicio >= datetime.timedelta(hours=full_cada_horas)
+
+def ejecutar_job_incremental(jobname, datos, archivo, compresion, progreso=None):
+    usuario = datos.get("usuario", "")
+    contrasena = datos.get("contrasena", "")
+    bd = datos.get("bd", "")
+    try:
+        full_cada_horas = float(datos.get("full_cada_horas") or FULL_CADA_HORAS_DEFECTO)
+    except ValueError:
+        full_cada_horas = FULL_CADA_HORAS_DEFECTO
+
+    cadena = eslabones_job(jobname)
+    inicio = cadena[-1]["extra"]["binlog"] if cadena and cadena[-1]["extra"].get("binlog") else None
+    archivos = None
+    if inicio and not necesita_full(cadena, full_cada_horas):
+        ok, archivos = listar_binlogs(usuario, contrasena)
+        if not ok or inicio["archivo"] not in archivos:
+            # El binlog de partida fue purgado: la cadena no puede continuar.
+            archivos = None
+
+    if archivos is None:
+        extra_dump = ["--single-transaction", opcion_coordenadas_dump()]
+        integridad = {}
+        ok, err = ejecutar_mysqldump(usuario, contrasena, bd, None, archivo, compresion=compresion, extra=extra_dump,
+                                     progreso=progreso, nivel=datos.get("nivel_compresion"),
+                                     hilos=datos.get("hilos_compresion"), integridad=integridad)
+        if not ok:
+            return (False, err)
+        archivo_result = ruta_comprimida(archivo, compresion)
+        coordenadas = leer_coordenadas_dump(archivo_result)
+        if coordenadas is None:
+            return (False, "El volcado no contiene coordenadas del binlog (¿log_bin desactivado?).")
+        agregar_copia(usuario, contrasena, bd, archivo_result, job=jobname,
+                      extra={"tipo": "full", "binlog": coordenadas}, sha256=integridad.get("sha256"))
+        return (True, archivo_result)
+
+    ok, fin = posicion_binlog_actual(usuario, contrasena)
+    if not ok:
+        return (False, fin)
+    if fin == inicio:
+        return (True, f"Sin cambios desde {inicio['archivo']}:{inicio['posicion']}")
+
+    mysqlbinlog = obtener_ejecutable_seguro("mysqlbinlog.exe")
+    if not mysqlbinlog:
+        return (False, mensaje_no_encontrado("mysqlbinlog"))
+
+    tramo = archivos[archivos.index(inicio["archivo"]):]
+    if fin["archivo"] in tramo:
+        tramo = tramo[:tramo.index(fin["archivo"]) + 1]
+    comando = [mysqlbinlog, "--read-from-remote-server"] + argumentos_servidor() + ["-u", usuario]
+    if contrasena:
+        comando.append(f"-p{contrasena}")
+    comando += [f"--database={bd}", f"--start-position={inicio['posicion']}",
+                f"--stop-position={fin['posicion']}"] + tramo
+
+    archivo_incr = archivo.replace("_backup_", "_INCR_")
+    medidor = medidor_si_corresponde("binlog", progreso, lambda: (None, {}))
+    integridad = {}
+    ok, err = volcar_a_archivo(comando, archivo_incr, compresion, medidor=medidor, integridad=integridad)
+    cerrar_medidor(medidor)
+    if not ok:
+        return (False, err)
+    archivo_result = ruta_comprimida(archivo_incr, compresion)
+    agregar_copia(usuario, contrasena, bd, archivo_result, job=jobname,
+                  extra={"tipo": "incremental", "cadena": cadena[0]["id"],
+                         "binlog_inicio": inicio, "binlog": fin}, sha256=integridad.get("sha256"))
+    return (True, archivo_result)
+
+def restaurar_punto_en_el_tiempo(usuario, contrasena, bd, jobname, hasta=None, progreso=None):
+    """
+    Restaura en `bd` el último full del job anterior a `hasta` (datetime o
+    None = lo más reciente) y aplica en orden sus incrementales, recortando
+    el último en `hasta`. `bd` tiene que ser la base del job: los eventos
+    del binlog llevan el nombre de la base de origen (USE y, en formato ROW,
+    dentro de cada evento), así que en otra base terminarían escribiendo en
+    la original.
+    """
+    limite = hasta.strftime("%Y-%m-%d %H:%M:%S") if hasta else None
+    fulls = [c for c in consultar_copias(job=jobname, hasta=limite, descendente=True, limite=500)
+             if c["extra"].get("tipo") == "full"]
+    if not fulls:
+        return (False, f"No hay un backup completo del job {jobname} antes de esa fecha.")
+    full = fulls[0]
+    if bd != full["bd"]:
+        return (False, f"Los incrementales del job {jobname} se reaplican sobre {full['bd']}: "
+                       f"no se pueden restaurar en otra base ({bd}).")
+    incrementales = []
+    for c in consultar_copias(job=jobname, desde=full["hora"]):
+        if c["extra"].get("tipo") == "incremental" and c["extra"].get("cadena") == full["id"]:
+            incrementales.append(c)
+            if hasta and c["hora"] >= limite:
+                # Este incremental ya cubre el instante pedido.
+                break
+
+    # Cada eslabón debe empezar donde terminó el anterior: si falta uno, se
+    # perderían sus eventos sin aviso.
+    anterior = full
+    for incr in incrementales:
+        if incr["extra"].get("binlog_inicio") != anterior["extra"].get("binlog"):
+            return (False, f"La cadena del job {jobname} está cortada: {incr['ruta']} no continúa "
+                           f"la posición del binlog de {anterior['ruta']}.")
+        anterior = incr
+
+    ok, err = restaurar_archivo_backup(usuario, contrasena, bd, full["ruta"], progreso=progreso)
+    if not ok:
+        return (False, f"{full['ruta']}: {err}")
+
+    mysql_exe = obtener_ejecutable_seguro("mysql.exe")
+    if not mysql_exe:
+        return (False, mensaje_no_encontrado("mysql"))
+    comando = construir_comando_mysql(mysql_exe, usuario, contrasena, bd)
+    aplicados = 1
+    for incr in incrementales:
+        def lineas(path=incr["ruta"]):
+            yield from lineas_de_archivo(path)
+        flujo = filtrar_binlog_hasta(lineas(), hasta) if hasta else lineas()
+        ok, err, _ = cargar_en_cliente(comando, flujo)
+        if not ok:
+            return (False, f"{incr['ruta']}: {err}")
+        aplicados += 1
+    return (True, f"{aplicados} archivo(s) aplicados desde {full['ruta']}")
+
+# -------------------------
+# RETENCIÓN DE COPIAS (max_backups, antigüedad y abuelo-padre-hijo)
+# -------------------------
+# La política sale de config_backup.json (max_backups global) y se puede
+# pisar por job en config.ini: max_backups, max_dias y gfs = "diarios,
+# semanales, mensuales[, anuales]". Una copia se conserva solo si cumple todas
+# las reglas configuradas; la más reciente del job nunca se borra, y un full
+# se conserva mientras alguno de sus incrementales siga vivo (igual que una
+# copia de la que otra viva toma tablas sin cambios).
+CONFIG_BACKUP_FILE = "config_backup.json"
+SUFIJO_BORRANDO = ".borrando"
+GRACIA_CHUNKS_HUERFANOS_S = 3600
+
+def leer_config_backup():
+    try:
+        with open(CONFIG_BACKUP_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def entero_positivo(valor):
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        return None
+    return valor if valor > 0 else None
+
+def politica_retencion(datos_job=None):
+    datos_job = datos_job or {}
+    politica = {
+        "max_backups": entero_positivo(datos_job.get("max_backups") or leer_config_backup().get("max_backups")),
+        "max_dias": entero_positivo(datos_job.get("max_dias")),
+        "gfs": None
+    }
+    niveles = [entero_positivo(x) or 0 for x in str(datos_job.get("gfs") or "").split(",") if x.strip()]
+    if any(niveles):
+        politica["gfs"] = dict(zip(("diarios", "semanales", "mensuales", "anuales"), niveles))
+    return politica
+
+def claves_gfs(momento):
+    anio, semana, _ = momento.isocalendar()
+    return {
+        "diarios": momento.date(),
+        "semanales": (anio, semana),
+        "mensuales": (momento.year, momento.month),
+        "anuales": momento.year
+    }
+
+def conservadas_gfs(filas, gfs):
+    """`filas` ordenadas de la más nueva a la más vieja: (id, hora). Retorna los ids a conservar."""
+    conservar = set()
+    vistos = {nivel: set() for nivel in gfs}
+    for copia_id, hora in filas:
+        try:
+            claves = claves_gfs(datetime.datetime.strptime(hora, "%Y-%m-%d %H:%M:%S"))
+        except (TypeError, ValueError):
+            conservar.add(copia_id)
+            continue
+        for nivel, cantidad in gfs.items():
+            if len(vistos[nivel]) < cantidad and claves[nivel] not in vistos[nivel]:
+                vistos[nivel].add(claves[nivel])
+                conservar.add(copia_id)
+    return conservar
+
+def seleccionar_victimas(con, job, politica, ahora=None):
+    """
+    Elige en el catálogo las copias del job que la política descarta. Solo lee
+    (id, hora, extra) por el índice (job, id), sin listar carpetas.
+    """
+    filas = con.execute("SELECT id, hora, ruta, extra FROM copias WHERE job = ? ORDER BY id DESC", (job,)).fetchall()
+    if len(filas) <= 1:
+        return []
+    vivas = {f["id"] for f in filas}
+    if politica.get("max_backups"):
+        vivas &= {f["id"] for f in filas[:politica["max_backups"]]}
+    if politica.get("max_dias"):
+        ahora = ahora or datetime.datetime.now()
+        limite = (ahora - datetime.timedelta(days=politica["max_dias"])).strftime("%Y-%m-%d %H:%M:%S")
+        vivas &= {f["id"] for f in filas if (f["hora"] or "") >= limite}
+    if politica.get("gfs"):
+        vivas &= conservadas_gfs([(f["id"], f["hora"]) for f in filas], politica["gfs"])
+    vivas.add(filas[0]["id"])
+
+    # Cadenas incrementales: un incremental sin su full no sirve y un full con
+    # incrementales vivos no se puede borrar. Lo mismo con las copias de las
+    # que una copia viva toma tablas sin cambios (tablas_desde).
+    cadenas = {}
+    for f in filas:
+        if f["extra"] and ('"cadena"' in f["extra"] or '"tablas_desde"' in f["extra"]):
+            extra = json.loads(f["extra"])
+            if "cadena" in extra:
+                cadenas[f["id"]] = extra["cadena"]
+            if f["id"] in vivas:
+                vivas.update(extra.get("tablas_desde", {}).values())
+    # La cadena solo se recorta desde su extremo más nuevo: si un incremental
+    # sigue vivo, también el full y todos los incrementales anteriores.
+    ultimo_vivo = {}
+    for copia_id, full_id in cadenas.items():
+        if copia_id in vivas and full_id is not None:
+            vivas.add(full_id)
+            ultimo_vivo[full_id] = max(ultimo_vivo.get(full_id, copia_id), copia_id)
+    for copia_id, full_id in cadenas.items():
+        if full_id in ultimo_vivo and copia_id <= ultimo_vivo[full_id]:
+            vivas.add(copia_id)
+    vivas -= {copia_id for copia_id, full_id in cadenas.items() if full_id is not None and full_id not in vivas}
+
+    return [{"id": f["id"], "hora": f["hora"], "ruta": f["ruta"]} for f in reversed(filas) if f["id"] not in vivas]
+
+def objetivo_borrado(ruta):
+    """Lo que hay que borrar en disco para una copia: el archivo, o la carpeta de un volcado paralelo."""
+    if os.path.basename(ruta).lower() == ARCHIVO_MANIFIESTO:
+        return os.path.dirname(ruta)
+    return ruta
+
+def aplicar_retencion(job, politica, simular=False):
+    """
+    Aplica la política al job. Retorna (True, victimas) o (False, error).
+    Con `simular` solo informa qué se borraría. Los archivos primero se
+    renombran a *.borrando; si la baja en el catálogo falla se devuelven a su
+    nombre, y solo después de confirmarla se eliminan del disco.
+    """
+    try:
+        with contextlib.closing(conectar_catalogo()) as con:
+            victimas = seleccionar_victimas(con, job, politica)
+            if simular or not victimas:
+                return (True, victimas)
+
+            renombrados = []
+            borrables = []
+            for victima in victimas:
+                objetivo = objetivo_borrado(victima["ruta"] or "")
+                try:
+                    os.replace(objetivo, objetivo + SUFIJO_BORRANDO)
+                    renombrados.append(objetivo)
+                except FileNotFoundError:
+                    pass  # ya no estaba: solo se quita del catálogo
+                except OSError as e:
+                    victima["error"] = str(e)
+                    continue
+                borrables.append(victima)
+            try:
+                with con:
+                    con.executemany("DELETE FROM copias WHERE id = ?", [(v["id"],) for v in borrables])
+            except Exception:
+                for objetivo in renombrados:
+                    try:
+                        os.replace(objetivo + SUFIJO_BORRANDO, objetivo)
+                    except OSError:
+                        pass
+                raise
+    except Exception as e:
+        return (False, str(e))
+
+    almacenes = set()
+    for objetivo in renombrados:
+        if objetivo.endswith(EXTENSION_DEDUP):
+            almacenes.add(carpeta_almacen_dedup(os.path.dirname(objetivo)))
+        if os.path.isdir(objetivo + SUFIJO_BORRANDO):
+            shutil.rmtree(objetivo + SUFIJO_BORRANDO, ignore_errors=True)
+        else:
+            eliminar_archivo_parcial(objetivo + SUFIJO_BORRANDO)
+    for almacen in almacenes:
+        limpiar_chunks_huerfanos(almacen)
+    return (True, victimas)
+
+def limpiar_chunks_huerfanos(almacen, simular=False):
+    """
+    Borra los chunks que ningún manifiesto .dedup del catálogo referencia,
+    incluidos los de cada tabla de un volcado paralelo (su manifest.json).
+    Los usados en la última hora se respetan: un volcado en curso todavía
+    no escribió su manifiesto.
+    """
+    referenciados = set()
+    with contextlib.closing(conectar_catalogo()) as con:
+        rutas = [f[0] for f in con.execute("SELECT ruta FROM copias WHERE ruta LIKE ?", (f"%{EXTENSION_DEDUP}",))]
+        paralelos = [f[0] for f in con.execute("SELECT ruta FROM copias WHERE ruta LIKE ?",
+                                               (f"%{ARCHIVO_MANIFIESTO}",))]
+    for ruta in paralelos:
+        try:
+            tablas = leer_manifiesto(ruta).get("tablas") or []
+        except Exception:
+            continue
+        rutas += [os.path.join(os.path.dirname(ruta), t["archivo"]) for t in tablas
+                  if str(t.get("archivo", "")).endswith(EXTENSION_DEDUP)]
+    for ruta in rutas:
+        try:
+            manifiesto = leer_manifiesto_dedup(ruta)
+        except Exception:
+            continue
+        if os.path.abspath(manifiesto["almacen"]) == os.path.abspath(almacen):
+            referenciados.update(h for h, _ in manifiesto["chunks"])
+
+    limite = time.time() - GRACIA_CHUNKS_HUERFANOS_S
+    liberados = 0
+    for raiz, _, archivos in os.walk(os.path.join(almacen, "chunks")):
+        for nombre in archivos:
+            path = os.path.join(raiz, nombre)
+            try:
+                if nombre in referenciados or os.path.getmtime(path) > limite:
+                    continue
+                liberados += os.path.getsize(path)
+                if not simular:
+                    os.remove(path)
+            except OSError:
+                pass
+    return liberados
+
+def aplicar_retencion_job(jobname, datos=None, simular=False):
+    datos = datos if datos is not None else leer_job_config(jobname)
+    return aplicar_retencion(jobname, politica_retencion(datos), simular=simular)
+
+# -------------------------
+# VERIFICACIÓN DE INTEGRIDAD (sha256 del catálogo, sin descomprimir)
+# -------------------------
+# Cada volcado guarda en copias.sha256 la suma del archivo tal como quedó en
+# disco, calculada mientras se escribía. Verificar vuelve a leer los archivos
+# (no los descomprime) y compara; los manifiestos (partes, multiarchivo) se
+# comparan contra su suma y cada archivo contra la suma que lista el
+# manifiesto. Con `profunda` además se descomprime y se busca la marca de fin
+# de mysqldump, lo único posible para copias anteriores sin suma.
+HILOS_VERIFICACION = 4
+
+def comparar_sha256(path, esperado):
+    if not os.path.exists(path):
+        return f"{os.path.basename(path)}: no existe"
+    if esperado and sha256_archivo(path) != esperado:
+        return f"{os.path.basename(path)}: el sha256 no coincide"
+    return None
+
+def tamano_verificado(path):
+    try:
+        return tamano_en_disco(path) or 0
+    except Exception:
+        return 0
+
+def archivos_sql_copia(ruta):
+    """Archivos con SQL de una copia: cada tabla de un volcado paralelo, o la copia misma."""
+    if os.path.basename(ruta).lower() == ARCHIVO_MANIFIESTO and not es_manifiesto_partes(ruta):
+        return [os.path.join(os.path.dirname(ruta), e["archivo"]) for e in leer_manifiesto(ruta).get("tablas", [])]
+    return [ruta]
+
+def termina_completo(path):
+    """Descomprime `path` en streaming y dice si termina con la marca de fin de mysqldump."""
+    cola = b""
+    with contextlib.ExitStack() as pila:
+        f = abrir_lectura_backup(pila, path)
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b""):
+            cola = (cola + bloque[-LARGO_COLA_DUMP:])[-LARGO_COLA_DUMP:]
+    return MARCA_FIN_DUMP in cola
+
+def verificar_copia(copia, profunda=False):
+    """Verifica una copia del catálogo. Retorna {"id", "ruta", "estado", "detalle", "bytes", "segundos"}."""
+    ruta = copia["ruta"]
+    t0 = time.perf_counter()
+    errores = []
+    sumas = bool(copia.get("sha256"))
+    try:
+        error = comparar_sha256(ruta, copia.get("sha256"))
+        if error:
+            errores.append(error)
+        elif os.path.basename(ruta).lower() == ARCHIVO_MANIFIESTO:
+            manifiesto = leer_manifiesto(ruta)
+            for entrada in manifiesto.get("partes", []) + manifiesto.get("tablas", []):
+                error = comparar_sha256(os.path.join(os.path.dirname(ruta), entrada["archivo"]), entrada.get("sha256"))
+                if error:
+                    errores.append(error)
+        elif ruta.endswith(EXTENSION_DEDUP):
+            # Los chunks se nombran por el sha256 de su contenido: leer_chunk lo comprueba.
+            manifiesto = leer_manifiesto_dedup(ruta)
+            for hash_hex in sorted({h for h, _ in manifiesto["chunks"]}):
+                try:
+                    leer_chunk(manifiesto["almacen"], hash_hex)
+                except Exception as e:
+                    errores.append(f"chunk {hash_hex[:12]}: {e}")
+            sumas = True
+        if not errores and profunda and copia["extra"].get("tipo") != "incremental":
+            for archivo in archivos_sql_copia(ruta):
+                if not termina_completo(archivo):
+                    errores.append(f"{os.path.basename(archivo)}: falta la línea '-- Dump completed'")
+            sumas = True
+    except Exception as e:
+        errores.append(str(e))
+
+    if errores:
+        estado = "error"
+    else:
+        estado = "ok" if sumas else "sin_suma"
+    return {
+        "id": copia["id"],
+        "ruta": ruta,
+        "estado": estado,
+        "detalle": "; ".join(errores),
+        "bytes": tamano_verificado(ruta),
+        "segundos": round(time.perf_counter() - t0, 3)
+    }
+
+def registrar_verificaciones(resultados):
+    hora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with contextlib.closing(conectar_catalogo()) as con:
+        with con:
+            con.executemany("UPDATE copias SET verificacion = ? WHERE id = ?", [
+                (json.dumps({"hora": hora, "estado": r["estado"], "detalle": r["detalle"]}, ensure_ascii=False), r["id"])
+                for r in resultados
+            ])
+
+def copias_a_verificar(job=None, carpeta=None):
+    copias = consultar_copias(job=job)
+    if carpeta:
+        raiz = os.path.join(os.path.abspath(carpeta), "")
+        copias = [c for c in copias if os.path.abspath(c["ruta"]).startswith(raiz)]
+    return copias
+
+def verificar_copias(copias, workers=HILOS_VERIFICACION, profunda=False, progreso=None):
+    """
+    Verifica `copias` en un pool de `workers` hilos (hashlib libera el GIL,
+    así que el límite es el disco) y guarda el resultado en el catálogo.
+    `progreso(hechas, total)` se llama al terminar cada copia.
+    """
+    resultados = []
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+        futuros = [pool.submit(verificar_copia, c, profunda) for c in copias]
+        for hechas, futuro in enumerate(as_completed(futuros), 1):
+            resultados.append(futuro.result())
+            if progreso:
+                progreso(hechas, len(futuros))
+    resultados.sort(key=lambda r: r["id"])
+    if resultados:
+        registrar_verificaciones(resultados)
+    return resultados
+
+def formatear_verificacion(resultados, segundos=None):
+    lineas = [f"{r['estado'].upper():<8} {r['ruta']}" + (f"  ({r['detalle']})" if r["detalle"] else "")
+              for r in resultados if r["estado"] != "ok"]
+    conteo = collections.Counter(r["estado"] for r in resultados)
+    total_mb = sum(r["bytes"] for r in resultados) / 1048576
+    resumen = (f"{len(resultados)} copia(s): {conteo['ok']} ok, {conteo['error']} con error, "
+               f"{conteo['sin_suma']} sin suma registrada; {total_mb:.1f} MB leídos")
+    if segundos:
+        resumen += f" en {segundos:.1f} s ({total_mb / segundos:.1f} MB/s)"
+    return "\n".join(lineas + [resumen])
+
+# -------------------------
+# SIMULACROS DE RESTAURACIÓN (modo = simulacro)
+# -------------------------
+# Un job con `modo = simulacro` toma la última copia completa de `bd` (solo
+# del job `job_origen` si se indica), la verifica, la restaura en un esquema
+# descartable simulacro_<bd>_<fecha>, compara el COUNT(*) de cada tabla con
+# la base de origen y borra el esquema. La fase "restauracion" de
+# metricas.jsonl es el RTO medido; informe_simulacros muestra su evolución.
+PREFIJO_SIMULACRO = "simulacro_"
+TABLAS_POR_CONTEO = 50
+
+def identificador_sql(nombre):
+    return "`" + str(nombre).replace("`", "``") + "`"
+
+def nombre_esquema_simulacro(bd):
+    sufijo = "_" + datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    return (PREFIJO_SIMULACRO + bd)[:64 - len(sufijo)] + sufijo
+
+def copia_para_simulacro(bd, job=None):
+    """Última copia de la base entera: descarta incrementales, copias de algunas tablas y parciales."""
+    for copia in consultar_copias(bd=bd, job=job, descendente=True, limite=200):
+        extra = copia["extra"]
+        if copia["bd"] != copia["base"] or extra.get("tipo") == "incremental" or extra.get("tablas_desde"):
+            continue
+        if os.path.exists(copia["ruta"]):
+            return copia
+    return None
+
+def cambia_de_base(path):
+    """True si el volcado trae USE o CREATE DATABASE: se cargaría sobre la base original."""
+    with contextlib.ExitStack() as pila:
+        for i, linea in enumerate(abrir_lectura_backup(pila, path)):
+            if i >= LINEAS_CABECERA_DUMP:
+                break
+            if linea.startswith((b"USE ", b"CREATE DATABASE")):
+                return True
+    return False
+
+def contar_filas(usuario, contrasena, bd):
+    """Retorna (True, {tabla: filas}) con el COUNT(*) exacto de cada tabla base de `bd`, o (False, error)."""
+    ok, filas = consultar_mysql(usuario, contrasena,
+                                "SELECT TABLE_NAME FROM information_schema.TABLES "
+                                f"WHERE TABLE_SCHEMA = {literal_sql(bd)} AND TABLE_TYPE = 'BASE TABLE'")
+    if not ok:
+        return (False, filas)
+    tablas = [f[0] for f in filas if f and f[0]]
+    conteos = {}
+    # En grupos, para no pasar el límite de largo de la línea de comandos de Windows.
+    for i in range(0, len(tablas), TABLAS_POR_CONTEO):
+        sql = " UNION ALL ".join(f"SELECT {literal_sql(t)}, COUNT(*) FROM {identificador_sql(bd)}.{identificador_sql(t)}"
+                                 for t in tablas[i:i + TABLAS_POR_CONTEO])
+        ok, filas = consultar_mysql(usuario, contrasena, sql)
+        if not ok:
+            return (False, filas)
+        conteos.update((f[0], int(f[1])) for f in filas if len(f) > 1)
+    return (True, conteos)
+
+def comparar_filas(origen, restauradas):
+    return [{"tabla": t, "origen": origen.get(t), "restauradas": restauradas.get(t)}
+            for t in sorted(set(origen) | set(restauradas)) if origen.get(t) != restauradas.get(t)]
+
+def ejecutar_simulacro(jobname, metricas, progreso, datos):
+    with usar_servidor(servidor_explicito(datos)):
+        return _ejecutar_simulacro(datos, metricas, progreso)
+
+def _ejecutar_simulacro(datos, metricas, progreso):
+    usuario = datos.get("usuario", "")
+    contrasena = datos.get("contrasena", "")
+    bd = datos.get("bd", "")
+
+    with medir_fase(metricas, "seleccion") as fase:
+        copia = copia_para_simulacro(bd, datos.get("job_origen"))
+        fase["ok"] = copia is not None
+    if copia is None:
+        return (False, f"No hay copias completas de {bd} para el simulacro.")
+    ruta = copia["ruta"]
+
+    with medir_fase(metricas, "verificacion") as fase:
+        verificacion = verificar_copia(copia)
+        fase["ok"] = verificacion["estado"] != "error" and not cambia_de_base(ruta)
+    if verificacion["estado"] == "error":
+        return (False, f"{ruta}: {verificacion['detalle']}")
+    if not fase["ok"]:
+        return (False, f"{ruta} incluye USE o CREATE DATABASE: no se puede restaurar en un esquema aparte.")
+
+    esquema = nombre_esquema_simulacro(bd)
+    informe = {"bd": bd, "esquema": esquema, "copia_id": copia["id"], "ruta": ruta, "hora_copia": copia["hora"]}
+    metricas["simulacro"] = informe
+    with medir_fase(metricas, "crear_esquema") as fase:
+        fase["ok"], err = consultar_mysql(usuario, contrasena, f"CREATE DATABASE {identificador_sql(esquema)}")
+    if not fase["ok"]:
+        return (False, err)
+
+    def progreso_simulacro(estado):
+        informe["bytes_sql"] = estado["bytes"]
+        if progreso:
+            progreso(estado)
+
+    try:
+        with medir_fase(metricas, "restauracion") as fase:
+            workers = datos.get("workers") or 1
+            if workers > 1 or os.path.basename(ruta).lower() == ARCHIVO_MANIFIESTO:
+                ok, err = ejecutar_mysql_restore_paralelo(usuario, contrasena, esquema, ruta, workers=workers,
+                                                          progreso=progreso_simulacro)
+            else:
+                ok, err = ejecutar_mysql_restore(usuario, contrasena, esquema, ruta, progreso=progreso_simulacro)
+            fase["ok"] = ok
+            fase["bytes"] = informe.get("bytes_sql")
+        if not ok:
+            return (False, f"Restauración en {esquema}: {err}")
+        informe["segundos_restauracion"] = fase["segundos"]
+
+        with medir_fase(metricas, "comparacion") as fase:
+            ok_origen, origen = contar_filas(usuario, contrasena, bd)
+            ok_copia, restauradas = contar_filas(usuario, contrasena, esquema)
+            fase["ok"] = ok_origen and ok_copia
+        if not fase["ok"]:
+            return (False, f"Conteo de filas: {origen if not ok_origen else restauradas}")
+    finally:
+        with medir_fase(metricas, "limpieza") as fase:
+            fase["ok"], _ = consultar_mysql(usuario, contrasena, f"DROP DATABASE IF EXISTS {identificador_sql(esquema)}")
+
+    diferencias = comparar_filas(origen, restauradas)
+    informe.update(tablas=len(restauradas), filas=sum(restauradas.values()), diferencias=diferencias)
+    faltantes = [d["tabla"] for d in diferencias if d["restauradas"] is None]
+    if faltantes:
+        return (False, f"La copia restaurada no tiene {len(faltantes)} tabla(s) del origen: {', '.join(faltantes[:10])}")
+    mb = (informe.get("bytes_sql") or 0) / 1048576
+    return (True, f"{ruta} restaurada en {informe['segundos_restauracion']:.1f} s ({mb:.1f} MB), "
+                  f"{len(restauradas)} tabla(s), {len(diferencias)} con filas distintas al origen")
+
+def informe_simulacros(bd=None, desde=None, ultimos=5):
+    """
+    Agrupa los simulacros de metricas.jsonl por base. Retorna {bd: {"simulacros",
+    "fallidos", "rto": (p50, p95), "ultimos": [{"inicio", "ok", "segundos", "mb_s", "diferencias"}]}}.
+    """
+    por_bd = {}
+    for registro in leer_metricas(desde=desde):
+        simulacro = registro.get("simulacro")
+        if not simulacro or (bd and simulacro.get("bd") != bd):
+            continue
+        datos = por_bd.setdefault(simulacro.get("bd"), {"simulacros": 0, "fallidos": 0, "rto": [], "ultimos": []})
+        datos["simulacros"] += 1
+        if not registro.get("ok"):
+            datos["fallidos"] += 1
+        segundos = simulacro.get("segundos_restauracion")
+        if registro.get("ok") and segundos:
+            datos["rto"].append(segundos)
+        datos["ultimos"].append({
+            "inicio": registro.get("inicio"),
+            "ok": registro.get("ok"),
+            "segundos": segundos,
+            "mb_s": round(simulacro["bytes_sql"] / 1048576 / segundos, 2) if segundos and simulacro.get("bytes_sql") else None,
+            "diferencias": len(simulacro.get("diferencias") or [])
+        })
+    for datos in por_bd.values():
+        rto = sorted(datos["rto"])
+        datos["rto"] = (percentil(rto, 50), percentil(rto, 95))
+        datos["ultimos"] = datos["ultimos"][-ultimos:]
+    return por_bd
+
+def formatear_informe_simulacros(informe):
+    if not informe:
+        return "Sin simulacros registrados."
+    seg = lambda v: "-" if v is None else f"{v:.1f}s"
+    lineas = []
+    for bd, datos in sorted(informe.items(), key=lambda x: str(x[0])):
+        p50, p95 = datos["rto"]
+        lineas.append(f"{bd}: {datos['simulacros']} simulacros, {datos['fallidos']} fallidos, "
+                      f"RTO p50 {seg(p50)} / p95 {seg(p95)}")
+        for u in datos["ultimos"]:
+            estado = "ok" if u["ok"] else "FALLÓ"
+            velocidad = f"{u['mb_s']} MB/s" if u["mb_s"] is not None else "-"
+            lineas.append(f"    {u['inicio']}  {estado:<6} {seg(u['segundos']):>8}  {velocidad:>12}  "
+                          f"{u['diferencias']} tabla(s) con diferencias")
+    return "\n".join(lineas)
+
+# -------------------------
+# COLA ENTRE PROCESOS (límite de jobs simultáneos por servidor y por base)
+# -------------------------
+# El Programador de Windows puede lanzar varios backup_auto.py a la vez. Cada
+# uno pide turno en la tabla cola_trabajos del catálogo: espera mientras su
+# servidor o su base tengan el cupo lleno ([cola] max_por_servidor y
+# max_por_bd en config.ini), y si el mismo job ya tiene una ejecución
+# esperando, se suma a ella en vez de encolar otra. Un job con varios
+# servidores (ver JOBS MÚLTIPLES) encola una fila por servidor y arranca
+# cuando todas entran en cupo a la vez. Las filas llevan un latido
+# periódico; las de procesos muertos vencen a los TTL_LATIDO_S.
+TTL_LATIDO_S = 60
+INTERVALO_LATIDO_S = 15
+INTERVALO_ESPERA_COLA_S = 2
+LIMITES_COLA_DEFECTO = {"max_por_servidor": 1, "max_por_bd": 1, "espera_maxima_min": 120}
+
+def limites_cola():
+    config, _ = _config_vigente()
+    limites = {}
+    for clave, defecto in LIMITES_COLA_DEFECTO.items():
+        try:
+            limites[clave] = max(1, config.getint("cola", clave, fallback=defecto))
+        except ValueError:
+            limites[clave] = defecto
+    return limites
+
+def servidores_cola(datos):
+    """Nombres de todos los servidores a los que apunta el job, sin repetir."""
+    nombres = []
+    for servidor in servidores_job(datos):
+        if nombre_servidor(servidor) not in nombres:
+            nombres.append(nombre_servidor(servidor))
+    return nombres
+
+def puede_arrancar(fila, filas, limites):
+    corriendo = [f for f in filas if f["estado"] == "corriendo"]
+    if any(f["job"] == fila["job"] for f in corriendo):
+        return False
+    if sum(f["servidor"] == fila["servidor"] for f in corriendo) >= limites["max_por_servidor"]:
+        return False
+    return sum(f["servidor"] == fila["servidor"] and f["bd"] == fila["bd"]
+               for f in corriendo) < limites["max_por_bd"]
+
+def es_turno_de(fila_id, filas, limites):
+    """La fila es la primera en espera de su servidor que entra en cupo."""
+    propia = next(f for f in filas if f["id"] == fila_id)
+    for fila in filas:
+        if fila["estado"] != "esperando" or fila["servidor"] != propia["servidor"]:
+            continue
+        if puede_arrancar(fila, filas, limites):
+            return fila["id"] == fila_id
+    return False
+
+def intentar_turno(con, fila_ids, limites):
+    """
+    Dentro de una transacción: pasa las filas del job (una por servidor) a
+    'corriendo' si en cada servidor es la primera en espera que entra en cupo.
+    Todo o nada, para que un job de varios servidores no tome cupo a medias.
+    Retorna True (arranca), False (sigue esperando) o None si las filas
+    vencieron y hay que volver a encolarlas (ver reencolar_job).
+    """
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        ahora = time.time()
+        con.execute("DELETE FROM cola_trabajos WHERE latido < ?", (ahora - TTL_LATIDO_S,))
+        filas = [dict(f) for f in con.execute("SELECT * FROM cola_trabajos ORDER BY id")]
+        if not set(fila_ids) <= {f["id"] for f in filas}:
+            # Vencida (el proceso estuvo suspendido): se vuelve a encolar al final.
+            con.commit()
+            return None
+        if all(es_turno_de(fila_id, filas, limites) for fila_id in fila_ids):
+            con.executemany("UPDATE cola_trabajos SET estado = 'corriendo', iniciado = ?, latido = ? WHERE id = ?",
+                            [(ahora, ahora, fila_id) for fila_id in fila_ids])
+            con.commit()
+            return True
+        con.commit()
+        return False
+    except Exception:
+        con.rollback()
+        raise
+
+def encolar_job(con, jobname, datos, ahora):
+    """Dentro de una transacción: una fila en espera por servidor del job. Retorna sus ids."""
+    return [con.execute("INSERT INTO cola_trabajos (job, servidor, bd, pid, estado, creado, latido) "
+                        "VALUES (?, ?, ?, ?, 'esperando', ?, ?)",
+                        (jobname, servidor, datos.get("bd", ""), os.getpid(), ahora, ahora)).lastrowid
+            for servidor in servidores_cola(datos)]
+
+def reencolar_job(con, fila_ids, jobname, datos):
+    """Reemplaza las filas vencidas del job por filas nuevas al final de la cola (`fila_ids` se actualiza)."""
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        con.executemany("DELETE FROM cola_trabajos WHERE id = ?", [(fila_id,) for fila_id in fila_ids])
+        # El hilo de latir usa la misma lista: se actualiza en el lugar.
+        fila_ids[:] = encolar_job(con, jobname, datos, time.time())
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+
+def latir(fila_ids, parar):
+    while not parar.wait(INTERVALO_LATIDO_S):
+        try:
+            with contextlib.closing(conectar_catalogo()) as con:
+                with con:
+                    con.executemany("UPDATE cola_trabajos SET latido = ? WHERE id = ?",
+                                    [(time.time(), fila_id) for fila_id in fila_ids])
+        except sqlite3.Error:
+            pass
+
+@contextlib.contextmanager
+def turno_job(jobname, datos=None):
+    """
+    Espera turno para ejecutar `jobname` y lo libera al salir. Entrega un dict
+    con "estado": "corriendo" (ejecutar), "coalescido" (ya hay una igual en
+    espera: no ejecutar) o "vencido" (se superó espera_maxima_min), y "espera_s".
+    """
+    datos = datos if datos is not None else (leer_job_config(jobname) or {})
+    limites = limites_cola()
+    inicio = time.time()
+    turno = {"estado": None, "espera_s": 0.0}
+    parar = threading.Event()
+    fila_ids = []
+
+    with contextlib.closing(conectar_catalogo()) as con:
+        con.execute("BEGIN IMMEDIATE")
+        con.execute("DELETE FROM cola_trabajos WHERE latido < ?", (inicio - TTL_LATIDO_S,))
+        if con.execute("SELECT 1 FROM cola_trabajos WHERE job = ? AND estado = 'esperando'", (jobname,)).fetchone():
+            con.commit()
+            turno["estado"] = "coalescido"
+        else:
+            fila_ids = encolar_job(con, jobname, datos, inicio)
+            con.commit()
+
+        if fila_ids:
+            threading.Thread(target=latir, args=(fila_ids, parar), daemon=True).start()
+            limite = inicio + limites["espera_maxima_min"] * 60
+            try:
+                while True:
+                    arranca = intentar_turno(con, fila_ids, limites)
+                    if arranca:
+                        turno["estado"] = "corriendo"
+                        break
+                    if arranca is None:
+                        reencolar_job(con, fila_ids, jobname, datos)
+                    if time.time() > limite:
+                        turno["estado"] = "vencido"
+                        break
+                    time.sleep(INTERVALO_ESPERA_COLA_S)
+            except Exception:
+                soltar_turno(con, fila_ids, parar)
+                raise
+            turno["espera_s"] = round(time.time() - inicio, 3)
+
+        try:
+            yield turno
+        finally:
+            if fila_ids:
+                soltar_turno(con, fila_ids, parar)
+
+def soltar_turno(con, fila_ids, parar):
+    parar.set()
+    try:
+        with con:
+            con.executemany("DELETE FROM cola_trabajos WHERE id = ?", [(fila_id,) for fila_id in fila_ids])
+    except sqlite3.Error:
+        pass
+
+def listar_cola():
+    with contextlib.closing(conectar_catalogo()) as con:
+        return [dict(f) for f in con.execute("SELECT * FROM cola_trabajos WHERE latido >= ? ORDER BY id",
+                                             (time.time() - TTL_LATIDO_S,))]
+
+# -------------------------
+# GESTIÓN DE TAREAS WINDOWS
+# -------------------------
+def comando_tarea_programada(jobname):
+    """Comando que ejecuta el Programador: la entrada sin interfaz (backup_auto.py)."""
+    if getattr(sys, "frozen", False):
+        # Ejecutable de PyInstaller: --auto se despacha antes de cargar tkinter.
+        return f'"{sys.executable}" --auto --jobname "{jobname}"'
+    ruta_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backup_auto.py")
+    return f'python "{ruta_script}" --jobname "{jobname}"'
+
+def crear_tarea_windows(nombre_tarea, tipo, fecha, hora, jobname, repeticion_hours=None, dias_semana=None):
+    tr = comando_tarea_programada(jobname)
+
+    if tipo == "once":
+        cmd = f'schtasks /create /tn "{nombre_tarea}" /tr "{tr}" /sc once /st {hora} /sd {fecha} /f'
+    elif tipo == "daily":
+        cmd = f'schtasks /create /tn "{nombre_tarea}" /tr "{tr}" /sc daily /st {hora} /f'
+    elif tipo == "weekly":
+        dias = ",".join(dias_semana) if dias_semana else "MON"
+        cmd = f'schtasks /create /tn "{nombre_tarea}" /tr "{tr}" /sc weekly /d {dias} /st {hora} /f'
+    elif tipo == "hourly":
+        mo = repeticion_hours if repeticion_hours and repeticion_hours > 0 else 1
+        cmd = f'schtasks /create /tn "{nombre_tarea}" /tr "{tr}" /sc hourly /mo {mo} /st {hora} /f'
+    else:
+        return False, "Tipo inválido"
+
+    try:
+        resultado = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        invalidar_cache_tareas()
+        if resultado.returncode != 0:
+            return False, resultado.stderr
+        return True, None
+    except Exception as e:
+        return False, str(e)
+
+# -------------------------
+# EJECUTAR / BORRAR / CAMBIAR ESTADO WINDOWS
+# -------------------------
+def run_tarea_windows(nombre_tarea):
+    cmd = f'schtasks /run /tn "{nombre_tarea}"'
+    try:
+        r = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        invalidar_cache_tareas()
+        return (r.returncode == 0, r.stderr or r.stdout)
+    except Exception as e:
+        return (False, str(e))
+
+def delete_tarea_windows(nombre_tarea):
+    cmd = f'schtasks /delete /tn "{nombre_tarea}" /f'
+    try:
+        r = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        invalidar_cache_tareas()
+        return (r.returncode == 0, r.stderr or r.stdout)
+    except Exception as e:
+        return (False, str(e))
+
+def change_tarea_windows_enable(nombre_tarea, enable=True):
+    action = "/enable" if enable else "/disable"
+    cmd = f'schtasks /change /tn "{nombre_tarea}" {action}'
+    try:
+        r = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        invalidar_cache_tareas()
+        return (r.returncode == 0, r.stderr or r.stdout)
+    except Exception as e:
+        return (False, str(e))
+
+# -------------------------
+# CONSULTAR PRÓXIMA EJECUCIÓN (formato ISO)
+# -------------------------
+def normalizar_estado_tarea(status):
+    if not status:
+        return None
+    for k, v in ESTADO_MAP.items():
+        if k.lower() in status.lower():
+            return v
+    return status
+
+def normalizar_proxima_ejecucion(next_run):
+    """Normaliza la fecha de schtasks a YYYY-MM-DD HH:MM (si se reconoce el formato)."""
+    if not next_run:
+        return None
+    nr = next_run.strip()
+    formatos = [
+        "%d/%m/%Y %H:%M:%S",
+        "%d/%m/%Y %H:%M",
+        "%Y-%m-%d %H:%M:%S",
+        "%Y-%m-%d %H:%M"
+    ]
+    for fmt in formatos:
+        try:
+            return datetime.datetime.strptime(nr, fmt).strftime("%Y-%m-%d %H:%M")
+        except:
+            pass
+    return nr
+
+# -------------------------
+# CONSULTA MASIVA DE TAREAS (un solo schtasks para todas, con caché)
+# -------------------------
+TTL_CACHE_TAREAS = 8
+cache_tareas = {"datos": None, "momento": 0.0}
+lock_cache_tareas = threading.Lock()
+
+def _columna_csv(cabecera, candidatos):
+    for i, nombre in enumerate(cabecera):
+        if nombre.strip().lower() in candidatos:
+            return i
+    return None
+
+def parsear_schtasks_csv(texto):
+    """
+    Parsea la salida de `schtasks /query /fo CSV /v` (inglés o español) y
+    retorna {nombre_tarea: (proxima_ejecucion, estado)} con los valores ya
+    normalizados. El nombre va sin la barra inicial de la carpeta raíz.
+    Función pura: no ejecuta nada.
+    """
+    tareas = {}
+    cabecera = None
+    idx_nombre = idx_proxima = idx_estado = None
+    for fila in csv.reader(io.StringIO(texto)):
+        if not fila:
+            continue
+        nombre_col = _columna_csv(fila, ("taskname", "nombre de tarea", "nombre de la tarea"))
+        if nombre_col is not None:
+            # schtasks repite la cabecera por cada carpeta
+            cabecera = fila
+            idx_nombre = nombre_col
+            idx_proxima = _columna_csv(cabecera, ("next run time", "hora próxima ejecución",
+                                                  "próxima ejecución", "siguiente ejecución"))
+            idx_estado = _columna_csv(cabecera, ("status", "estado"))
+            continue
+        if cabecera is None or idx_nombre >= len(fila):
+            continue
+        nombre = fila[idx_nombre].strip().lstrip("\\")
+        if not nombre:
+            continue
+        proxima = fila[idx_proxima] if idx_proxima is not None and idx_proxima < len(fila) else None
+        estado = fila[idx_estado] if idx_estado is not None and idx_estado < len(fila) else None
+        # Con varios disparadores la misma tarea aparece en varias filas: vale la primera.
+        tareas.setdefault(nombre, (normalizar_proxima_ejecucion(proxima), normalizar_estado_tarea(estado)))
+    return tareas
+
+def consultar_tareas_programadas(forzar=False):
+    """
+    Retorna {nombre_tarea: (proxima_ejecucion, estado)} para todas las
+    tareas con un único schtasks, reutilizando el resultado TTL_CACHE_TAREAS
+    segundos.
+    """
+    with lock_cache_tareas:
+        if not forzar and cache_tareas["datos"] is not None and time.time() - cache_tareas["momento"] < TTL_CACHE_TAREAS:
+            return cache_tareas["datos"]
+        try:
+            r = subprocess.run("schtasks /query /fo CSV /v", shell=True,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            datos = parsear_schtasks_csv(r.stdout) if r.returncode == 0 else {}
+        except Exception:
+            datos = {}
+        cache_tareas["datos"] = datos
+        cache_tareas["momento"] = time.time()
+        return datos
+
+def invalidar_cache_tareas():
+    with lock_cache_tareas:
+        cache_tareas["datos"] = None
+
+def estado_tarea(task_name, forzar=False):
+    return consultar_tareas_programadas(forzar).get(task_name.lstrip("\\"), (None, None))
+
+# -------------------------
+# PROCESOS EN EJECUCIÓN
+# -------------------------
+def obtener_procesos_en_ejecucion():
+    """
+    Retorna lista de dicts con los procesos activos relevantes:
+    mysqldump.exe y python.exe (tareas automáticas).
+    """
+    procesos = []
+    try:
+        out = subprocess.run("tasklist /fo csv /nh", shell=True,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        lines = out.stdout.splitlines()
+
+        for l in lines:
+            parts = [p.strip().strip('"') for p in l.split('","')]
+            if len(parts) >= 2:
+                name = parts[0]
+                pid = parts[1]
+
+                if name.lower() in ("mysqldump.exe", "mysqldump"):
+                    procesos.append({"process": name, "pid": pid, "info": "mysqldump activo"})
+
+                if name.lower() in ("python.exe", "python"):
+                    procesos.append({"process": name, "pid": pid, "info": "python.exe (posible tarea automática)"})
+
+    except Exception:
+        pass
+
+    return procesos